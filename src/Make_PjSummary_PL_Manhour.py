@@ -9,7 +9,13 @@ A∪B統合版
 
 from __future__ import annotations
 
+import hashlib
+import importlib.util
+import marshal
+import os
 import sys
+from pathlib import Path
+from types import CodeType
 
 
 PL_SOURCE = r'''import csv
@@ -5069,9 +5075,44 @@ if __name__ == "__main__":
 '''
 
 
+# 埋め込みソースごとの名前空間（プロセス内で 1 回だけ exec する）
+_module_registry: dict = {}
+
+
+def _compile_source_with_cache(name: str, source: str, source_hash: str) -> CodeType:
+    # コンパイル済みバイトコードを temp/embedded_module_cache/ にソースのハッシュ単位で保存し、
+    # 次回起動時はコンパイルを省略する（Python のバージョンが異なるものは使わない）。
+    cache_dir = Path(__file__).resolve().parent / "temp" / "embedded_module_cache"
+    cache_path = cache_dir / f"{name}_{source_hash}.bin"
+    magic = importlib.util.MAGIC_NUMBER
+    if cache_path.exists():
+        try:
+            data = cache_path.read_bytes()
+            if data.startswith(magic):
+                code = marshal.loads(data[len(magic):])
+                if isinstance(code, CodeType):
+                    return code
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+    code = compile(source, f"<{name}>", "exec")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_dir / f"{cache_path.name}.{os.getpid()}.tmp"
+        temp_path.write_bytes(magic + marshal.dumps(code))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    return code
+
+
 def _load_module_from_source(name: str, source: str) -> dict:
+    source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    registry_key = f"{name}:{source_hash}"
+    if registry_key in _module_registry:
+        return _module_registry[registry_key]
     module_dict: dict = {"__name__": name}
-    exec(compile(source, f"<{name}>", "exec"), module_dict)
+    exec(_compile_source_with_cache(name, source, source_hash), module_dict)
+    _module_registry[registry_key] = module_dict
     return module_dict
 
 
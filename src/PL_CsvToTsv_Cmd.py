@@ -1,9 +1,14 @@
 import csv
+import heapq
+import io
 import os
 import re
 import shutil
 import sys
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
+
+from project_name_normalizer import normalize_project_name_for_pl
+from text_encoding_loader import read_csv_rows_with_encoding_detection
 
 
 def get_target_year_month_from_filename(pszInputFilePath: str) -> Tuple[int, int]:
@@ -31,22 +36,12 @@ def get_target_year_month_from_period_row(pszRowA: str) -> Tuple[int, int]:
 
 
 def read_csv_rows(pszInputFilePath: str) -> List[List[str]]:
-    objRows: List[List[str]] = []
-    try:
-        with open(pszInputFilePath, mode="r", encoding="utf-8-sig", errors="strict", newline="") as objFile:
-            objReader: csv.reader = csv.reader(objFile)
-            for objRow in objReader:
-                objRows.append(objRow)
-        append_debug_log("input decoded as utf-8-sig")
-        return objRows
-    except UnicodeDecodeError:
+    # ファイルは 1 回だけ読み込み、BOM または先頭のサンプルから utf-8-sig / cp932 を判定する
+    objRows, pszEncoding = read_csv_rows_with_encoding_detection(pszInputFilePath)
+    # UTF-8 として読めなかった場合は、従来と同じく cp932 に切り替えたことも記録する
+    if pszEncoding != "utf-8-sig":
         append_debug_log("utf-8-sig decode failed; retrying with cp932")
-
-    with open(pszInputFilePath, mode="r", encoding="cp932", errors="strict", newline="") as objFile:
-        objReader = csv.reader(objFile)
-        for objRow in objReader:
-            objRows.append(objRow)
-    append_debug_log("input decoded as cp932")
+    append_debug_log(f"input decoded as {pszEncoding}")
     return objRows
 
 
@@ -84,56 +79,67 @@ def build_unique_subjects(objSubjectRows: List[List[str]]) -> List[str]:
 
 
 
-def build_union_subject_order(objSubjectLists: List[List[str]]) -> List[str]:
+def build_union_subject_order(objSubjectLists: Iterable[Iterable[str]]) -> List[str]:
+    # 月ごとの科目リストは 1 回だけ走査する (ジェネレータなどのストリームでもよい)。
+    # 出現順と、連続する 2 科目の前後関係 (辺) を同時に集める。
     objAppearanceOrder: dict[str, int] = {}
-    iCounter: int = 0
+    objAdjacency: dict[str, set[str]] = {}
+    objIndegree: dict[str, int] = {}
     for objSubjectList in objSubjectLists:
+        pszBefore: str | None = None
         for pszSubject in objSubjectList:
             if pszSubject not in objAppearanceOrder:
-                objAppearanceOrder[pszSubject] = iCounter
-                iCounter += 1
-
-    objAdjacency: dict[str, set[str]] = {psz: set() for psz in objAppearanceOrder}
-    objIndegree: dict[str, int] = {psz: 0 for psz in objAppearanceOrder}
-    for objSubjectList in objSubjectLists:
-        for iIndex in range(len(objSubjectList) - 1):
-            pszBefore: str = objSubjectList[iIndex]
-            pszAfter: str = objSubjectList[iIndex + 1]
-            if pszAfter not in objAdjacency[pszBefore]:
-                objAdjacency[pszBefore].add(pszAfter)
-                objIndegree[pszAfter] += 1
-
+                objAppearanceOrder[pszSubject] = len(objAppearanceOrder)
+                objAdjacency[pszSubject] = set()
+                objIndegree[pszSubject] = 0
+            if pszBefore is not None and pszSubject not in objAdjacency[pszBefore]:
+                objAdjacency[pszBefore].add(pszSubject)
+                objIndegree[pszSubject] += 1
+            pszBefore = pszSubject
+
+    # 出現順をキーにした優先度付きキューで Kahn 法を行う
+    # (入次数 0 の科目のうち、最も先に出現した科目から順に確定する)
     objOrderedSubjects: List[str] = []
-    objReady: List[str] = [
-        pszSubject for pszSubject, iDegree in objIndegree.items() if iDegree == 0
+    objReady: List[Tuple[int, str]] = [
+        (objAppearanceOrder[pszSubject], pszSubject)
+        for pszSubject, iDegree in objIndegree.items()
+        if iDegree == 0
     ]
-    objReady.sort(key=lambda pszSubject: objAppearanceOrder[pszSubject])
+    heapq.heapify(objReady)
 
     while objReady:
-        pszSubject = objReady.pop(0)
+        _, pszSubject = heapq.heappop(objReady)
         objOrderedSubjects.append(pszSubject)
-        for pszNext in sorted(objAdjacency[pszSubject], key=lambda psz: objAppearanceOrder[psz]):
+        for pszNext in objAdjacency[pszSubject]:
             objIndegree[pszNext] -= 1
             if objIndegree[pszNext] == 0:
-                objReady.append(pszNext)
-        objReady.sort(key=lambda pszSubject: objAppearanceOrder[pszSubject])
+                heapq.heappush(objReady, (objAppearanceOrder[pszNext], pszNext))
 
+    # 循環がある場合は出現順をそのまま返す
     if len(objOrderedSubjects) != len(objAppearanceOrder):
         return list(objAppearanceOrder.keys())
 
     return objOrderedSubjects
 
 
-def build_cumulative_subject_order(objSubjectLists: List[List[str]]) -> List[str]:
-    objOrderedSubjects: List[str] = []
+def build_cumulative_subject_order(objSubjectLists: Iterable[Iterable[str]]) -> List[str]:
+    # 科目の並びを片方向連結リスト (科目 → 次の科目) で持つ。None は先頭の手前を表す。
+    # 月ごとに先頭の手前から走査し、既出の科目はその位置へ移り、
+    # 新しい科目は直前に見た科目 (既出・追加済み) の直後に挿入する。
+    objNextSubjects: dict[str | None, str | None] = {None: None}
     for objSubjectList in objSubjectLists:
-        iInsertAfterIndex: int = -1
+        pszInsertAfterSubject: str | None = None
         for pszSubject in objSubjectList:
-            if pszSubject in objOrderedSubjects:
-                iInsertAfterIndex = objOrderedSubjects.index(pszSubject)
-                continue
-            objOrderedSubjects.insert(iInsertAfterIndex + 1, pszSubject)
-            iInsertAfterIndex += 1
+            if pszSubject not in objNextSubjects:
+                objNextSubjects[pszSubject] = objNextSubjects[pszInsertAfterSubject]
+                objNextSubjects[pszInsertAfterSubject] = pszSubject
+            pszInsertAfterSubject = pszSubject
+
+    objOrderedSubjects: List[str] = []
+    pszCurrent: str | None = objNextSubjects[None]
+    while pszCurrent is not None:
+        objOrderedSubjects.append(pszCurrent)
+        pszCurrent = objNextSubjects[pszCurrent]
     return objOrderedSubjects
 
 
@@ -167,76 +173,8 @@ def transpose_rows(objRows: List[List[str]]) -> List[List[str]]:
 
 
 def normalize_project_name(pszProjectName: str) -> str:
-    if pszProjectName == "":
-        return pszProjectName
-    normalized = pszProjectName.replace("\t", "_")
-    normalized = re.sub(r"(P\d{5})(?![ _\t　【])", r"\1_", normalized)
-    normalized = re.sub(r"([A-OQ-Z]\d{3})(?![ _\t　【])", r"\1_", normalized)
-    normalized = re.sub(r"^(J\d{3}) +", r"\1_", normalized)
-    normalized = re.sub(r"([A-OQ-Z]\d{3})[ 　]+", r"\1_", normalized)
-    normalized = re.sub(r"(P\d{5})[ 　]+", r"\1_", normalized)
-
-    if normalized.startswith("【廃番】"):
-        try:
-            pszCode: str | None = None
-            iCodeIndex: int = -1
-            for pszPrefix in ["J", "A", "C", "H", "M", "P"]:
-                iSearchFrom: int = 0
-                iCodeLength: int = 4
-                if pszPrefix == "P":
-                    iCodeLength = 6
-                while True:
-                    iFoundIndex: int = normalized.find(pszPrefix, iSearchFrom)
-                    if iFoundIndex == -1:
-                        break
-                    if iFoundIndex + iCodeLength <= len(normalized):
-                        pszCode = normalized[iFoundIndex:iFoundIndex + iCodeLength]
-                        iCodeIndex = iFoundIndex
-                        break
-                    iSearchFrom = iFoundIndex + 1
-                if pszCode is not None:
-                    break
-            if pszCode is None or iCodeIndex == -1:
-                return normalized
-            pszHead: str = normalized[:iCodeIndex]
-            pszTail: str = normalized[iCodeIndex + len(pszCode):]
-            return pszCode + "_" + pszHead + pszTail
-        except Exception:
-            return normalized
-
-    if normalized.startswith("【"):
-        iBracketEndIndex: int = normalized.find("】")
-        if iBracketEndIndex != -1:
-            pszAfterBracket: str = normalized[iBracketEndIndex + 1:]
-            objMatch = re.search(r"(P\d{5}|[A-OQ-Z]\d{3})", pszAfterBracket)
-            if objMatch is not None:
-                pszCode = objMatch.group(1)
-                pszBeforeCode: str = pszAfterBracket[:objMatch.start()]
-                pszAfterCode: str = pszAfterBracket[objMatch.end():]
-                if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
-                    pszAfterCode = pszAfterCode[1:]
-                pszRest: str = normalized[: iBracketEndIndex + 1] + pszBeforeCode + pszAfterCode
-                return pszCode + "_" + pszRest
-
-    if len(normalized) >= 1 and normalized[0] in ["J", "A", "C", "H", "M"]:
-        if len(normalized) >= 5:
-            pszNextChar: str = normalized[4]
-            if pszNextChar == "【":
-                return normalized[:4] + "_" + normalized[4:]
-            if pszNextChar == " " or pszNextChar == "　":
-                return normalized[:4] + "_" + normalized[5:]
-        return normalized
-
-    if len(normalized) >= 1 and normalized[0] == "P":
-        if len(normalized) >= 7:
-            pszNextCharP: str = normalized[6]
-            if pszNextCharP == "【":
-                return normalized[:6] + "_" + normalized[6:]
-            if pszNextCharP == " " or pszNextCharP == "　":
-                return normalized[:6] + "_" + normalized[7:]
-        return normalized
-
-    return normalized
+    # 同じプロジェクト名は月をまたいで何度も現れるため、共通モジュールの LRU メモ付きの関数で正規化する
+    return normalize_project_name_for_pl(pszProjectName)
 
 
 def normalize_project_names_in_row(objRows: List[List[str]], iRowIndex: int) -> None:
@@ -283,9 +221,18 @@ def build_pj_name_vertical_rows(objRows: List[List[str]]) -> List[List[str]]:
     return objVerticalRows
 
 
-def write_first_row_tabs_to_newlines(pszInputFilePath: str, pszOutputFilePath: str) -> None:
-    with open(pszInputFilePath, mode="r", encoding="utf-8", newline="") as objInputFile:
-        pszFirstLine: str = objInputFile.readline()
+def format_tsv_first_line(objRows: List[List[str]]) -> str:
+    # write_tsv_rows で書き出したファイルを readline() した場合と同じ 1 行目 (改行を含む)
+    if not objRows:
+        return ""
+    objBuffer: io.StringIO = io.StringIO()
+    objWriter: csv.writer = csv.writer(objBuffer, delimiter="\t", lineterminator="\n")
+    objWriter.writerow(objRows[0])
+    return io.StringIO(objBuffer.getvalue(), newline="").readline()
+
+
+def write_first_row_tabs_to_newlines(objRows: List[List[str]], pszOutputFilePath: str) -> None:
+    pszFirstLine: str = format_tsv_first_line(objRows)
     pszConverted: str = pszFirstLine.replace("\t", "\n")
     with open(pszOutputFilePath, mode="w", encoding="utf-8", newline="") as objOutputFile:
         objOutputFile.write(pszConverted)
@@ -437,8 +384,7 @@ def main() -> int:
 
             write_tsv_rows(pszOutputFilePath, objOutputRows)
             append_debug_log(f"tsv written: {pszOutputFilePath}")
-            objOutputTsvRows: List[List[str]] = read_tsv_rows(pszOutputFilePath)
-            objOutputVerticalRows: List[List[str]] = build_first_column_rows(objOutputTsvRows)
+            objOutputVerticalRows: List[List[str]] = build_first_column_rows(objOutputRows)
             pszOutputVerticalFilePath: str = (
                 f"損益計算書_{iFileYear}年{pszMonth}月_科目名_vertical.tsv"
             )
@@ -449,8 +395,7 @@ def main() -> int:
             if objCostReportRows:
                 write_tsv_rows(pszCostReportFilePath, objCostReportRows)
                 append_debug_log(f"tsv written: {pszCostReportFilePath}")
-                objCostReportTsvRows: List[List[str]] = read_tsv_rows(pszCostReportFilePath)
-                objCostReportVerticalRows: List[List[str]] = build_first_column_rows(objCostReportTsvRows)
+                objCostReportVerticalRows: List[List[str]] = build_first_column_rows(objCostReportRows)
                 pszCostReportVerticalFilePath: str = (
                     f"製造原価報告書_{iFileYear}年{pszMonth}月_科目名_vertical.tsv"
                 )
@@ -461,7 +406,7 @@ def main() -> int:
 
 
             pszVerticalOutputFilePath: str = f"損益計算書_{iFileYear}年{pszMonth}月_PJ名称_vertical.tsv"
-            write_first_row_tabs_to_newlines(pszOutputFilePath, pszVerticalOutputFilePath)
+            write_first_row_tabs_to_newlines(objOutputRows, pszVerticalOutputFilePath)
             append_debug_log(f"vertical tsv written: {pszVerticalOutputFilePath}")
         except Exception as objException:
             iExitCode = 1
@@ -605,9 +550,9 @@ def create_profit_loss_union_tsvs(
             "_A∪B.tsv",
             "_A∪B_vertical.tsv",
         )
-        write_tsv_rows(pszUnionProfitLossVerticalFilePath, transpose_rows(objUnionProfitLossRows))
+        objUnionProfitLossVerticalRows: List[List[str]] = transpose_rows(objUnionProfitLossRows)
+        write_tsv_rows(pszUnionProfitLossVerticalFilePath, objUnionProfitLossVerticalRows)
         append_debug_log(f"union vertical tsv written: {pszUnionProfitLossVerticalFilePath}")
-        objUnionProfitLossVerticalRows: List[List[str]] = read_tsv_rows(pszUnionProfitLossVerticalFilePath)
         objProjectNameVerticalRows: List[List[str]] = build_first_column_rows(objUnionProfitLossVerticalRows)
         pszProjectNameVerticalFilePath: str = pszUnionProfitLossVerticalFilePath.replace(
             "_A∪B_vertical.tsv",
@@ -661,9 +606,9 @@ def create_cost_report_union_tsvs(
             "_A∪B.tsv",
             "_A∪B_vertical.tsv",
         )
-        write_tsv_rows(pszUnionCostReportVerticalFilePath, transpose_rows(objUnionCostReportRows))
+        objUnionCostReportVerticalRows: List[List[str]] = transpose_rows(objUnionCostReportRows)
+        write_tsv_rows(pszUnionCostReportVerticalFilePath, objUnionCostReportVerticalRows)
         append_debug_log(f"union vertical tsv written: {pszUnionCostReportVerticalFilePath}")
-        objUnionCostReportVerticalRows: List[List[str]] = read_tsv_rows(pszUnionCostReportVerticalFilePath)
         objProjectNameVerticalRows: List[List[str]] = build_first_column_rows(objUnionCostReportVerticalRows)
         pszProjectNameVerticalFilePath: str = pszUnionCostReportVerticalFilePath.replace(
             "_A∪B_vertical.tsv",
@@ -28,9 +28,12 @@ import sys
 from datetime import datetime
 from copy import copy
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from openpyxl import load_workbook
 
+from manhour_time_codec import convert_time_text_to_seconds, convert_time_texts_to_seconds
+from org_table_index import load_org_table_index
+
 
 def print_usage() -> None:
     pszUsage: str = (
@@ -229,21 +232,10 @@ def parse_number(pszText: str) -> float:
 
 
 def parse_time_to_seconds(pszTimeText: str) -> float:
-    pszValue: str = (pszTimeText or "").strip()
-    if pszValue == "":
-        return 0.0
-
-    objParts: List[str] = pszValue.split(":")
-    if len(objParts) != 3:
-        return 0.0
-    try:
-        iHours: int = int(objParts[0])
-        iMinutes: int = int(objParts[1])
-        iSeconds: int = int(objParts[2])
-    except ValueError:
-        return 0.0
-
-    return float(iHours * 3600 + iMinutes * 60 + iSeconds)
+    # 工数の時間文字列を秒数に変換する (共通コーデック manhour_time_codec の寛容モードを使用)。
+    # 前後の空白を除いた "h:mm:ss" 形式のみを変換し、
+    # 空文字・"h:mm" 形式・数値に変換できない値は 0 秒として扱う (従来の 1 セル変換と同じ)。
+    return float(convert_time_text_to_seconds(pszTimeText or "", bAllowHourMinute=False))
 
 
 def format_number(fValue: float) -> str:
@@ -282,24 +274,27 @@ def calculate_allocation(
 
     fSellGeneralAdminCostAllocation: float = fSellGeneralAdminCostTotal - fAllocatedSum
 
-    fTotalManhours: float = 0.0
-    for iRowIndex in range(iRowIndexProjectStart, iRowIndexProjectEnd + 1):
-        if iRowIndex >= len(objRows):
-            break
-        objRow: List[str] = objRows[iRowIndex]
-        if iManhourColumnIndex < len(objRow):
-            fTotalManhours += parse_time_to_seconds(objRow[iManhourColumnIndex])
+    # プロジェクト行 (iRowIndexProjectStart〜iRowIndexProjectEnd) の工数列を、
+    # 1 セルずつではなく列単位でまとめて秒数に変換し、工数の合計を求める。
+    # 工数列が存在しない行は対象外とし、変換の規則は parse_time_to_seconds と同じ
+    # ("h:mm:ss" のみ変換し、空文字・"h:mm"・不正な値は 0 秒) とする。
+    objManhourRowIndices: List[int] = [
+        iRowIndex
+        for iRowIndex in range(iRowIndexProjectStart, min(iRowIndexProjectEnd + 1, len(objRows)))
+        if iManhourColumnIndex < len(objRows[iRowIndex])
+    ]
+    objManhourSeconds: List[int] = convert_time_texts_to_seconds(
+        [objRows[iRowIndex][iManhourColumnIndex] for iRowIndex in objManhourRowIndices],
+        bAllowHourMinute=False,
+    ).tolist()
+    fTotalManhours: float = float(sum(objManhourSeconds))
 
     if fTotalManhours <= 0.0:
         return
 
-    for iRowIndex in range(iRowIndexProjectStart, iRowIndexProjectEnd + 1):
-        if iRowIndex >= len(objRows):
-            break
-        objRow = objRows[iRowIndex]
-        if iManhourColumnIndex >= len(objRow):
-            continue
-        fManhourSeconds: float = parse_time_to_seconds(objRow[iManhourColumnIndex])
+    for iRowIndex, iManhourSeconds in zip(objManhourRowIndices, objManhourSeconds):
+        objRow: List[str] = objRows[iRowIndex]
+        fManhourSeconds: float = float(iManhourSeconds)
         fAllocation: float = fSellGeneralAdminCostAllocation * fManhourSeconds / fTotalManhours
         fAllocation = float(int(round(fAllocation)))
 
@@ -536,21 +531,29 @@ def allocate_company_sg_admin_cost(objRows: List[List[str]]) -> List[List[str]]:
             continue
 
         fCompanyTotal: float = objCompanyTotals[iCompany]
-        fTotalSeconds: float = 0.0
-        for iRowIndex, objRow in enumerate(objOutputRows):
-            if iRowIndex == 0 or iManhourColumn >= len(objRow):
-                continue
-            fSeconds: float = parse_time_to_seconds(objRow[iManhourColumn])
-            if fSeconds > 0.0:
-                fTotalSeconds += fSeconds
+        # 見出し行を除く全行について、このカンパニーの工数列を列単位でまとめて秒数に変換する。
+        # 工数列が存在しない行は対象外とし、変換の規則は parse_time_to_seconds と同じ
+        # ("h:mm:ss" のみ変換し、空文字・"h:mm"・不正な値は 0 秒) とする。
+        # 配賦の分母には、0 秒より大きい工数だけを合計する。
+        objManhourRowIndices: List[int] = [
+            iRowIndex
+            for iRowIndex, objRow in enumerate(objOutputRows)
+            if iRowIndex > 0 and iManhourColumn < len(objRow)
+        ]
+        objManhourSeconds: List[int] = convert_time_texts_to_seconds(
+            [objOutputRows[iRowIndex][iManhourColumn] for iRowIndex in objManhourRowIndices],
+            bAllowHourMinute=False,
+        ).tolist()
+        fTotalSeconds: float = float(sum(iSeconds for iSeconds in objManhourSeconds if iSeconds > 0))
 
         if fTotalSeconds <= 0.0:
             continue
 
-        for iRowIndex, objRow in enumerate(objOutputRows):
-            if iRowIndex == 0 or iManhourColumn >= len(objRow) or iCompanyColumn >= len(objRow):
+        for iRowIndex, iManhourSeconds in zip(objManhourRowIndices, objManhourSeconds):
+            objRow = objOutputRows[iRowIndex]
+            if iCompanyColumn >= len(objRow):
                 continue
-            fSeconds = parse_time_to_seconds(objRow[iManhourColumn])
+            fSeconds: float = float(iManhourSeconds)
             if fSeconds <= 0.0:
                 continue
             fAllocation: float = fCompanyTotal * fSeconds / fTotalSeconds
@@ -2208,38 +2211,44 @@ def combine_company_sg_admin_columns(
     return objOutputRows
 
 
-def load_org_table_group_map(pszOrgTablePath: str) -> Dict[str, str]:
-    objGroupMap: Dict[str, str] = {}
-    if not os.path.isfile(pszOrgTablePath):
-        return objGroupMap
-
-    objRows = read_tsv_rows(pszOrgTablePath)
-    if not objRows:
-        return objGroupMap
-
-    objHeader = objRows[0]
+def resolve_org_table_column_indices(
+    objHeader: List[str],
+    objValueColumnCandidates: List[str],
+    iDefaultValueIndex: int,
+) -> Tuple[int, int, int]:
     iCodeIndex = find_column_index(objHeader, "PJコード")
-    objGroupColumnCandidates = ["計上グループ名", "計上グループ"]
-    iGroupIndex = -1
-    for pszColumn in objGroupColumnCandidates:
-        iGroupIndex = find_column_index(objHeader, pszColumn)
-        if iGroupIndex >= 0:
+    iValueIndex = -1
+    for pszColumn in objValueColumnCandidates:
+        iValueIndex = find_column_index(objHeader, pszColumn)
+        if iValueIndex >= 0:
             break
 
     iStartIndex = 0
     if iCodeIndex >= 0:
-        if iGroupIndex < 0:
-            iGroupIndex = iCodeIndex + 2
+        if iValueIndex < 0:
+            iValueIndex = iCodeIndex + 2
         iStartIndex = 1
     else:
         iCodeIndex = 2
-        iGroupIndex = 4
+        iValueIndex = iDefaultValueIndex
+    return iCodeIndex, iValueIndex, iStartIndex
+
 
+def build_org_table_prefix_map(
+    objRows: List[List[str]],
+    objValueColumnCandidates: List[str],
+) -> Dict[str, str]:
+    objPrefixMap: Dict[str, str] = {}
+    iCodeIndex, iValueIndex, iStartIndex = resolve_org_table_column_indices(
+        objRows[0],
+        objValueColumnCandidates,
+        4,
+    )
     for objRow in objRows[iStartIndex:]:
-        if iCodeIndex >= len(objRow) or iGroupIndex >= len(objRow):
+        if iCodeIndex >= len(objRow) or iValueIndex >= len(objRow):
             continue
         pszProjectCode: str = objRow[iCodeIndex].strip()
-        pszGroupName: str = objRow[iGroupIndex].strip()
+        pszValue: str = objRow[iValueIndex].strip()
         if not pszProjectCode:
             continue
 
@@ -2251,59 +2260,79 @@ def load_org_table_group_map(pszOrgTablePath: str) -> Dict[str, str]:
         pszPrefix: str = objMatch.group(1)
         if not pszPrefix.endswith("_"):
             pszPrefix += "_"
-        if pszPrefix not in objGroupMap:
-            objGroupMap[pszPrefix] = pszGroupName
+        if pszPrefix not in objPrefixMap:
+            objPrefixMap[pszPrefix] = pszValue
+    return objPrefixMap
 
-    return objGroupMap
 
+def find_org_table_headquarters_value(
+    objRows: List[List[str]],
+    objValueColumnCandidates: List[str],
+    iDefaultValueIndex: int,
+) -> Optional[str]:
+    iCodeIndex, iValueIndex, iStartIndex = resolve_org_table_column_indices(
+        objRows[0],
+        objValueColumnCandidates,
+        iDefaultValueIndex,
+    )
+    for objRow in objRows[iStartIndex:]:
+        if iCodeIndex >= len(objRow) or iValueIndex >= len(objRow):
+            continue
+        if objRow[iCodeIndex].strip() != "本部":
+            continue
+        return objRow[iValueIndex].strip()
+    return None
 
-def load_org_table_company_map(pszOrgTablePath: str) -> Dict[str, str]:
-    objCompanyMap: Dict[str, str] = {}
-    if not os.path.isfile(pszOrgTablePath):
-        return objCompanyMap
 
+# 管轄PJ表.tsv を 1 回だけ読み、PJコード接頭辞 → 計上グループ / 計上カンパニーと
+# 本部の計上グループ / 計上カンパニーをまとめたインデックスを作成する。
+# 作成結果は org_table_index のバイナリキャッシュに保存され、
+# 管轄PJ表.tsv が変わらない限り再利用される。
+def build_org_table_index_for_allocation(pszOrgTablePath: str) -> Dict[str, Any]:
     objRows = read_tsv_rows(pszOrgTablePath)
     if not objRows:
-        return objCompanyMap
+        return {
+            "IsEmpty": True,
+            "GroupMap": {},
+            "CompanyMap": {},
+            "HeadquartersGroup": None,
+            "HeadquartersCompany": None,
+        }
+    return {
+        "IsEmpty": False,
+        "GroupMap": build_org_table_prefix_map(objRows, ["計上グループ名", "計上グループ"]),
+        "CompanyMap": build_org_table_prefix_map(objRows, ["計上カンパニー名", "計上カンパニー"]),
+        "HeadquartersGroup": find_org_table_headquarters_value(
+            objRows,
+            ["計上グループ名", "計上グループ"],
+            4,
+        ),
+        "HeadquartersCompany": find_org_table_headquarters_value(
+            objRows,
+            ["計上カンパニー名", "計上カンパニー"],
+            3,
+        ),
+    }
 
-    objHeader = objRows[0]
-    iCodeIndex = find_column_index(objHeader, "PJコード")
-    objCompanyColumnCandidates = ["計上カンパニー名", "計上カンパニー"]
-    iCompanyIndex = -1
-    for pszColumn in objCompanyColumnCandidates:
-        iCompanyIndex = find_column_index(objHeader, pszColumn)
-        if iCompanyIndex >= 0:
-            break
 
-    iStartIndex = 0
-    if iCodeIndex >= 0:
-        if iCompanyIndex < 0:
-            iCompanyIndex = iCodeIndex + 2
-        iStartIndex = 1
-    else:
-        iCodeIndex = 2
-        iCompanyIndex = 4
+def load_org_table_index_for_allocation(pszOrgTablePath: str) -> Dict[str, Any]:
+    return load_org_table_index(
+        pszOrgTablePath,
+        "allocation",
+        build_org_table_index_for_allocation,
+    )
 
-    for objRow in objRows[iStartIndex:]:
-        if iCodeIndex >= len(objRow) or iCompanyIndex >= len(objRow):
-            continue
-        pszProjectCode: str = objRow[iCodeIndex].strip()
-        pszCompanyName: str = objRow[iCompanyIndex].strip()
-        if not pszProjectCode:
-            continue
 
-        objMatch = re.match(r"^(P\d{5}_|[A-OQ-Z]\d{3}_)", pszProjectCode)
-        if objMatch is None:
-            objMatch = re.match(r"^(P\d{5}|[A-OQ-Z]\d{3})", pszProjectCode)
-        if objMatch is None:
-            continue
-        pszPrefix: str = objMatch.group(1)
-        if not pszPrefix.endswith("_"):
-            pszPrefix += "_"
-        if pszPrefix not in objCompanyMap:
-            objCompanyMap[pszPrefix] = pszCompanyName
+def load_org_table_group_map(pszOrgTablePath: str) -> Dict[str, str]:
+    if not os.path.isfile(pszOrgTablePath):
+        return {}
+    return dict(load_org_table_index_for_allocation(pszOrgTablePath)["GroupMap"])
 
-    return objCompanyMap
+
+def load_org_table_company_map(pszOrgTablePath: str) -> Dict[str, str]:
+    if not os.path.isfile(pszOrgTablePath):
+        return {}
+    return dict(load_org_table_index_for_allocation(pszOrgTablePath)["CompanyMap"])
 
 
 def insert_accounting_group_column(
@@ -2339,38 +2368,16 @@ def get_headquarters_group_from_org_table(pszOrgTablePath: str) -> str:
         print(f"Warning: org table not found: {pszOrgTablePath}")
         return ""
 
-    objRows = read_tsv_rows(pszOrgTablePath)
-    if not objRows:
+    objIndex = load_org_table_index_for_allocation(pszOrgTablePath)
+    if objIndex["IsEmpty"]:
         print(f"Warning: org table empty: {pszOrgTablePath}")
         return ""
 
-    objHeader = objRows[0]
-    iCodeIndex = find_column_index(objHeader, "PJコード")
-    objGroupColumnCandidates = ["計上グループ名", "計上グループ"]
-    iGroupIndex = -1
-    for pszColumn in objGroupColumnCandidates:
-        iGroupIndex = find_column_index(objHeader, pszColumn)
-        if iGroupIndex >= 0:
-            break
-
-    iStartIndex = 0
-    if iCodeIndex >= 0:
-        if iGroupIndex < 0:
-            iGroupIndex = iCodeIndex + 2
-        iStartIndex = 1
-    else:
-        iCodeIndex = 2
-        iGroupIndex = 4
-
-    for objRow in objRows[iStartIndex:]:
-        if iCodeIndex >= len(objRow) or iGroupIndex >= len(objRow):
-            continue
-        if objRow[iCodeIndex].strip() != "本部":
-            continue
-        return objRow[iGroupIndex].strip()
-
-    print("Warning: 本部 row not found in org table.")
-    return ""
+    pszGroupName: Optional[str] = objIndex["HeadquartersGroup"]
+    if pszGroupName is None:
+        print("Warning: 本部 row not found in org table.")
+        return ""
+    return pszGroupName
 
 
 def insert_accounting_company_column(
@@ -2401,36 +2408,8 @@ def get_headquarters_company_from_org_table(pszOrgTablePath: str) -> str:
     if not os.path.isfile(pszOrgTablePath):
         return ""
 
-    objRows = read_tsv_rows(pszOrgTablePath)
-    if not objRows:
-        return ""
-
-    objHeader = objRows[0]
-    iCodeIndex = find_column_index(objHeader, "PJコード")
-    objCompanyColumnCandidates = ["計上カンパニー名", "計上カンパニー"]
-    iCompanyIndex = -1
-    for pszColumn in objCompanyColumnCandidates:
-        iCompanyIndex = find_column_index(objHeader, pszColumn)
-        if iCompanyIndex >= 0:
-            break
-
-    iStartIndex = 0
-    if iCodeIndex >= 0:
-        if iCompanyIndex < 0:
-            iCompanyIndex = iCodeIndex + 2
-        iStartIndex = 1
-    else:
-        iCodeIndex = 2
-        iCompanyIndex = 3
-
-    for objRow in objRows[iStartIndex:]:
-        if iCodeIndex >= len(objRow) or iCompanyIndex >= len(objRow):
-            continue
-        if objRow[iCodeIndex].strip() != "本部":
-            continue
-        return objRow[iCompanyIndex].strip()
-
-    return ""
+    pszCompanyName: Optional[str] = load_org_table_index_for_allocation(pszOrgTablePath)["HeadquartersCompany"]
+    return pszCompanyName if pszCompanyName is not None else ""
 
 
 def fill_headquarters_company_in_rows(
@@ -16,6 +16,12 @@
 import re
 import sys
 
+from manhour_time_codec import (
+    parse_manhour_text_to_seconds_strict,
+    parse_manhour_texts_to_seconds_strict,
+)
+from project_name_normalizer import normalize_project_name_for_sheet7
+
 
 iProjectNameColumnIndex: int = 0
 iRemoveColumnIndex: int = 1
@@ -35,53 +41,8 @@ def is_blank(value: str | None) -> bool:
 
 
 def normalize_project_name(pszSource: str) -> str:
-    if pszSource.startswith("【廃番】"):
-        try:
-            code: str | None = None
-            code_index: int = -1
-            for prefix in ["J", "A", "C", "H", "M", "P"]:
-                search_from: int = 0
-                code_length: int = 4
-                if prefix == "P":
-                    code_length = 6
-                while True:
-                    found_index: int = pszSource.find(prefix, search_from)
-                    if found_index == -1:
-                        break
-                    if found_index + code_length <= len(pszSource):
-                        code = pszSource[found_index:found_index + code_length]
-                        code_index = found_index
-                        break
-                    search_from = found_index + 1
-                if code is not None:
-                    break
-            if code is None or code_index == -1:
-                return pszSource
-            head: str = pszSource[:code_index]
-            tail: str = pszSource[code_index + len(code):]
-            return code + "_" + head + tail
-        except Exception:
-            return pszSource
-
-    if len(pszSource) >= 1 and pszSource[0] in ["J", "A", "C", "H", "M"]:
-        if len(pszSource) >= 5:
-            next_char: str = pszSource[4]
-            if next_char == "【":
-                return pszSource[:4] + "_" + pszSource[4:]
-            if next_char == " " or next_char == "　":
-                return pszSource[:4] + "_" + pszSource[5:]
-        return pszSource
-
-    if len(pszSource) >= 1 and pszSource[0] == "P":
-        if len(pszSource) >= 7:
-            next_char_p: str = pszSource[6]
-            if next_char_p == "【":
-                return pszSource[:6] + "_" + pszSource[6:]
-            if next_char_p == " " or next_char_p == "　":
-                return pszSource[:6] + "_" + pszSource[7:]
-        return pszSource
-
-    return pszSource
+    # 同じプロジェクト名は何度も現れるため、共通モジュールの LRU メモ付きの関数で正規化する
+    return normalize_project_name_for_sheet7(pszSource)
 
 
 def preprocess_line_content(line_content: str) -> str:
@@ -98,13 +59,7 @@ def preprocess_line_content(line_content: str) -> str:
 
 
 def parse_manhour_to_seconds(manhour: str) -> int:
-    match = re.match(r"^(\d+):([0-5]\d):([0-5]\d)$", manhour)
-    if not match:
-        raise ValueError(f"Invalid manhour format: {manhour}")
-    hours = int(match.group(1))
-    minutes = int(match.group(2))
-    seconds = int(match.group(3))
-    return hours * 3600 + minutes * 60 + seconds
+    return parse_manhour_text_to_seconds_strict(manhour)
 
 
 def format_seconds_to_manhour(total_seconds: int) -> str:
@@ -165,12 +120,17 @@ def main() -> None:
                     normalized_name = normalize_project_name(project_name)
                 output_file.write(normalized_name + "\t" + manhour + "\n")
                 sheet10_rows.append((normalized_name, manhour))
+        aggregate_rows: list[tuple[str, str]] = [
+            (project_name, manhour)
+            for project_name, manhour in sheet10_rows
+            if not (project_name == "" and manhour == "")
+        ]
+        aggregate_seconds: list[int] = parse_manhour_texts_to_seconds_strict(
+            [manhour for _, manhour in aggregate_rows],
+        ).tolist()
         aggregated_seconds: dict[str, int] = {}
         aggregated_order: list[str] = []
-        for project_name, manhour in sheet10_rows:
-            if project_name == "" and manhour == "":
-                continue
-            seconds = parse_manhour_to_seconds(manhour)
+        for (project_name, _), seconds in zip(aggregate_rows, aggregate_seconds):
             if project_name not in aggregated_seconds:
                 aggregated_seconds[project_name] = 0
                 aggregated_order.append(project_name)
@@ -19,20 +19,67 @@
 #
 # 実行例:
 #   python make_manhour_to_sheet8_01_0001.py manhour_xxxxxx.csv
+#   python make_manhour_to_sheet8_01_0001.py --in-memory manhour_xxxxxx.csv
+#   python make_manhour_to_sheet8_01_0001.py --in-memory --keep-intermediates manhour_xxxxxx.csv
+#   python make_manhour_to_sheet8_01_0001.py --jobs 4 工数25.4.csv 工数25.5.csv ...
+#   python make_manhour_to_sheet8_01_0001.py --csv-chunk-rows 50000 manhour_xxxxxx.csv
+#   python make_manhour_to_sheet8_01_0001.py --jobs 4 工数_2025年04月_step10_各プロジェクトの工数.tsv ...
+#
+#   --in-memory を指定すると、(1)〜(9) の各段の間で中間 TSV を読み直さず、
+#   DataFrame / 行リストを直接受け渡す。この場合、中間 TSV は
+#   --keep-intermediates を指定したときのみ出力する。
+#
+#   --jobs N (N >= 2) を指定すると、各月の (1)〜(7) を N プロセスで同時に実行する。
+#   固定のファイル名 (Sheet6.tsv / Sheet7.tsv〜Sheet10.tsv) に出力する正解スクリプトの (6) (7) は、
+#   月ごとの作業フォルダ temp/工数_yyyy年mm月_reference_work で実行してから出力を戻す。
+#   管轄PJ表.tsv を更新する後半の処理は、入力順に 1 件ずつ実行する。
+#
+#   工数_yyyy年mm月_step10_各プロジェクトの工数.tsv を指定すると、step11 だけを作り直す。
+#   連続して指定した step10 ファイルは、計上カンパニーのマッピングを 1 回だけ読み込んで
+#   まとめて変換し、--jobs N (N >= 2) の場合は N プロセスで同時に変換する。
+#
+#   --sheet789-engine groupby を指定すると、Sheet7/8/9/10 を
+#   (スタッフコード, プロジェクト名) の groupby 1 回で作成する。
+#   Sheet4_staff_code_range.tsv を使用せず、スタッフコードが連続していない入力にも対応する。
+#
+#   --csv-chunk-rows N (N >= 1) を指定すると、(1) CSV → TSV を N 行ずつのストリーミングで行い、
+#   入力 CSV の行数によらずメモリ使用量を一定に保つ (出力はファイル全体を読む場合と同じ)。
+#   --in-memory の (1)〜(7) はファイル全体を読むため、この指定は対象外となる。
+#
+#   --fused-steps を指定すると、(2) 未入力行除去・(3) スタッフコード順ソート・(4) 日付正規化を
+#   Step1 TSV を 1 回読むだけの融合ステージで行い、同じ 3 つの中間 TSV を書き出す。
+#   --in-memory では常に融合ステージを使用する (中間 TSV は --keep-intermediates 指定時のみ)。
+#
+#   --incremental を指定すると、(1)〜(7) の出力ごとに入力 CSV・管轄PJ表.csv・本ファイルのハッシュを
+#   temp/工数_yyyy年mm月_step_manifest.tsv に記録し、再実行時にすべて一致して
+#   出力ファイルも記録時のまま残っていれば、(1)〜(7) を省略して既存の出力を再利用する。
+#   step07 以降は管轄PJ表の一時ファイルを月順に更新するため、常に実行する。
 #
 # ///////////////////////////////////////////////////////////////
 
 from __future__ import annotations
 
 import argparse
+import codecs
 import csv
+import hashlib
+import importlib.util
+import io
+import itertools
+import marshal
 import os
 import re
 import shutil
+import time
 import tkinter as tk
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from tkinter import messagebox
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from types import CodeType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TextIO, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -61,70 +108,108 @@ def get_target_year_month_from_filename(pszInputFilePath: str) -> Tuple[int, int
     return iYear, iMonth
 
 
-def normalize_project_name_sheet10(pszSource: str) -> str:
+# ///////////////////////////////////////////////////////////////
+#
+# プロジェクト名の正規化
+#
+# 正規化の共通部分は src/project_name_normalizer.py と同じ実装 (本ファイルは単体で動作させるため同梱する)。
+# Sheet10 用の関数 (【...】 の後ろのコードを先頭に移す) は本ファイルだけで使用する。
+# 正規表現は読み込み時に 1 回だけコンパイルし、
+# 同じプロジェクト名の結果は上限付きの LRU メモ (iProjectNameMemoSize 件) で再利用する。
+#
+# ///////////////////////////////////////////////////////////////
+# LRU メモの上限 (関数ごと)
+iProjectNameMemoSize: int = 4096
+# 【...】 の後ろにあるコード
+objCodeAfterBracketPattern: re.Pattern[str] = re.compile(r"(P\d{5}|[A-OQ-Z]\d{3})")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 【廃番】 で始まるプロジェクト名のコードを先頭に移す関数。
+# J / A / C / H / M / P の順に、コードの長さ (P は 6 文字、それ以外は 4 文字) が
+# 収まる最初の位置をコードとみなす。見つからない場合は None を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def move_discontinued_project_code(
+    pszSource: str,
+) -> str | None:
+    for pszPrefix in ["J", "A", "C", "H", "M", "P"]:
+        iCodeLength: int = 6 if pszPrefix == "P" else 4
+        iFoundIndex: int = pszSource.find(pszPrefix)
+        while iFoundIndex != -1:
+            if iFoundIndex + iCodeLength <= len(pszSource):
+                pszCode: str = pszSource[iFoundIndex : iFoundIndex + iCodeLength]
+                return pszCode + "_" + pszSource[:iFoundIndex] + pszSource[iFoundIndex + iCodeLength :]
+            iFoundIndex = pszSource.find(pszPrefix, iFoundIndex + 1)
+    return None
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 正規化の共通部分:
+#   1) 【廃番】 で始まる場合は、コードを先頭に移す
+#   2) bMoveCodeAfterBracket=True で 【 で始まる場合は、】 の後ろのコードを先頭に移す
+#   3) コード (J/A/C/H/M は 4 文字、P は 6 文字) の直後の 【 の前に "_" を入れ、
+#      直後の空白 1 文字を "_" に置き換える
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_project_name_core(
+    pszSource: str,
+    bMoveCodeAfterBracket: bool,
+) -> str:
     if pszSource.startswith("【廃番】"):
-        try:
-            code: str | None = None
-            code_index: int = -1
-            for prefix in ["J", "A", "C", "H", "M", "P"]:
-                search_from: int = 0
-                code_length: int = 4
-                if prefix == "P":
-                    code_length = 6
-                while True:
-                    found_index: int = pszSource.find(prefix, search_from)
-                    if found_index == -1:
-                        break
-                    if found_index + code_length <= len(pszSource):
-                        code = pszSource[found_index:found_index + code_length]
-                        code_index = found_index
-                        break
-                    search_from = found_index + 1
-                if code is not None:
-                    break
-            if code is None or code_index == -1:
-                return pszSource
-            head: str = pszSource[:code_index]
-            tail: str = pszSource[code_index + len(code):]
-            return code + "_" + head + tail
-        except Exception:
-            return pszSource
+        pszMoved: str | None = move_discontinued_project_code(pszSource)
+        return pszSource if pszMoved is None else pszMoved
 
-    if pszSource.startswith("【"):
+    if bMoveCodeAfterBracket and pszSource.startswith("【"):
         iBracketEndIndex: int = pszSource.find("】")
         if iBracketEndIndex != -1:
-            pszAfterBracket: str = pszSource[iBracketEndIndex + 1:]
-            objMatch = re.search(r"(P\d{5}|[A-OQ-Z]\d{3})", pszAfterBracket)
+            pszAfterBracket: str = pszSource[iBracketEndIndex + 1 :]
+            objMatch: re.Match[str] | None = objCodeAfterBracketPattern.search(pszAfterBracket)
             if objMatch is not None:
-                pszCode: str = objMatch.group(1)
-                pszBeforeCode: str = pszAfterBracket[:objMatch.start()]
-                pszAfterCode: str = pszAfterBracket[objMatch.end():]
+                pszAfterCode: str = pszAfterBracket[objMatch.end() :]
                 if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
                     pszAfterCode = pszAfterCode[1:]
-                pszRest: str = pszSource[: iBracketEndIndex + 1] + pszBeforeCode + pszAfterCode
-                return pszCode + "_" + pszRest
+                return (
+                    objMatch.group(1)
+                    + "_"
+                    + pszSource[: iBracketEndIndex + 1]
+                    + pszAfterBracket[: objMatch.start()]
+                    + pszAfterCode
+                )
 
-    if len(pszSource) >= 1 and pszSource[0] in ["J", "A", "C", "H", "M"]:
+    if len(pszSource) >= 1 and pszSource[0] in "JACHM":
         if len(pszSource) >= 5:
-            next_char: str = pszSource[4]
-            if next_char == "【":
+            if pszSource[4] == "【":
                 return pszSource[:4] + "_" + pszSource[4:]
-            if next_char == " " or next_char == "　":
+            if pszSource[4] == " " or pszSource[4] == "　":
                 return pszSource[:4] + "_" + pszSource[5:]
         return pszSource
 
     if len(pszSource) >= 1 and pszSource[0] == "P":
         if len(pszSource) >= 7:
-            next_char_p: str = pszSource[6]
-            if next_char_p == "【":
+            if pszSource[6] == "【":
                 return pszSource[:6] + "_" + pszSource[6:]
-            if next_char_p == " " or next_char_p == "　":
+            if pszSource[6] == " " or pszSource[6] == "　":
                 return pszSource[:6] + "_" + pszSource[7:]
         return pszSource
 
     return pszSource
 
 
+# ///////////////////////////////////////////////////////////////
+#
+# Sheet10 のプロジェクト名を正規化する関数 (行の前処理は呼び出し側で行う)。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=iProjectNameMemoSize)
+def normalize_project_name_sheet10(
+    pszSource: str,
+) -> str:
+    return normalize_project_name_core(pszSource, True)
+
+
 def preprocess_line_content_sheet10(pszLineContent: str) -> str:
     if pszLineContent.startswith('"'):
         iSecondQuoteIndex: int = pszLineContent.find('"', 1)
@@ -212,18 +297,19 @@ def convert_org_table_tsv(objBaseDirectoryPath: Path) -> None:
     objOrgTableTsvPath: Path = objTempOrgTableDirectoryPath / "管轄PJ表.tsv"
     objOrgTableStep0004Path: Path = objTempOrgTableDirectoryPath / "管轄PJ表_step0004.tsv"
     if objOrgTableCsvPath.exists():
+        # 管轄PJ表.csv は 1 回だけ読む。step0001 / step0002 の行は、書き出した TSV を読み直さず
+        # メモリ上の行 (objOrgTableRows) をそのまま次の段に渡す (各段は行をその場で書き換える)
         with open(objOrgTableCsvPath, "r", encoding="utf-8") as objOrgTableCsvFile:
-            objOrgTableReader = csv.reader(objOrgTableCsvFile)
+            objOrgTableRows: List[List[str]] = list(csv.reader(objOrgTableCsvFile))
             with open(objOrgTableStep0001Path, "w", encoding="utf-8") as objStep0001File:
                 objStep0001Writer = csv.writer(
                     objStep0001File,
                     delimiter="\t",
                     lineterminator="\n",
                 )
-                for objRow in objOrgTableReader:
+                for objRow in objOrgTableRows:
                     objStep0001Writer.writerow(objRow)
-        with open(objOrgTableStep0001Path, "r", encoding="utf-8") as objStep0001File:
-            objStep0001Reader = csv.reader(objStep0001File, delimiter="\t")
+        with nullcontext(objOrgTableRows) as objStep0001Reader:
             with open(objOrgTableStep0002Path, "w", encoding="utf-8") as objStep0002File:
                 objStep0002Writer = csv.writer(
                     objStep0002File,
@@ -247,7 +333,7 @@ def convert_org_table_tsv(objBaseDirectoryPath: Path) -> None:
                     if len(objRow) >= 3:
                         objRow[2] = normalize_org_table_field_step0002(objRow[2])
                     objStep0002Writer.writerow(objRow)
-        with open(objOrgTableStep0002Path, "r", encoding="utf-8") as objStep0002File:
+        with nullcontext(objOrgTableRows) as objStep0002Reader:
             # ●●の処理ここから
             # 管轄PJ表_step0002.tsv を読み込み、1 行目から順に 2 列目(PJ 名称) へ
             # add_project_code_prefix_step0003 の「コード付加」判定を行い、結果を
@@ -260,7 +346,6 @@ def convert_org_table_tsv(objBaseDirectoryPath: Path) -> None:
             #    （既に同じ接頭辞で始まっていれば付け足さない）。
             # 「3 列目が存在する場合のみ」という条件は廃止し、各行で 2 列目に対して
             # 無条件でコード付加判定を行う。
-            objStep0002Reader = csv.reader(objStep0002File, delimiter="\t")
             with open(objOrgTableStep0003Path, "w", encoding="utf-8") as objOrgTableStep0003File:
                 objOrgTableWriter = csv.writer(
                     objOrgTableStep0003File,
@@ -2707,6 +2792,65 @@ if __name__ == "__main__":
     main()
 '''
 
+# ///////////////////////////////////////////////////////////////
+#
+# 埋め込みスクリプトの名前空間レジストリ
+#
+# キー: モジュール名 + ":" + ソースの SHA-256
+# 値  : exec 済みの名前空間（グローバル辞書）
+#
+# 同一プロセス内では、各埋め込みスクリプトを 1 回だけ実行し、
+# 複数月を連続で処理する場合も同じ名前空間を使い回す。
+# 埋め込みスクリプトはモジュールレベルの状態を持たないため、
+# 使い回しても各月の処理結果は変わらない。
+#
+# ///////////////////////////////////////////////////////////////
+objEmbeddedModuleRegistry: Dict[str, Dict[str, Any]] = {}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 埋め込みスクリプトのバイトコードを取得する関数
+#
+# コンパイル結果を temp/embedded_module_cache/ 配下に
+# 「モジュール名_ソースのSHA-256.bin」として保存し、
+# 次回以降の起動ではコンパイルを省略する。
+# ファイル先頭には importlib.util.MAGIC_NUMBER を書き込み、
+# Python のバージョンが異なるキャッシュは使用しない。
+# キャッシュの読み書きに失敗した場合は、通常どおりコンパイルする。
+#
+# ///////////////////////////////////////////////////////////////
+def load_embedded_module_code(
+    pszModuleName: str,
+    pszSourceCode: str,
+    pszSourceHash: str,
+) -> CodeType:
+    objCacheDirectoryPath: Path = Path(__file__).resolve().parent / "temp" / "embedded_module_cache"
+    objCachePath: Path = objCacheDirectoryPath / f"{pszModuleName}_{pszSourceHash}.bin"
+    objMagicNumberBytes: bytes = importlib.util.MAGIC_NUMBER
+
+    if objCachePath.exists():
+        try:
+            objCacheBytes: bytes = objCachePath.read_bytes()
+            if objCacheBytes.startswith(objMagicNumberBytes):
+                objCachedCode: Any = marshal.loads(objCacheBytes[len(objMagicNumberBytes) :])
+                if isinstance(objCachedCode, CodeType):
+                    return objCachedCode
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+    objCode: CodeType = compile(pszSourceCode, f"<{pszModuleName}>", "exec")
+    try:
+        objCacheDirectoryPath.mkdir(parents=True, exist_ok=True)
+        # 並列実行時に書きかけのファイルを読まないよう、一時ファイル経由で置き換える
+        objTemporaryPath: Path = objCacheDirectoryPath / f"{objCachePath.name}.{os.getpid()}.tmp"
+        objTemporaryPath.write_bytes(objMagicNumberBytes + marshal.dumps(objCode))
+        os.replace(objTemporaryPath, objCachePath)
+    except OSError:
+        pass
+    return objCode
+
+
 # ///////////////////////////////////////////////////////////////
 #
 # 各スクリプトを独立名前空間で実行するためのヘルパー
@@ -2716,12 +2860,18 @@ def create_module_from_source(
     pszModuleName: str,
     pszSourceCode: str,
 ) -> Dict[str, Any]:
+    pszSourceHash: str = hashlib.sha256(pszSourceCode.encode("utf-8")).hexdigest()
+    pszRegistryKey: str = pszModuleName + ":" + pszSourceHash
+    if pszRegistryKey in objEmbeddedModuleRegistry:
+        return objEmbeddedModuleRegistry[pszRegistryKey]
+
     objGlobals: Dict[str, Any] = {
         "__name__": pszModuleName,
         "__file__": pszModuleName + ".py",
         "__package__": None,
     }
-    exec(pszSourceCode, objGlobals)
+    exec(load_embedded_module_code(pszModuleName, pszSourceCode, pszSourceHash), objGlobals)
+    objEmbeddedModuleRegistry[pszRegistryKey] = objGlobals
     return objGlobals
 
 
@@ -2749,32 +2899,247 @@ def write_error_text_utf8(
 
 # ///////////////////////////////////////////////////////////////
 #
-# Project_List.tsv 生成
+# 工数時間コーデック
+#
+# 工数の時間文字列 ("h:mm:ss" / "h:mm") と秒数(int) を、列単位でまとめて変換する。
+# src/manhour_time_codec.py と同じ実装 (本ファイルは単体で動作させるため同梱する)。
+# ASCII 数字だけの典型的な値は正規表現の一括抽出で変換し、
+# それ以外は 1 セル変換へフォールバックして、従来の変換関数と結果を完全に一致させる。
 #
 # ///////////////////////////////////////////////////////////////
-def convert_time_text_to_seconds_for_project_list(pszTimeText: str) -> int:
-    pszText: str = str(pszTimeText or "").strip()
-    if len(pszText) == 0:
+# 高速経路で扱う "h:mm" / "h:mm:ss" の形式
+# (int64 の桁あふれを避けるため、各部の桁数に上限を設ける)
+pszTimeTextFastPattern: str = r"^([0-9]{1,12}):([0-9]{1,12})(?::([0-9]{1,12}))?$"
+# 厳格モードの高速経路 (分・秒は 00-59 の 2 桁)
+pszManhourTextStrictFastPattern: str = r"^([0-9]{1,12}):([0-5][0-9]):([0-5][0-9])$"
+# 厳格モードの 1 セル判定用 (従来の parse_manhour_to_seconds と同じ正規表現)
+objManhourTextStrictPattern: re.Pattern[str] = re.compile(r"^(\d+):([0-5]\d):([0-5]\d)$")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 入力 (Series / numpy 配列 / list など) を object 型の Series に揃える関数。
+# 呼び出し側のインデックスには依存しないよう、0 始まりの連番に振り直す。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_values_to_object_series(
+    objValues: Iterable[Any],
+) -> pd.Series:
+    if isinstance(objValues, pd.Series):
+        return pd.Series(objValues.to_numpy(dtype=object), dtype=object)
+    if isinstance(objValues, np.ndarray):
+        return pd.Series(objValues.astype(object).ravel(), dtype=object)
+    return pd.Series(list(objValues), dtype=object)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 時間文字列 1 件を秒数(int)に変換する関数 (寛容モード)。
+#   ・None / 空文字 / 不正な形式は 0 秒
+#   ・"h:mm:ss" は常に変換
+#   ・"h:mm" は bAllowHourMinute=True のときだけ変換 (False なら 0 秒)
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_text_to_seconds(
+    pszTimeText: Any,
+    bAllowHourMinute: bool = True,
+) -> int:
+    if pszTimeText is None:
         return 0
 
-    objParts: List[str] = pszText.split(":")
-    try:
-        if len(objParts) == 2:
-            iHours: int = int(objParts[0])
-            iMinutes: int = int(objParts[1])
-            return iHours * 3600 + iMinutes * 60
+    pszWork: str = str(pszTimeText).strip()
+    if len(pszWork) == 0:
+        return 0
 
+    objParts: List[str] = pszWork.split(":")
+    try:
         if len(objParts) == 3:
-            iHours: int = int(objParts[0])
-            iMinutes: int = int(objParts[1])
-            iSeconds: int = int(objParts[2])
-            return iHours * 3600 + iMinutes * 60 + iSeconds
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60 + int(objParts[2])
+        if len(objParts) == 2 and bAllowHourMinute:
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60
     except ValueError:
         return 0
-
     return 0
 
 
+# ///////////////////////////////////////////////////////////////
+#
+# 時間文字列の列をまとめて秒数(int64)の numpy 配列に変換する関数 (寛容モード)。
+# 値ごとの結果は convert_time_text_to_seconds と完全に一致する。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_texts_to_seconds(
+    objValues: Iterable[Any],
+    bAllowHourMinute: bool = True,
+) -> np.ndarray:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    arrSeconds: np.ndarray = np.zeros(len(objSeries), dtype=np.int64)
+    if len(objSeries) == 0:
+        return arrSeconds
+
+    # None は 0 秒、それ以外は str() → 前後空白除去の順で 1 セル変換と同じ文字列を作る
+    objSeriesNotNone: pd.Series = objSeries.map(lambda objValue: objValue is not None)
+    objSeriesText: pd.Series = objSeries.map(str).str.strip()
+    objParts: pd.DataFrame = objSeriesText.str.extract(pszTimeTextFastPattern)
+
+    objMaskFast: pd.Series = objParts[0].notna() & objSeriesNotNone
+    if not bAllowHourMinute:
+        objMaskFast &= objParts[2].notna()
+    if objMaskFast.any():
+        objFastParts: pd.DataFrame = objParts[objMaskFast].fillna("0").astype(np.int64)
+        arrSeconds[objMaskFast.to_numpy()] = (
+            objFastParts[0] * 3600 + objFastParts[1] * 60 + objFastParts[2]
+        ).to_numpy()
+
+    # 高速経路に乗らない値のうち、明らかに 0 秒となる空文字と None 以外は 1 セル変換へ
+    objMaskResidual: pd.Series = (~objMaskFast) & objSeriesNotNone & (objSeriesText != "")
+    for iIndex in np.flatnonzero(objMaskResidual.to_numpy()):
+        arrSeconds[iIndex] = convert_time_text_to_seconds(objSeries.iat[iIndex], bAllowHourMinute)
+    return arrSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列 1 件を秒数(int)に変換する関数 (厳格モード)。
+# "h:mm:ss" (分・秒は 00-59) 以外は ValueError を送出する。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_manhour_text_to_seconds_strict(
+    pszManhour: str,
+) -> int:
+    objMatch: re.Match[str] | None = objManhourTextStrictPattern.match(pszManhour)
+    if not objMatch:
+        raise ValueError(f"Invalid manhour format: {pszManhour}")
+    iHours: int = int(objMatch.group(1))
+    iMinutes: int = int(objMatch.group(2))
+    iSeconds: int = int(objMatch.group(3))
+    return iHours * 3600 + iMinutes * 60 + iSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列の列をまとめて秒数(int64)の numpy 配列に変換する関数 (厳格モード)。
+# 不正な値があれば、先頭から見て最初の不正値について
+# parse_manhour_text_to_seconds_strict と同じ ValueError を送出する。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_manhour_texts_to_seconds_strict(
+    objValues: Iterable[str],
+) -> np.ndarray:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    arrSeconds: np.ndarray = np.zeros(len(objSeries), dtype=np.int64)
+    if len(objSeries) == 0:
+        return arrSeconds
+
+    objParts: pd.DataFrame = objSeries.str.extract(pszManhourTextStrictFastPattern)
+    objMaskFast: pd.Series = objParts[0].notna()
+    if objMaskFast.any():
+        objFastParts: pd.DataFrame = objParts[objMaskFast].astype(np.int64)
+        arrSeconds[objMaskFast.to_numpy()] = (
+            objFastParts[0] * 3600 + objFastParts[1] * 60 + objFastParts[2]
+        ).to_numpy()
+
+    # 高速経路に乗らない値は先頭から順に 1 セル判定する (不正値はここで例外になる)
+    for iIndex in np.flatnonzero((~objMaskFast).to_numpy()):
+        arrSeconds[iIndex] = parse_manhour_text_to_seconds_strict(objSeries.iat[iIndex])
+    return arrSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列 1 件を "h:mm" → "h:mm:ss" に揃える関数。
+# 例: "7:30" -> "7:30:00"
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_text_h_mm_to_h_mm_ss(
+    pszTimeText: str,
+) -> str:
+    pszText: str = (pszTimeText or "").strip()
+    if pszText == "":
+        return ""
+    if pszText.count(":") == 1:
+        return pszText + ":00"
+    return pszText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列の列をまとめて "h:mm" → "h:mm:ss" に揃える関数。
+# 値ごとの結果は normalize_time_text_h_mm_to_h_mm_ss と完全に一致する。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_texts_h_mm_to_h_mm_ss(
+    objValues: Iterable[str],
+) -> List[str]:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    if len(objSeries) == 0:
+        return []
+    # (pszTimeText or "") と同じく、偽と評価される値は空文字として扱う
+    objSeriesText: pd.Series = objSeries.map(lambda objValue: objValue or "").str.strip()
+    objMaskHourMinute: pd.Series = objSeriesText.str.count(":") == 1
+    objSeriesText[objMaskHourMinute] = objSeriesText[objMaskHourMinute] + ":00"
+    return objSeriesText.tolist()
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 行リスト (List[List[str]]) の指定列を、その場で "h:mm:ss" に揃える関数。
+# 列数が足りない行はそのまま残す。iStartRowIndex より前の行 (ヘッダ) は対象外。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_column_h_mm_to_h_mm_ss(
+    objRows: List[List[str]],
+    iColumnIndex: int,
+    iStartRowIndex: int = 1,
+) -> None:
+    objTargetRows: List[List[str]] = [
+        objRow for objRow in objRows[iStartRowIndex:] if iColumnIndex < len(objRow)
+    ]
+    objNormalizedTexts: List[str] = normalize_time_texts_h_mm_to_h_mm_ss(
+        [objRow[iColumnIndex] for objRow in objTargetRows],
+    )
+    for objRow, pszNormalizedText in zip(objTargetRows, objNormalizedTexts):
+        objRow[iColumnIndex] = pszNormalizedText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 秒数の列をまとめて "h:mm:ss" 文字列のリストに変換する関数。
+# 0 以下の秒数は pszZeroText (既定 "0:00:00") を出力する。
+#
+# ///////////////////////////////////////////////////////////////
+def format_seconds_to_time_texts(
+    objSeconds: Iterable[int],
+    pszZeroText: str = "0:00:00",
+) -> List[str]:
+    arrSeconds: np.ndarray = np.asarray(list(objSeconds), dtype=np.int64)
+    if arrSeconds.size == 0:
+        return []
+    arrHours: np.ndarray = arrSeconds // 3600
+    arrMinutes: np.ndarray = (arrSeconds % 3600) // 60
+    arrRemainSeconds: np.ndarray = arrSeconds % 60
+    objTexts: List[str] = [
+        f"{iHour}:{iMinute:02d}:{iSecond:02d}" if iTotal > 0 else pszZeroText
+        for iTotal, iHour, iMinute, iSecond in zip(
+            arrSeconds.tolist(),
+            arrHours.tolist(),
+            arrMinutes.tolist(),
+            arrRemainSeconds.tolist(),
+        )
+    ]
+    return objTexts
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Project_List.tsv 生成
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_text_to_seconds_for_project_list(pszTimeText: str) -> int:
+    # 空文字・不正値は 0 秒、"h:mm" も受け付ける (工数時間コーデックの寛容モード)
+    return convert_time_text_to_seconds(pszTimeText or "")
+
+
 def format_seconds_to_h_mm_ss(iTotalSeconds: int) -> str:
     iSecondsSafe: int = max(int(iTotalSeconds or 0), 0)
     if iSecondsSafe == 0:
@@ -2785,610 +3150,3757 @@ def format_seconds_to_h_mm_ss(iTotalSeconds: int) -> str:
     return f"{iHours}:{iMinutes:02}:{iSeconds:02}"
 
 
-def _replace_raw_data_column_ranges(
-    pszFormula: str,
-    iLastRowNumber: int,
-) -> str:
-    objReplacements: List[Tuple[str, str]] = [
-        ("$A:$A", f"$A$1:$A${iLastRowNumber}"),
-        ("$D:$D", f"$D$1:$D${iLastRowNumber}"),
-        ("$L:$L", f"$L$1:$L${iLastRowNumber}"),
-    ]
+# ///////////////////////////////////////////////////////////////
+#
+# 数式ワークブック評価エンジン
+#
+# Raw_Data.tsv を「ローデータ」シートとし、数式シート (Project_List_Formula.tsv
+# Staff_List_Formula.tsv / With_Salary_Formula.tsv) を名前付きのシートとして登録した
+# ワークブック (dict) を 1 回だけ作成し、シート間の参照 (ローデータ! / プロジェクトリスト! など)
+# を解決しながら評価する。
+#   ◇ 数式は相対参照 (R1C1 形式) のテンプレートごとに 1 回だけ構文解析する
+#   ◇ SUMIFS / MATCH のインデックスと評価済みセルは、すべてのシートで共有する
+#   ◇ 数式セルは依存関係の順に反復で評価し、同じテンプレートの SUMIFS はまとめて評価する
+#
+# ///////////////////////////////////////////////////////////////
+# ローデータの時間列 ("h:mm:ss" / "h:mm") のセル値。秒数を保持し、出力時に "h:mm:ss" へ整形する。
+# Excel の時刻書式のセルと同じく、SUM / SUMIFS の結果も時間のまま扱う。
+class WorkbookDuration(int):
+    pass
 
-    pszResult: str = pszFormula
-    for pszTarget, pszReplacement in objReplacements:
-        if pszTarget in pszResult:
-            pszResult = pszResult.replace(pszTarget, pszReplacement)
 
-    return pszResult
+# 数式のエラー値 ("#N/A" など)。出力時はそのままエラー値の文字列になる。
+class WorkbookFormulaError(str):
+    pass
 
 
-def _replace_raw_data_column_ranges_in_dataframe(
-    objDataFrame: pd.DataFrame,
-    iLastRowNumber: int,
-) -> pd.DataFrame:
-    if objDataFrame.empty:
-        return objDataFrame
+# 循環参照を検出した場合の例外
+class WorkbookCircularReferenceError(RuntimeError):
+    pass
 
-    return objDataFrame.applymap(
-        lambda pszValue: _replace_raw_data_column_ranges(str(pszValue), iLastRowNumber)
-    )
 
+# Raw_Data.tsv と数式シートを登録するシート名
+pszWorkbookRawDataSheetName: str = "ローデータ"
+pszWorkbookProjectListSheetName: str = "プロジェクトリスト"
+pszWorkbookStaffListSheetName: str = "スタッフリスト"
+pszWorkbookWithSalarySheetName: str = "給与あり"
+# Excel のシートの最大行数・最大列数 (列全体・行全体の参照の大きさ)
+iWorkbookMaxRowCount: int = 1048576
+iWorkbookMaxColumnCount: int = 16384
+# 数式シートの見出し行の数 (並列評価では、この行数の後を行の範囲に分ける)
+iWorkbookHeaderRowCount: int = 2
 
-def make_project_list_tsv_from_raw_data(
+objWorkbookTimeTextPattern: re.Pattern[str] = re.compile(r"^\d+:\d{2}(?::\d{2})?$")
+objWorkbookNumberTextPattern: re.Pattern[str] = re.compile(
+    r"^[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?%?$"
+)
+
+
+def convert_raw_data_text_to_value_for_workbook(objValue: Any) -> Any:
+    # ローデータのセル文字列を、Excel で入力した場合と同じ型 (時間・数値・文字列) に変換する
+    if objValue is None or (isinstance(objValue, float) and pd.isna(objValue)):
+        return ""
+    pszValue: str = str(objValue)
+    if objWorkbookTimeTextPattern.match(pszValue):
+        return WorkbookDuration(convert_time_text_to_seconds_for_project_list(pszValue))
+    if objWorkbookNumberTextPattern.match(pszValue):
+        bPercent: bool = pszValue.endswith("%")
+        pszNumber: str = pszValue.rstrip("%").replace(",", "")
+        if bPercent:
+            return float(pszNumber) / 100
+        if "." in pszNumber:
+            return float(pszNumber)
+        return int(pszNumber)
+    return pszValue
+
+
+def build_lookup_key_for_workbook(objValue: Any) -> Tuple[str, Any]:
+    # SUMIFS の検索条件・MATCH の検索値の比較に使うキー。
+    # 数値と数値文字列は同じ値として、文字列は大文字・小文字を区別せずに比較する。
+    if isinstance(objValue, bool):
+        return ("bool", objValue)
+    if isinstance(objValue, (int, float)):
+        return ("number", float(objValue))
+    if objValue is None or objValue == "":
+        return ("blank", "")
+    pszValue: str = str(objValue)
+    if objWorkbookNumberTextPattern.match(pszValue) and not pszValue.endswith("%"):
+        return ("number", float(pszValue.replace(",", "")))
+    return ("text", pszValue.casefold())
+
+
+def build_criteria_matcher_for_workbook(
+    objCriterion: Any,
+) -> Callable[[Tuple[str, Any]], bool] | None:
+    # SUMIFS の検索条件のうち、比較演算子 (<, >, <=, >=, =, <>) やワイルドカード (*, ?, ~)
+    # を含むものについて、セル値の比較キーを判定する関数を返す。
+    # 単純な一致の条件は None を返す (比較キーの一致で判定する)。
+    if not isinstance(objCriterion, str) or objCriterion == "":
+        return None
+    pszOperator: str = ""
+    for pszCandidate in ["<=", ">=", "<>", "<", ">", "="]:
+        if objCriterion.startswith(pszCandidate):
+            pszOperator = pszCandidate
+            break
+    pszOperand: str = objCriterion[len(pszOperator) :]
+    bWildcard: bool = any(ch in pszOperand for ch in "*?~")
+    if pszOperator == "" and not bWildcard:
+        return None
+
+    if pszOperator in ["", "=", "<>"]:
+        pfnEqual: Callable[[Tuple[str, Any]], bool]
+        if bWildcard:
+            objPatternParts: List[str] = []
+            iPos: int = 0
+            while iPos < len(pszOperand):
+                ch: str = pszOperand[iPos]
+                if ch == "~" and iPos + 1 < len(pszOperand):
+                    objPatternParts.append(re.escape(pszOperand[iPos + 1]))
+                    iPos += 2
+                    continue
+                if ch == "*":
+                    objPatternParts.append(".*")
+                elif ch == "?":
+                    objPatternParts.append(".")
+                else:
+                    objPatternParts.append(re.escape(ch))
+                iPos += 1
+            objWildcardPattern: re.Pattern[str] = re.compile(
+                "".join(objPatternParts),
+                re.IGNORECASE | re.DOTALL,
+            )
+            pfnEqual = lambda objKey: objKey[0] == "text" and objWildcardPattern.fullmatch(objKey[1]) is not None
+        else:
+            objOperandKey: Tuple[str, Any] = build_lookup_key_for_workbook(pszOperand)
+            pfnEqual = lambda objKey: objKey == objOperandKey
+        if pszOperator == "<>":
+            return lambda objKey: not pfnEqual(objKey)
+        return pfnEqual
+
+    objCompareKey: Tuple[str, Any] = build_lookup_key_for_workbook(pszOperand)
+
+    def match_compare(objKey: Tuple[str, Any]) -> bool:
+        if objKey[0] != objCompareKey[0] or objKey[0] not in ["number", "text"]:
+            return False
+        if pszOperator == "<":
+            return objKey[1] < objCompareKey[1]
+        if pszOperator == ">":
+            return objKey[1] > objCompareKey[1]
+        if pszOperator == "<=":
+            return objKey[1] <= objCompareKey[1]
+        return objKey[1] >= objCompareKey[1]
+
+    return match_compare
+
+
+def compare_values_for_workbook(
+    pszOperator: str,
+    objLeft: Any,
+    objRight: Any,
+) -> Any:
+    # 比較演算子の評価。数値と数値文字列は数値として、文字列は大文字・小文字を区別せずに比較し、
+    # 型の異なる値は Excel と同じく 数値 < 文字列 < 論理値 の順とする。エラー値はそのまま返す。
+    for objValue in [objLeft, objRight]:
+        if isinstance(objValue, WorkbookFormulaError):
+            return objValue
+    objTypeRanks: Dict[str, int] = {"number": 0, "blank": 1, "text": 1, "bool": 2}
+    objLeftLookupKey: Tuple[str, Any] = build_lookup_key_for_workbook(objLeft)
+    objRightLookupKey: Tuple[str, Any] = build_lookup_key_for_workbook(objRight)
+    objLeftKey: Tuple[int, Any] = (objTypeRanks[objLeftLookupKey[0]], objLeftLookupKey[1])
+    objRightKey: Tuple[int, Any] = (objTypeRanks[objRightLookupKey[0]], objRightLookupKey[1])
+    if pszOperator == "=":
+        return objLeftKey == objRightKey
+    if pszOperator == "<>":
+        return objLeftKey != objRightKey
+    if pszOperator == "<":
+        return objLeftKey < objRightKey
+    if pszOperator == ">":
+        return objLeftKey > objRightKey
+    if pszOperator == "<=":
+        return objLeftKey <= objRightKey
+    if pszOperator == ">=":
+        return objLeftKey >= objRightKey
+    return False
+
+
+def format_formula_value_for_workbook(objValue: Any) -> Any:
+    # 評価結果を出力用の値に変換する (時間は "h:mm:ss"、0 秒は空文字、整数値の小数は整数)
+    if isinstance(objValue, WorkbookDuration):
+        return format_seconds_to_h_mm_ss(objValue)
+    if isinstance(objValue, float) and objValue.is_integer():
+        return int(objValue)
+    return objValue
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ワークブックを作成する関数。
+# Raw_Data.tsv (1 行目は見出し) を読み込み、列ごとのリスト (セル値は時間・数値・文字列に変換済み)
+# として保持する。数式シートは add_formula_sheet_to_workbook で追加する。
+#
+# ///////////////////////////////////////////////////////////////
+def create_formula_workbook(
     pszRawDataTsvPath: str,
-    pszProjectListFormulaTsvPath: str,
-    pszOutputTsvPath: str,
+) -> Dict[str, Any]:
+    objRawDataSheet: pd.DataFrame = pd.read_csv(
+        pszRawDataTsvPath,
+        sep="\t",
+        dtype=str,
+        encoding="utf-8",
+        engine="python",
+    )
+    objRawDataColumns: List[List[Any]] = [
+        [
+            convert_raw_data_text_to_value_for_workbook(objValue)
+            for objValue in objRawDataSheet.iloc[:, iColumn].tolist()
+        ]
+        for iColumn in range(objRawDataSheet.shape[1])
+    ]
+    return build_formula_workbook(
+        objRawDataColumns,
+        objRawDataSheet.shape,
+        [
+            tuple("" if pd.isna(objValue) else str(objValue) for objValue in objRow)
+            for objRow in objRawDataSheet.itertuples(index=False, name=None)
+        ],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 変換済みの Raw_Data の列から、空のワークブックを作成する関数
+# (並列評価のワーカーでは、親プロセスから受け取った列から作成する)
+#
+# ///////////////////////////////////////////////////////////////
+def build_formula_workbook(
+    objRawDataColumns: List[List[Any]],
+    objRawDataShape: Tuple[int, int],
+    objRawDataRows: List[Tuple[str, ...]],
+) -> Dict[str, Any]:
+    return {
+        "RawDataColumns": objRawDataColumns,
+        "RawDataShape": objRawDataShape,
+        # Raw_Data.tsv の行ごとの文字列 (永続キャッシュとの差分の検出用)
+        "RawDataRows": objRawDataRows,
+        # シート名 → {"Cells": (行, 列) → 文字列 (空でないセルだけ), "RowCount", "ColumnCount"}
+        "Sheets": {},
+        # (シート名, 行, 列) → 評価結果
+        "EvaluatedCells": {},
+        # 評価中のセル (循環参照の検出用)
+        "EvaluatingCells": set(),
+        # SUMIFS の集計インデックス:
+        # (合計範囲, 条件範囲...) → (条件値の比較キーの組 → 合計, 合計範囲が時間か)
+        "SumIfsIndex": {},
+        # MATCH (完全一致) の検索インデックス: 検索範囲 → (比較キー → 最初に現れた位置)
+        "MatchIndex": {},
+        # 数式テンプレート (相対参照に置き換えたトークン列) → 構文木
+        "TemplateAsts": {},
+        # 依存関係の解析で構文解析済みの数式セル: (シート名, 行, 列) → 構文木
+        "CompiledCells": {},
+        # 計測結果 (計測しない場合は None)。enable_workbook_statistics で有効にする
+        "Statistics": None,
+        # シート名 → 数式セルの評価計画 (build_formula_sheet_plan_workbook)
+        "SheetPlans": {},
+        # 永続キャッシュから読み込んだ前回の評価結果: シート名 → ((行, 列) → 値)
+        "CachedCellValues": {},
+        # 永続キャッシュの SUMIFS の集計のうち、Raw_Data の変更で値が変わった条件値の組:
+        # (合計範囲, 条件範囲...) → 比較キーの組の set (None は全体が変わったもの)
+        "ChangedSumIfsKeys": {},
+        # シート名 → 永続キャッシュの前回の値から変わった数式セルの set
+        "AffectedCells": {},
+    }
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ワークブックの計測を有効にする (計測結果を空に戻す) 関数。
+# 関数ごとの呼び出し回数・累積時間 (入れ子の関数の時間を含む)、キャッシュのヒット・ミス回数、
+# 評価した数式セルの数、依存関係の最大の深さを記録する。
+#
+# ///////////////////////////////////////////////////////////////
+def enable_workbook_statistics(
+    objWorkbook: Dict[str, Any],
 ) -> None:
-    try:
-        if not os.path.isfile(pszRawDataTsvPath):
-            with open(
-                pszRawDataTsvPath.replace(".tsv", "_error.tsv"),
-                "w",
-                encoding="utf-8",
-            ) as objFile:
-                objFile.write(
-                    "Error: input TSV file not found. Path = {0}".format(
-                        pszRawDataTsvPath,
-                    )
-                )
-            return
+    objWorkbook["Statistics"] = {
+        # 関数名 → [呼び出し回数, 累積時間 (秒)]
+        "FunctionCalls": {},
+        # キャッシュ名 → 回数
+        "CacheHits": {},
+        "CacheMisses": {},
+        "EvaluatedCellCount": 0,
+        "MaxDependencyDepth": 0,
+    }
 
-        if not os.path.isfile(pszProjectListFormulaTsvPath):
-            with open(
-                pszProjectListFormulaTsvPath.replace(".tsv", "_error.tsv"),
-                "w",
-                encoding="utf-8",
-            ) as objFile:
-                objFile.write(
-                    "Error: input TSV file not found. Path = {0}".format(
-                        pszProjectListFormulaTsvPath,
-                    )
-                )
-            return
 
-        objRawDataSheetForProjectList: pd.DataFrame = pd.read_csv(
-            pszRawDataTsvPath,
-            sep="\t",
-            dtype=str,
-            encoding="utf-8",
-            engine="python",
-        )
-        objProjectListFormulaSheet: pd.DataFrame = pd.read_csv(
-            pszProjectListFormulaTsvPath,
-            sep="\t",
-            dtype=str,
-            encoding="utf-8",
-            header=None,
-            engine="python",
-        )
+def merge_workbook_statistics(
+    objWorkbook: Dict[str, Any],
+    objOtherStatistics: Dict[str, Any],
+) -> None:
+    # 並列評価のワーカーの計測結果を加える (回数・時間は合計、依存関係の深さは最大値)
+    objStatistics: Dict[str, Any] = objWorkbook["Statistics"]
+    for pszFuncName, (iCallCount, fElapsedSeconds) in objOtherStatistics["FunctionCalls"].items():
+        objFunctionCall: List[Any] = objStatistics["FunctionCalls"].setdefault(pszFuncName, [0, 0.0])
+        objFunctionCall[0] += iCallCount
+        objFunctionCall[1] += fElapsedSeconds
+    for pszKey in ["CacheHits", "CacheMisses"]:
+        for pszCacheName, iCount in objOtherStatistics[pszKey].items():
+            objStatistics[pszKey][pszCacheName] = objStatistics[pszKey].get(pszCacheName, 0) + iCount
+    objStatistics["EvaluatedCellCount"] += objOtherStatistics["EvaluatedCellCount"]
+    objStatistics["MaxDependencyDepth"] = max(
+        objStatistics["MaxDependencyDepth"],
+        objOtherStatistics["MaxDependencyDepth"],
+    )
 
-        objOutputProjectList: pd.DataFrame = pd.DataFrame(
-            "",
-            index=objProjectListFormulaSheet.index,
-            columns=objProjectListFormulaSheet.columns,
-        )
 
-        objEvaluatedCellsProjectList: Dict[Tuple[str, int, int], Any] = {}
-        objEvaluatingCellsProjectList: set[Tuple[str, int, int]] = set()
+def count_cache_access_workbook(
+    objWorkbook: Dict[str, Any],
+    pszCacheName: str,
+    bHit: bool,
+) -> None:
+    objStatistics: Dict[str, Any] | None = objWorkbook["Statistics"]
+    if objStatistics is None:
+        return
+    objCounts: Dict[str, int] = objStatistics["CacheHits" if bHit else "CacheMisses"]
+    objCounts[pszCacheName] = objCounts.get(pszCacheName, 0) + 1
 
-        class ProjectListCircularReferenceError(RuntimeError):
-            pass
 
-        def tokenize_formula_project_list(pszFormula: str) -> List[Tuple[str, str]]:
-            objTokens: List[Tuple[str, str]] = []
-            iPos: int = 0
-            while iPos < len(pszFormula):
-                ch: str = pszFormula[iPos]
-                if ch.isspace():
-                    iPos += 1
-                    continue
-                if ch.isdigit() or (ch == "." and iPos + 1 < len(pszFormula) and pszFormula[iPos + 1].isdigit()):
-                    iStart: int = iPos
-                    iPos += 1
-                    while iPos < len(pszFormula) and (pszFormula[iPos].isdigit() or pszFormula[iPos] == "."):
-                        iPos += 1
-                    objTokens.append(("number", pszFormula[iStart:iPos]))
-                    continue
-                if ch == '"':
-                    iPos += 1
-                    iStart: int = iPos
-                    while iPos < len(pszFormula) and pszFormula[iPos] != '"':
-                        iPos += 1
-                    objTokens.append(("string", pszFormula[iStart:iPos]))
-                    iPos += 1
-                    continue
-                if ch.isalpha() or ch in ["_", "$", "!"]:
-                    iStart: int = iPos
-                    iPos += 1
-                    while iPos < len(pszFormula) and (pszFormula[iPos].isalnum() or pszFormula[iPos] in ["_", "$", "!"]):
-                        iPos += 1
-                    objTokens.append(("ident", pszFormula[iStart:iPos]))
-                    continue
-                if ch in ["+", "-", "*", "/", "&"]:
-                    objTokens.append(("op", ch))
-                    iPos += 1
-                    continue
-                if ch in ["=", "<", ">"]:
-                    if iPos + 1 < len(pszFormula) and pszFormula[iPos:iPos + 2] in ["<=", ">=", "<>"]:
-                        objTokens.append(("cmp", pszFormula[iPos:iPos + 2]))
-                        iPos += 2
-                    else:
-                        objTokens.append(("cmp", ch))
-                        iPos += 1
-                    continue
-                if ch in ["(", ")", ",", ":"]:
-                    objTokens.append(("symbol", ch))
-                    iPos += 1
-                    continue
-                iPos += 1
-            return objTokens
+def record_function_call_workbook(
+    objWorkbook: Dict[str, Any],
+    pszFuncName: str,
+    fElapsedSeconds: float,
+) -> None:
+    objFunctionCall: List[Any] = objWorkbook["Statistics"]["FunctionCalls"].setdefault(pszFuncName, [0, 0.0])
+    objFunctionCall[0] += 1
+    objFunctionCall[1] += fElapsedSeconds
 
-        def column_label_to_index_project_list(pszLabel: str) -> int:
-            iResult: int = 0
-            for ch in pszLabel.upper():
-                if ch == "$":
-                    continue
-                if ch < "A" or ch > "Z":
-                    return -1
-                iResult = iResult * 26 + (ord(ch) - ord("A") + 1)
-            return iResult - 1
-
-        def is_cell_reference_project_list(pszText: str) -> bool:
-            pszTextUpper: str = pszText.upper()
-            if "!" in pszTextUpper:
-                pszTextUpper = pszTextUpper.split("!", 1)[1]
-            iIndex: int = 0
-            while iIndex < len(pszTextUpper) and pszTextUpper[iIndex].isalpha():
-                iIndex += 1
-            if iIndex == 0:
-                return False
-            pszRowPart: str = pszTextUpper[iIndex:]
-            return pszRowPart.isdigit()
-
-        def parse_cell_reference_project_list(
-            pszReference: str,
-        ) -> Tuple[str | None, int, int]:
-            if "!" in pszReference:
-                pszSheetName, pszCell = pszReference.split("!", 1)
-            else:
-                pszSheetName = None
-                pszCell = pszReference
-            pszColumnPart: str = ""
-            pszRowPart: str = ""
-            for ch in pszCell:
-                if ch.isalpha() or ch == "$":
-                    pszColumnPart += ch
-                else:
-                    pszRowPart += ch
-            pszColumnPart = pszColumnPart.replace("$", "")
-            pszRowPart = pszRowPart.replace("$", "")
-            iRow: int = int(pszRowPart) - 1 if pszRowPart.isdigit() else -1
-            iColumn: int = column_label_to_index_project_list(pszColumnPart) if len(pszColumnPart) > 0 else -1
-            return pszSheetName, iRow, iColumn
-
-        def parse_expression_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            objValue, iPos = parse_comparison_project_list(objTokens, iStart)
-            return objValue, iPos
-
-        def parse_comparison_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            objLeft, iPos = parse_term_project_list(objTokens, iStart)
-            while iPos < len(objTokens) and objTokens[iPos][0] == "cmp":
-                pszOp: str = objTokens[iPos][1]
-                objRight, iPos = parse_term_project_list(objTokens, iPos + 1)
-                objLeft = ("cmp", pszOp, objLeft, objRight)
-            return objLeft, iPos
-
-        def parse_term_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            objLeft, iPos = parse_factor_project_list(objTokens, iStart)
-            while iPos < len(objTokens) and objTokens[iPos][0] == "op" and objTokens[iPos][1] in ["+", "-", "&"]:
-                pszOp: str = objTokens[iPos][1]
-                objRight, iPos = parse_factor_project_list(objTokens, iPos + 1)
-                objLeft = ("op", pszOp, objLeft, objRight)
-            return objLeft, iPos
-
-        def parse_factor_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            objLeft, iPos = parse_unary_project_list(objTokens, iStart)
-            while iPos < len(objTokens) and objTokens[iPos][0] == "op" and objTokens[iPos][1] in ["*", "/"]:
-                pszOp: str = objTokens[iPos][1]
-                objRight, iPos = parse_unary_project_list(objTokens, iPos + 1)
-                objLeft = ("op", pszOp, objLeft, objRight)
-            return objLeft, iPos
-
-        def parse_unary_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            if iStart < len(objTokens) and objTokens[iStart][0] == "op" and objTokens[iStart][1] in ["+", "-"]:
-                pszOp: str = objTokens[iStart][1]
-                objValue, iPos = parse_unary_project_list(objTokens, iStart + 1)
-                return ("unary", pszOp, objValue), iPos
-            return parse_primary_project_list(objTokens, iStart)
-
-        def parse_primary_project_list(
-            objTokens: List[Tuple[str, str]],
-            iStart: int,
-        ) -> Tuple[Any, int]:
-            objTokenType, pszToken = objTokens[iStart]
-            if objTokenType == "number":
-                return ("number", pszToken), iStart + 1
-            if objTokenType == "string":
-                return ("string", pszToken), iStart + 1
-            if objTokenType == "ident":
-                if iStart + 1 < len(objTokens) and objTokens[iStart + 1] == ("symbol", "("):
-                    pszFuncName: str = pszToken.upper()
-                    objArgs: List[Any] = []
-                    iPos: int = iStart + 2
-                    if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
+
+# ///////////////////////////////////////////////////////////////
+#
+# 計測結果を TSV に出力する関数。
+# 列: 区分 (Function / CacheHit / CacheMiss / Cells / Dependency), 名前, 値 (回数など), 累積時間(秒)
+#
+# ///////////////////////////////////////////////////////////////
+def write_workbook_statistics_tsv(
+    objWorkbook: Dict[str, Any],
+    pszStatisticsTsvPath: str,
+) -> None:
+    objStatistics: Dict[str, Any] = objWorkbook["Statistics"]
+    objRows: List[List[str]] = [["区分", "名前", "値", "累積時間(秒)"]]
+    for pszFuncName, (iCallCount, fElapsedSeconds) in sorted(
+        objStatistics["FunctionCalls"].items(),
+        key=lambda objItem: (-objItem[1][1], objItem[0]),
+    ):
+        objRows.append(["Function", pszFuncName, str(iCallCount), f"{fElapsedSeconds:.6f}"])
+    for pszCategory, pszKey in [("CacheHit", "CacheHits"), ("CacheMiss", "CacheMisses")]:
+        for pszCacheName, iCount in sorted(objStatistics[pszKey].items()):
+            objRows.append([pszCategory, pszCacheName, str(iCount), ""])
+    objRows.append(["Cells", "EvaluatedCells", str(objStatistics["EvaluatedCellCount"]), ""])
+    objRows.append(["Dependency", "MaxDepth", str(objStatistics["MaxDependencyDepth"]), ""])
+    with open(pszStatisticsTsvPath, mode="w", encoding="utf-8", newline="") as objFile:
+        for objRow in objRows:
+            objFile.write("\t".join(objRow) + "\n")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 数式シート (TSV) をワークブックに追加する関数。
+# シートは空でないセルだけを (行, 列) → 文字列 として保持する (疎な表現)。
+#
+# ///////////////////////////////////////////////////////////////
+def add_formula_sheet_to_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    pszFormulaTsvPath: str,
+) -> None:
+    objFormulaSheet: pd.DataFrame = pd.read_csv(
+        pszFormulaTsvPath,
+        sep="\t",
+        dtype=str,
+        encoding="utf-8",
+        header=None,
+        engine="python",
+    )
+    objWorkbook["Sheets"][pszSheetName] = {
+        "Cells": {
+            (iRow, iColumn): str(objValue)
+            for (iRow, iColumn), objValue in np.ndenumerate(objFormulaSheet.to_numpy(dtype=object))
+            if not pd.isna(objValue) and str(objValue) != ""
+        },
+        "RowCount": objFormulaSheet.shape[0],
+        "ColumnCount": objFormulaSheet.shape[1],
+    }
+
+
+def tokenize_formula_workbook(pszFormula: str) -> List[Tuple[str, str]]:
+    objTokens: List[Tuple[str, str]] = []
+    iPos: int = 0
+    while iPos < len(pszFormula):
+        ch: str = pszFormula[iPos]
+        if ch.isspace():
+            iPos += 1
+            continue
+        if ch.isdigit() or (ch == "." and iPos + 1 < len(pszFormula) and pszFormula[iPos + 1].isdigit()):
+            iStart: int = iPos
+            iPos += 1
+            while iPos < len(pszFormula) and (pszFormula[iPos].isdigit() or pszFormula[iPos] == "."):
+                iPos += 1
+            objTokens.append(("number", pszFormula[iStart:iPos]))
+            continue
+        if ch == '"':
+            iPos += 1
+            iStart: int = iPos
+            while iPos < len(pszFormula) and pszFormula[iPos] != '"':
+                iPos += 1
+            objTokens.append(("string", pszFormula[iStart:iPos]))
+            iPos += 1
+            continue
+        if ch.isalpha() or ch in ["_", "$", "!"]:
+            iStart: int = iPos
+            iPos += 1
+            while iPos < len(pszFormula) and (pszFormula[iPos].isalnum() or pszFormula[iPos] in ["_", "$", "!"]):
+                iPos += 1
+            objTokens.append(("ident", pszFormula[iStart:iPos]))
+            continue
+        if ch in ["+", "-", "*", "/", "&"]:
+            objTokens.append(("op", ch))
+            iPos += 1
+            continue
+        if ch in ["=", "<", ">"]:
+            if iPos + 1 < len(pszFormula) and pszFormula[iPos:iPos + 2] in ["<=", ">=", "<>"]:
+                objTokens.append(("cmp", pszFormula[iPos:iPos + 2]))
+                iPos += 2
+            else:
+                objTokens.append(("cmp", ch))
+                iPos += 1
+            continue
+        if ch in ["(", ")", ",", ":"]:
+            objTokens.append(("symbol", ch))
+            iPos += 1
+            continue
+        iPos += 1
+    return objTokens
+
+
+def column_label_to_index_workbook(pszLabel: str) -> int:
+    iResult: int = 0
+    for ch in pszLabel.upper():
+        if ch == "$":
+            continue
+        if ch < "A" or ch > "Z":
+            return -1
+        iResult = iResult * 26 + (ord(ch) - ord("A") + 1)
+    return iResult - 1
+
+
+def is_cell_reference_workbook(pszText: str) -> bool:
+    pszTextUpper: str = pszText.upper()
+    if "!" in pszTextUpper:
+        pszTextUpper = pszTextUpper.split("!", 1)[1]
+    # 列・行の前に付く "$" (絶対参照) を許容する
+    iIndex: int = 1 if pszTextUpper.startswith("$") else 0
+    iColumnStart: int = iIndex
+    while iIndex < len(pszTextUpper) and pszTextUpper[iIndex].isalpha():
+        iIndex += 1
+    if iIndex == iColumnStart:
+        return False
+    pszRowPart: str = pszTextUpper[iIndex:]
+    if pszRowPart.startswith("$"):
+        pszRowPart = pszRowPart[1:]
+    return pszRowPart.isdigit()
+
+
+def is_column_reference_workbook(pszText: str) -> bool:
+    # 列全体の参照 (範囲 "$L:$L" の両端) の判定
+    pszTextUpper: str = pszText.upper()
+    if "!" in pszTextUpper:
+        pszTextUpper = pszTextUpper.split("!", 1)[1]
+    pszTextUpper = pszTextUpper[1:] if pszTextUpper.startswith("$") else pszTextUpper
+    return 0 < len(pszTextUpper) <= 3 and all("A" <= ch <= "Z" for ch in pszTextUpper)
+
+
+def is_row_reference_workbook(pszText: str) -> bool:
+    # 行全体の参照 (範囲 "1:1" / "$3:$3" の両端) の判定
+    if "!" in pszText:
+        pszText = pszText.split("!", 1)[1]
+    pszText = pszText[1:] if pszText.startswith("$") else pszText
+    return pszText.isdigit() and int(pszText) > 0
+
+
+def parse_cell_reference_workbook(
+    pszReference: str,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+) -> Tuple[str | None, bool, int | None, bool, int | None]:
+    # A1 形式の参照を R1C1 形式 (シート名, 行が絶対か, 行, 列が絶対か, 列) に変換する。
+    # 相対参照の行・列は、現在のセルからのオフセットで表す。
+    # 列全体の参照は行を、行全体の参照は列を None とする。
+    if "!" in pszReference:
+        pszSheetName, pszCell = pszReference.split("!", 1)
+    else:
+        pszSheetName = None
+        pszCell = pszReference
+    if is_row_reference_workbook(pszCell):
+        bWholeRowAbsolute: bool = pszCell.startswith("$")
+        iWholeRow: int = int(pszCell.lstrip("$")) - 1
+        return (
+            pszSheetName,
+            bWholeRowAbsolute,
+            iWholeRow if bWholeRowAbsolute else iWholeRow - iCurrentRow,
+            True,
+            None,
+        )
+    bColumnAbsolute: bool = pszCell.startswith("$")
+    pszCell = pszCell.lstrip("$")
+    pszColumnPart: str = ""
+    pszRowPart: str = ""
+    for ch in pszCell:
+        if ch.isalpha() and len(pszRowPart) == 0:
+            pszColumnPart += ch
+        else:
+            pszRowPart += ch
+    iColumn: int = column_label_to_index_workbook(pszColumnPart) if len(pszColumnPart) > 0 else -1
+    if len(pszRowPart) == 0:
+        return (
+            pszSheetName,
+            True,
+            None,
+            bColumnAbsolute,
+            iColumn if bColumnAbsolute else iColumn - iCurrentColumn,
+        )
+    bRowAbsolute: bool = pszRowPart.startswith("$")
+    pszRowPart = pszRowPart.replace("$", "")
+    iRow: int = int(pszRowPart) - 1 if pszRowPart.isdigit() else -1
+    return (
+        pszSheetName,
+        bRowAbsolute,
+        iRow if bRowAbsolute else iRow - iCurrentRow,
+        bColumnAbsolute,
+        iColumn if bColumnAbsolute else iColumn - iCurrentColumn,
+    )
+
+
+def resolve_reference_workbook(
+    objReference: Tuple[str | None, bool, int | None, bool, int | None],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+) -> Tuple[str | None, int | None, int | None]:
+    pszSheetName, bRowAbsolute, iRow, bColumnAbsolute, iColumn = objReference
+    return (
+        pszSheetName,
+        iRow if bRowAbsolute else iCurrentRow + iRow,
+        iColumn if bColumnAbsolute else iCurrentColumn + iColumn,
+    )
+
+
+def get_sheet_used_extent_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+) -> Tuple[int, int]:
+    # シートの使用範囲 (行数, 列数)。範囲参照はこの大きさに切り詰めて走査する。
+    # 存在しないシートは空のシートとして扱う。
+    if pszSheetName == pszWorkbookRawDataSheetName:
+        return objWorkbook["RawDataShape"]
+    objSheet: Dict[str, Any] | None = objWorkbook["Sheets"].get(pszSheetName)
+    if objSheet is None:
+        return 0, 0
+    return objSheet["RowCount"], objSheet["ColumnCount"]
+
+
+def resolve_range_workbook(
+    objNode: Any,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Tuple[str, int, int, int, int]:
+    # "range" / "cell" ノードを (シート名, 開始行, 開始列, 終了行, 終了列) に解決する。
+    # 列全体・行全体の参照は Excel のシートの最大行・最大列までの範囲とする
+    # (範囲の大きさは Excel と同じにし、走査時に使用範囲へ切り詰める)。
+    objStartReference: Any = objNode[1]
+    objEndReference: Any = objNode[2] if objNode[0] == "range" and objNode[2] is not None else objStartReference
+    pszSheetStart, iStartRow, iStartColumn = resolve_reference_workbook(
+        objStartReference,
+        iCurrentRow,
+        iCurrentColumn,
+    )
+    pszSheetEnd, iEndRow, iEndColumn = resolve_reference_workbook(
+        objEndReference,
+        iCurrentRow,
+        iCurrentColumn,
+    )
+    pszTargetSheet: str = pszSheetStart or pszSheetEnd or pszCurrentSheet
+    if iStartRow is None or iEndRow is None:
+        iStartRow, iEndRow = 0, iWorkbookMaxRowCount - 1
+    if iStartColumn is None or iEndColumn is None:
+        iStartColumn, iEndColumn = 0, iWorkbookMaxColumnCount - 1
+    return (
+        pszTargetSheet,
+        min(iStartRow, iEndRow),
+        min(iStartColumn, iEndColumn),
+        max(iStartRow, iEndRow),
+        max(iStartColumn, iEndColumn),
+    )
+
+
+def iterate_range_cells_workbook(
+    objWorkbook: Dict[str, Any],
+    pszTargetSheet: str,
+    iStartRow: int,
+    iStartColumn: int,
+    iEndRow: int,
+    iEndColumn: int,
+    pszCurrentSheet: str,
+) -> Iterator[Tuple[int, Any]]:
+    # 範囲内の空でないセルだけを (範囲内の位置 (行優先・0 始まり), 値) として返す。
+    # シートの使用範囲の外側は空のセルのため、走査しない。
+    iUsedRowCount, iUsedColumnCount = get_sheet_used_extent_workbook(objWorkbook, pszTargetSheet)
+    iWidth: int = iEndColumn - iStartColumn + 1
+    for iRow in range(max(iStartRow, 0), min(iEndRow, iUsedRowCount - 1) + 1):
+        for iColumn in range(max(iStartColumn, 0), min(iEndColumn, iUsedColumnCount - 1) + 1):
+            objValue: Any = evaluate_cell_by_sheet_workbook(
+                objWorkbook,
+                pszTargetSheet,
+                iRow,
+                iColumn,
+                pszCurrentSheet,
+            )
+            if isinstance(objValue, str) and objValue == "":
+                continue
+            yield (iRow - iStartRow) * iWidth + (iColumn - iStartColumn), objValue
+
+
+def parse_expression_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    objValue, iPos = parse_comparison_workbook(objTokens, iStart)
+    return objValue, iPos
+
+
+def parse_comparison_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    objLeft, iPos = parse_term_workbook(objTokens, iStart)
+    while iPos < len(objTokens) and objTokens[iPos][0] == "cmp":
+        pszOp: str = objTokens[iPos][1]
+        objRight, iPos = parse_term_workbook(objTokens, iPos + 1)
+        objLeft = ("cmp", pszOp, objLeft, objRight)
+    return objLeft, iPos
+
+
+def parse_term_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    objLeft, iPos = parse_factor_workbook(objTokens, iStart)
+    while iPos < len(objTokens) and objTokens[iPos][0] == "op" and objTokens[iPos][1] in ["+", "-", "&"]:
+        pszOp: str = objTokens[iPos][1]
+        objRight, iPos = parse_factor_workbook(objTokens, iPos + 1)
+        objLeft = ("op", pszOp, objLeft, objRight)
+    return objLeft, iPos
+
+
+def parse_factor_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    objLeft, iPos = parse_unary_workbook(objTokens, iStart)
+    while iPos < len(objTokens) and objTokens[iPos][0] == "op" and objTokens[iPos][1] in ["*", "/"]:
+        pszOp: str = objTokens[iPos][1]
+        objRight, iPos = parse_unary_workbook(objTokens, iPos + 1)
+        objLeft = ("op", pszOp, objLeft, objRight)
+    return objLeft, iPos
+
+
+def parse_unary_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    if iStart < len(objTokens) and objTokens[iStart][0] == "op" and objTokens[iStart][1] in ["+", "-"]:
+        pszOp: str = objTokens[iStart][1]
+        objValue, iPos = parse_unary_workbook(objTokens, iStart + 1)
+        return ("unary", pszOp, objValue), iPos
+    return parse_primary_workbook(objTokens, iStart)
+
+
+def parse_primary_workbook(
+    objTokens: List[Tuple[str, str]],
+    iStart: int,
+) -> Tuple[Any, int]:
+    objTokenType, pszToken = objTokens[iStart]
+    if objTokenType == "number":
+        return ("number", pszToken), iStart + 1
+    if objTokenType == "string":
+        return ("string", pszToken), iStart + 1
+    if objTokenType == "ident":
+        if iStart + 1 < len(objTokens) and objTokens[iStart + 1] == ("symbol", "("):
+            pszFuncName: str = pszToken.upper()
+            objArgs: List[Any] = []
+            iPos: int = iStart + 2
+            if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
+                iPos += 1
+            else:
+                while iPos < len(objTokens):
+                    objArg, iPos = parse_expression_workbook(objTokens, iPos)
+                    objArgs.append(objArg)
+                    if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ","):
+                        iPos += 1
+                        continue
+                    if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
                         iPos += 1
-                    else:
-                        while iPos < len(objTokens):
-                            objArg, iPos = parse_expression_project_list(objTokens, iPos)
-                            objArgs.append(objArg)
-                            if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ","):
-                                iPos += 1
-                                continue
-                            if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
-                                iPos += 1
-                                break
-                    return ("func", pszFuncName, objArgs), iPos
-                if is_cell_reference_project_list(pszToken):
-                    if iStart + 1 < len(objTokens) and objTokens[iStart + 1] == ("symbol", ":"):
-                        pszSecond: str = objTokens[iStart + 2][1] if (iStart + 2) < len(objTokens) else ""
-                        return ("range", pszToken, pszSecond), iStart + 3
-                    return ("cell", pszToken), iStart + 1
-                return ("string", pszToken), iStart + 1
-            if objTokenType == "symbol" and pszToken == "(":
-                objValue, iPos = parse_expression_project_list(objTokens, iStart + 1)
-                if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
-                    iPos += 1
-                return objValue, iPos
-            return ("string", pszToken), iStart + 1
-
-        def evaluate_range_project_list(
-            pszSheet: str | None,
-            pszStartCell: str,
-            pszEndCell: str,
-            pszCurrentSheet: str,
-        ) -> List[Any]:
-            pszStartSheet, iStartRow, iStartColumn = parse_cell_reference_project_list(
-                (pszSheet + "!" if pszSheet else "") + pszStartCell,
+                        break
+            return ("func", pszFuncName, objArgs), iPos
+        return ("string", pszToken), iStart + 1
+    if objTokenType == "ref":
+        if iStart + 1 < len(objTokens) and objTokens[iStart + 1] == ("symbol", ":"):
+            objSecond: Any = None
+            if iStart + 2 < len(objTokens) and objTokens[iStart + 2][0] == "ref":
+                objSecond = objTokens[iStart + 2][1]
+            return ("range", pszToken, objSecond), iStart + 3
+        return ("cell", pszToken), iStart + 1
+    if objTokenType == "symbol" and pszToken == "(":
+        objValue, iPos = parse_expression_workbook(objTokens, iStart + 1)
+        if iPos < len(objTokens) and objTokens[iPos] == ("symbol", ")"):
+            iPos += 1
+        return objValue, iPos
+    return ("string", pszToken), iStart + 1
+
+
+def evaluate_range_workbook(
+    objWorkbook: Dict[str, Any],
+    pszTargetSheet: str,
+    iStartRow: int,
+    iStartColumn: int,
+    iEndRow: int,
+    iEndColumn: int,
+    pszCurrentSheet: str,
+) -> List[Any]:
+    # 範囲の値 (空のセルを除く)。SUM / COUNT などは空のセルを無視するため、空のセルは展開しない。
+    return [
+        objValue
+        for _, objValue in iterate_range_cells_workbook(
+            objWorkbook,
+            pszTargetSheet,
+            iStartRow,
+            iStartColumn,
+            iEndRow,
+            iEndColumn,
+            pszCurrentSheet,
+        )
+    ]
+
+
+def build_sumifs_index_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+    pszCurrentSheet: str,
+) -> Tuple[Dict[Tuple[Tuple[str, Any], ...], Any], bool]:
+    # 合計範囲の値を、条件範囲の値の組ごとに 1 回の走査で合計する。
+    # 各範囲は空でないセルだけを (範囲内の位置 → 値) として持つ。
+    objRangeValues: List[Dict[int, Any]] = [
+        dict(
+            iterate_range_cells_workbook(
+                objWorkbook,
+                pszSheet,
+                iStartRow,
+                iStartColumn,
+                iEndRow,
+                iEndColumn,
+                pszCurrentSheet,
             )
-            pszEndSheet, iEndRow, iEndColumn = parse_cell_reference_project_list(
-                (pszSheet + "!" if pszSheet else "") + pszEndCell,
+        )
+        for pszSheet, iStartRow, iStartColumn, iEndRow, iEndColumn in objRanges
+    ]
+    objSumValues: Dict[int, Any] = objRangeValues[0]
+    objCriteriaValues: List[Dict[int, Any]] = objRangeValues[1:]
+    objTotals: Dict[Tuple[Tuple[str, Any], ...], Any] = {}
+    bDuration: bool = False
+    for iIndex, objValue in objSumValues.items():
+        # Excel と同じく、合計範囲の文字列・論理値は合計しない
+        if isinstance(objValue, bool) or not isinstance(objValue, (int, float)):
+            continue
+        if isinstance(objValue, WorkbookDuration):
+            bDuration = True
+        objKey: Tuple[Tuple[str, Any], ...] = tuple(
+            build_lookup_key_for_workbook(objValues.get(iIndex, "")) for objValues in objCriteriaValues
+        )
+        objTotals[objKey] = objTotals.get(objKey, 0) + objValue
+    return objTotals, bDuration
+
+
+def get_sumifs_index_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+    pszCurrentSheet: str,
+) -> Tuple[Dict[Tuple[Tuple[str, Any], ...], Any], bool]:
+    objIndexEntry = objWorkbook["SumIfsIndex"].get(objRanges)
+    if objWorkbook["Statistics"] is not None:
+        count_cache_access_workbook(objWorkbook, "SumIfsIndex", objIndexEntry is not None)
+    if objIndexEntry is None:
+        objIndexEntry = build_sumifs_index_workbook(objWorkbook, objRanges, pszCurrentSheet)
+        objWorkbook["SumIfsIndex"][objRanges] = objIndexEntry
+    return objIndexEntry
+
+
+def evaluate_sumifs_workbook(
+    objWorkbook: Dict[str, Any],
+    objArgsNodes: List[Any],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    if len(objArgsNodes) < 3 or len(objArgsNodes) % 2 == 0:
+        return ""
+    objRangeNodes: List[Any] = [objArgsNodes[0]] + objArgsNodes[1::2]
+    if any(objRangeNode[0] not in ["range", "cell"] for objRangeNode in objRangeNodes):
+        return ""
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...] = tuple(
+        resolve_range_workbook(objRangeNode, iCurrentRow, iCurrentColumn, pszCurrentSheet)
+        for objRangeNode in objRangeNodes
+    )
+    objSizes: set[Tuple[int, int]] = {
+        (iEndRow - iStartRow, iEndColumn - iStartColumn)
+        for _, iStartRow, iStartColumn, iEndRow, iEndColumn in objRanges
+    }
+    if len(objSizes) != 1:
+        return ""
+
+    objTotals, bDuration = get_sumifs_index_workbook(objWorkbook, objRanges, pszCurrentSheet)
+
+    objCriteriaKeys: List[Tuple[str, Any]] = []
+    objMatchers: List[Callable[[Tuple[str, Any]], bool] | None] = []
+    for objCriterionNode in objArgsNodes[2::2]:
+        objCriterion: Any = evaluate_node_workbook(
+            objWorkbook,
+            objCriterionNode,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        if isinstance(objCriterion, list):
+            objCriterion = objCriterion[0] if len(objCriterion) > 0 else ""
+        # Excel と同じく、空のセルを条件にした場合は 0 として扱う
+        objCriteriaKeys.append(build_lookup_key_for_workbook(objCriterion if objCriterion != "" else 0))
+        objMatchers.append(build_criteria_matcher_for_workbook(objCriterion))
+
+    objTotal: Any = 0
+    if all(pfnMatcher is None for pfnMatcher in objMatchers):
+        objTotal = objTotals.get(tuple(objCriteriaKeys), 0)
+    else:
+        for objKey, objGroupTotal in objTotals.items():
+            if all(
+                (objKey[iIndex] == objCriteriaKeys[iIndex]) if pfnMatcher is None else pfnMatcher(objKey[iIndex])
+                for iIndex, pfnMatcher in enumerate(objMatchers)
+            ):
+                objTotal += objGroupTotal
+    if bDuration:
+        return WorkbookDuration(int(objTotal))
+    return objTotal
+
+
+def evaluate_index_workbook(
+    objWorkbook: Dict[str, Any],
+    objArgsNodes: List[Any],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    # INDEX(範囲, 行番号[, 列番号]): 範囲の値は展開せず、参照先のセルだけを評価する
+    if len(objArgsNodes) < 2 or objArgsNodes[0][0] not in ["range", "cell"]:
+        return ""
+    pszSheet, iStartRow, iStartColumn, iEndRow, iEndColumn = resolve_range_workbook(
+        objArgsNodes[0],
+        iCurrentRow,
+        iCurrentColumn,
+        pszCurrentSheet,
+    )
+    objNumbers: List[Any] = [
+        evaluate_node_workbook(objWorkbook, objArgNode, iCurrentRow, iCurrentColumn, pszCurrentSheet)
+        for objArgNode in objArgsNodes[1:3]
+    ]
+    for objNumber in objNumbers:
+        if isinstance(objNumber, WorkbookFormulaError):
+            return objNumber
+    try:
+        objOffsets: List[int] = [int(float(objNumber)) for objNumber in objNumbers]
+    except (TypeError, ValueError):
+        return WorkbookFormulaError("#VALUE!")
+    iRowOffset: int
+    iColumnOffset: int
+    if len(objOffsets) == 1:
+        # 1 行だけの範囲では、行番号の位置に列番号を指定する
+        if iStartRow == iEndRow and iStartColumn != iEndColumn:
+            iRowOffset, iColumnOffset = 1, objOffsets[0]
+        else:
+            iRowOffset, iColumnOffset = objOffsets[0], 1
+    else:
+        iRowOffset, iColumnOffset = objOffsets[0], objOffsets[1]
+    if (
+        iRowOffset < 1
+        or iColumnOffset < 1
+        or iRowOffset > iEndRow - iStartRow + 1
+        or iColumnOffset > iEndColumn - iStartColumn + 1
+    ):
+        return WorkbookFormulaError("#REF!")
+    return evaluate_cell_by_sheet_workbook(
+        objWorkbook,
+        pszSheet,
+        iStartRow + iRowOffset - 1,
+        iStartColumn + iColumnOffset - 1,
+        pszCurrentSheet,
+    )
+
+
+def evaluate_match_workbook(
+    objWorkbook: Dict[str, Any],
+    objArgsNodes: List[Any],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    # MATCH(検索値, 範囲, 0): 完全一致のみ対応する。
+    # 範囲ごとに「比較キー → 最初に現れた位置」の辞書を 1 回だけ作り、各セルで共有する。
+    if len(objArgsNodes) < 2 or objArgsNodes[1][0] not in ["range", "cell"]:
+        return ""
+    objLookupValue: Any = evaluate_node_workbook(
+        objWorkbook,
+        objArgsNodes[0],
+        iCurrentRow,
+        iCurrentColumn,
+        pszCurrentSheet,
+    )
+    if isinstance(objLookupValue, WorkbookFormulaError):
+        return objLookupValue
+    if len(objArgsNodes) < 3:
+        return ""
+    objMatchType: Any = evaluate_node_workbook(
+        objWorkbook,
+        objArgsNodes[2],
+        iCurrentRow,
+        iCurrentColumn,
+        pszCurrentSheet,
+    )
+    if build_lookup_key_for_workbook(objMatchType) != ("number", 0.0):
+        return ""
+    if objLookupValue == "":
+        return WorkbookFormulaError("#N/A")
+
+    objRange: Tuple[str, int, int, int, int] = resolve_range_workbook(
+        objArgsNodes[1],
+        iCurrentRow,
+        iCurrentColumn,
+        pszCurrentSheet,
+    )
+    objPositions: Dict[Tuple[str, Any], int] | None = objWorkbook["MatchIndex"].get(objRange)
+    if objWorkbook["Statistics"] is not None:
+        count_cache_access_workbook(objWorkbook, "MatchIndex", objPositions is not None)
+    if objPositions is None:
+        objPositions = {}
+        pszSheet, iStartRow, iStartColumn, iEndRow, iEndColumn = objRange
+        for iOffset, objValue in iterate_range_cells_workbook(
+            objWorkbook,
+            pszSheet,
+            iStartRow,
+            iStartColumn,
+            iEndRow,
+            iEndColumn,
+            pszCurrentSheet,
+        ):
+            objPositions.setdefault(build_lookup_key_for_workbook(objValue), iOffset + 1)
+        objWorkbook["MatchIndex"][objRange] = objPositions
+
+    # ワイルドカードを含む文字列は、最初に一致する位置を順に探す
+    if isinstance(objLookupValue, str) and any(ch in objLookupValue for ch in "*?~"):
+        pfnMatcher: Callable[[Tuple[str, Any]], bool] | None = build_criteria_matcher_for_workbook(
+            "=" + objLookupValue,
+        )
+        objMatchedPositions: List[int] = [
+            iPosition
+            for objKey, iPosition in objPositions.items()
+            if pfnMatcher is not None and pfnMatcher(objKey)
+        ]
+        if len(objMatchedPositions) == 0:
+            return WorkbookFormulaError("#N/A")
+        return min(objMatchedPositions)
+
+    iFoundPosition: int | None = objPositions.get(build_lookup_key_for_workbook(objLookupValue))
+    if iFoundPosition is None:
+        return WorkbookFormulaError("#N/A")
+    return iFoundPosition
+
+
+def evaluate_node_workbook(
+    objWorkbook: Dict[str, Any],
+    objNode: Any,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    if objNode[0] == "number":
+        try:
+            if "." in objNode[1]:
+                return float(objNode[1])
+            return int(objNode[1])
+        except ValueError:
+            return 0
+    if objNode[0] == "string":
+        return str(objNode[1])
+    if objNode[0] == "unary":
+        pszOp: str = objNode[1]
+        objValue: Any = evaluate_node_workbook(
+            objWorkbook,
+            objNode[2],
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        if isinstance(objValue, WorkbookFormulaError):
+            return objValue
+        try:
+            fNumber: float = float(objValue)
+            return -fNumber if pszOp == "-" else fNumber
+        except Exception:
+            return objValue
+    if objNode[0] == "op":
+        pszOp: str = objNode[1]
+        objLeft: Any = evaluate_node_workbook(
+            objWorkbook,
+            objNode[2],
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        objRight: Any = evaluate_node_workbook(
+            objWorkbook,
+            objNode[3],
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        for objValue in [objLeft, objRight]:
+            if isinstance(objValue, WorkbookFormulaError):
+                return objValue
+        if pszOp == "&":
+            return str(objLeft) + str(objRight)
+        try:
+            fLeft: float = float(objLeft)
+            fRight: float = float(objRight)
+            if pszOp == "+":
+                return fLeft + fRight
+            if pszOp == "-":
+                return fLeft - fRight
+            if pszOp == "*":
+                return fLeft * fRight
+            if pszOp == "/":
+                return fLeft / fRight if fRight != 0 else 0
+        except Exception:
+            if pszOp == "+":
+                return str(objLeft) + str(objRight)
+        return ""
+    if objNode[0] == "cmp":
+        pszOp: str = objNode[1]
+        objLeft: Any = evaluate_node_workbook(
+            objWorkbook,
+            objNode[2],
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        objRight: Any = evaluate_node_workbook(
+            objWorkbook,
+            objNode[3],
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        return compare_values_for_workbook(pszOp, objLeft, objRight)
+    if objNode[0] == "cell":
+        pszSheet, iRow, iColumn = resolve_reference_workbook(
+            objNode[1],
+            iCurrentRow,
+            iCurrentColumn,
+        )
+        pszTargetSheet: str = pszSheet or pszCurrentSheet
+        return evaluate_cell_by_sheet_workbook(
+            objWorkbook,
+            pszTargetSheet,
+            iRow,
+            iColumn,
+            pszCurrentSheet,
+        )
+    if objNode[0] == "range":
+        pszSheetNameRange, iStartRow, iStartColumn, iEndRow, iEndColumn = resolve_range_workbook(
+            objNode,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        return evaluate_range_workbook(
+            objWorkbook,
+            pszSheetNameRange,
+            iStartRow,
+            iStartColumn,
+            iEndRow,
+            iEndColumn,
+            pszCurrentSheet,
+        )
+    if objNode[0] == "func":
+        if objWorkbook["Statistics"] is None:
+            return evaluate_function_workbook(
+                objWorkbook,
+                objNode[1],
+                objNode[2],
+                iCurrentRow,
+                iCurrentColumn,
+                pszCurrentSheet,
             )
-            pszTargetSheet: str | None = pszStartSheet or pszEndSheet or pszCurrentSheet
-            objValues: List[Any] = []
-            for iRow in range(min(iStartRow, iEndRow), max(iStartRow, iEndRow) + 1):
-                for iColumn in range(min(iStartColumn, iEndColumn), max(iStartColumn, iEndColumn) + 1):
-                    objValues.append(
-                        evaluate_cell_by_sheet_project_list(
-                            pszTargetSheet,
-                            iRow,
-                            iColumn,
-                            pszCurrentSheet,
-                        ),
-                    )
-            return objValues
-
-        def evaluate_node_project_list(
-            objNode: Any,
-            iCurrentRow: int,
-            iCurrentColumn: int,
-            pszCurrentSheet: str,
-        ) -> Any:
-            if objNode[0] == "number":
-                try:
-                    if "." in objNode[1]:
-                        return float(objNode[1])
-                    return int(objNode[1])
-                except ValueError:
-                    return 0
-            if objNode[0] == "string":
-                return str(objNode[1])
-            if objNode[0] == "unary":
-                pszOp: str = objNode[1]
-                objValue: Any = evaluate_node_project_list(
-                    objNode[2],
-                    iCurrentRow,
-                    iCurrentColumn,
-                    pszCurrentSheet,
-                )
-                try:
-                    fNumber: float = float(objValue)
-                    return -fNumber if pszOp == "-" else fNumber
-                except Exception:
-                    return objValue
-            if objNode[0] == "op":
-                pszOp: str = objNode[1]
-                objLeft: Any = evaluate_node_project_list(
-                    objNode[2],
-                    iCurrentRow,
-                    iCurrentColumn,
-                    pszCurrentSheet,
-                )
-                objRight: Any = evaluate_node_project_list(
-                    objNode[3],
-                    iCurrentRow,
-                    iCurrentColumn,
-                    pszCurrentSheet,
-                )
-                if pszOp == "&":
-                    return str(objLeft) + str(objRight)
+        fStartTime: float = time.perf_counter()
+        try:
+            return evaluate_function_workbook(
+                objWorkbook,
+                objNode[1],
+                objNode[2],
+                iCurrentRow,
+                iCurrentColumn,
+                pszCurrentSheet,
+            )
+        finally:
+            record_function_call_workbook(objWorkbook, objNode[1], time.perf_counter() - fStartTime)
+    return ""
+
+
+def evaluate_function_workbook(
+    objWorkbook: Dict[str, Any],
+    pszFuncName: str,
+    objArgsNodes: List[Any],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    if pszFuncName == "SUMIFS":
+        return evaluate_sumifs_workbook(
+            objWorkbook,
+            objArgsNodes,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+    if pszFuncName == "INDEX":
+        return evaluate_index_workbook(
+            objWorkbook,
+            objArgsNodes,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+    if pszFuncName == "MATCH":
+        return evaluate_match_workbook(
+            objWorkbook,
+            objArgsNodes,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+    objArgsValues: List[Any] = [
+        evaluate_node_workbook(
+            objWorkbook,
+            objArg,
+            iCurrentRow,
+            iCurrentColumn,
+            pszCurrentSheet,
+        )
+        for objArg in objArgsNodes
+    ]
+    if pszFuncName == "IFERROR":
+        if len(objArgsValues) > 0 and not isinstance(objArgsValues[0], WorkbookFormulaError):
+            return objArgsValues[0]
+        return objArgsValues[1] if len(objArgsValues) > 1 else ""
+    if pszFuncName == "IF":
+        if len(objArgsValues) > 0 and isinstance(objArgsValues[0], WorkbookFormulaError):
+            return objArgsValues[0]
+        bCondition: bool = bool(objArgsValues[0]) if len(objArgsValues) > 0 else False
+        if bCondition:
+            return objArgsValues[1] if len(objArgsValues) > 1 else ""
+        return objArgsValues[2] if len(objArgsValues) > 2 else ""
+    if pszFuncName == "SUM":
+        fTotal: float = 0.0
+        bDuration: bool = False
+        for objArg in objArgsValues:
+            objItems: List[Any] = objArg if isinstance(objArg, list) else [objArg]
+            for objItem in objItems:
+                if isinstance(objItem, WorkbookFormulaError):
+                    return objItem
                 try:
-                    fLeft: float = float(objLeft)
-                    fRight: float = float(objRight)
-                    if pszOp == "+":
-                        return fLeft + fRight
-                    if pszOp == "-":
-                        return fLeft - fRight
-                    if pszOp == "*":
-                        return fLeft * fRight
-                    if pszOp == "/":
-                        return fLeft / fRight if fRight != 0 else 0
+                    fTotal += float(objItem)
                 except Exception:
-                    if pszOp == "+":
-                        return str(objLeft) + str(objRight)
-                return ""
-            if objNode[0] == "cmp":
-                pszOp: str = objNode[1]
-                objLeft: Any = evaluate_node_project_list(
-                    objNode[2],
-                    iCurrentRow,
-                    iCurrentColumn,
-                    pszCurrentSheet,
-                )
-                objRight: Any = evaluate_node_project_list(
-                    objNode[3],
-                    iCurrentRow,
-                    iCurrentColumn,
-                    pszCurrentSheet,
-                )
-                if pszOp == "=":
-                    return objLeft == objRight
-                if pszOp == "<":
-                    return objLeft < objRight
-                if pszOp == ">":
-                    return objLeft > objRight
-                if pszOp == "<=":
-                    return objLeft <= objRight
-                if pszOp == ">=":
-                    return objLeft >= objRight
-                if pszOp == "<>":
-                    return objLeft != objRight
-            if objNode[0] == "cell":
-                pszSheet, iRow, iColumn = parse_cell_reference_project_list(objNode[1])
-                pszTargetSheet: str = pszSheet or pszCurrentSheet
-                return evaluate_cell_by_sheet_project_list(
-                    pszTargetSheet,
-                    iRow,
-                    iColumn,
-                    pszCurrentSheet,
-                )
-            if objNode[0] == "range":
-                pszSheetStart, _, _ = parse_cell_reference_project_list(objNode[1])
-                pszSheetEnd, _, _ = parse_cell_reference_project_list(objNode[2])
-                pszSheetNameRange: str | None = pszSheetStart or pszSheetEnd or pszCurrentSheet
-                pszStartCell: str = objNode[1].split("!", 1)[-1]
-                pszEndCell: str = objNode[2].split("!", 1)[-1]
-                return evaluate_range_project_list(
-                    pszSheetNameRange,
-                    pszStartCell,
-                    pszEndCell,
-                    pszCurrentSheet,
-                )
-            if objNode[0] == "func":
-                pszFuncName: str = objNode[1]
-                objArgsNodes: List[Any] = objNode[2]
-                objArgsValues: List[Any] = [
-                    evaluate_node_project_list(
-                        objArg,
+                    continue
+                if isinstance(objItem, WorkbookDuration):
+                    bDuration = True
+        if bDuration:
+            return WorkbookDuration(int(fTotal))
+        return fTotal
+    if pszFuncName in ["MAX", "MIN"]:
+        # 範囲内の数値 (文字列・空白は無視) の最大値・最小値。数値がなければ 0
+        objNumbers: List[Any] = []
+        for objArg in objArgsValues:
+            objItems = objArg if isinstance(objArg, list) else [objArg]
+            for objItem in objItems:
+                if isinstance(objItem, WorkbookFormulaError):
+                    return objItem
+                if isinstance(objItem, (int, float)) and not isinstance(objItem, bool):
+                    objNumbers.append(objItem)
+        if len(objNumbers) == 0:
+            return 0
+        return max(objNumbers) if pszFuncName == "MAX" else min(objNumbers)
+    if pszFuncName == "COUNT":
+        iCount: int = 0
+        for objArg in objArgsValues:
+            if isinstance(objArg, list):
+                for objItem in objArg:
+                    if objItem not in ["", None]:
+                        iCount += 1
+            else:
+                if objArg not in ["", None]:
+                    iCount += 1
+        return iCount
+    if pszFuncName == "TEXT":
+        return str(objArgsValues[0]) if len(objArgsValues) > 0 else ""
+    if pszFuncName == "CONCAT":
+        return "".join(str(objArg) for objArg in objArgsValues)
+    return ""
+
+
+def compile_formula_workbook(
+    objWorkbook: Dict[str, Any],
+    pszFormula: str,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+) -> Any:
+    # セル参照を現在のセルからの相対 (R1C1 形式) に置き換えたトークン列をキーとし、
+    # 同じテンプレートの数式 (行・列だけずれた数式) は 1 回だけ構文解析する。
+    objTokens: List[Tuple[str, Any]] = tokenize_formula_workbook(pszFormula)
+    for iIndex in range(len(objTokens) - 2):
+        if (
+            objTokens[iIndex][0] == "ident"
+            and objTokens[iIndex + 1] == ("symbol", ":")
+            and objTokens[iIndex + 2][0] == "ident"
+            and is_column_reference_workbook(objTokens[iIndex][1])
+            and is_column_reference_workbook(objTokens[iIndex + 2][1])
+        ) or (
+            objTokens[iIndex][0] in ["ident", "number"]
+            and objTokens[iIndex + 1] == ("symbol", ":")
+            and objTokens[iIndex + 2][0] in ["ident", "number"]
+            and is_row_reference_workbook(objTokens[iIndex][1])
+            and is_row_reference_workbook(objTokens[iIndex + 2][1])
+        ):
+            for iReferenceIndex in [iIndex, iIndex + 2]:
+                objTokens[iReferenceIndex] = (
+                    "ref",
+                    parse_cell_reference_workbook(
+                        objTokens[iReferenceIndex][1],
                         iCurrentRow,
                         iCurrentColumn,
-                        pszCurrentSheet,
-                    )
-                    for objArg in objArgsNodes
-                ]
-                if pszFuncName == "IF":
-                    bCondition: bool = bool(objArgsValues[0]) if len(objArgsValues) > 0 else False
-                    if bCondition:
-                        return objArgsValues[1] if len(objArgsValues) > 1 else ""
-                    return objArgsValues[2] if len(objArgsValues) > 2 else ""
-                if pszFuncName == "SUM":
-                    fTotal: float = 0.0
-                    for objArg in objArgsValues:
-                        if isinstance(objArg, list):
-                            for objItem in objArg:
-                                try:
-                                    fTotal += float(objItem)
-                                except Exception:
-                                    continue
-                        else:
-                            try:
-                                fTotal += float(objArg)
-                            except Exception:
-                                continue
-                    return fTotal
-                if pszFuncName == "COUNT":
-                    iCount: int = 0
-                    for objArg in objArgsValues:
-                        if isinstance(objArg, list):
-                            for objItem in objArg:
-                                if objItem not in ["", None]:
-                                    iCount += 1
-                        else:
-                            if objArg not in ["", None]:
-                                iCount += 1
-                    return iCount
-                if pszFuncName == "TEXT":
-                    return str(objArgsValues[0]) if len(objArgsValues) > 0 else ""
-                if pszFuncName == "CONCAT":
-                    return "".join(str(objArg) for objArg in objArgsValues)
-            return ""
+                    ),
+                )
+    for iIndex, (pszTokenType, pszToken) in enumerate(objTokens):
+        if pszTokenType != "ident" or not is_cell_reference_workbook(pszToken):
+            continue
+        if iIndex + 1 < len(objTokens) and objTokens[iIndex + 1] == ("symbol", "("):
+            continue
+        objTokens[iIndex] = (
+            "ref",
+            parse_cell_reference_workbook(pszToken, iCurrentRow, iCurrentColumn),
+        )
+    objTemplateKey: Tuple[Tuple[str, Any], ...] = tuple(objTokens)
+    objAst: Any = objWorkbook["TemplateAsts"].get(objTemplateKey)
+    if objWorkbook["Statistics"] is not None:
+        count_cache_access_workbook(objWorkbook, "TemplateAsts", objAst is not None)
+    if objAst is None:
+        objAst, _ = parse_expression_workbook(objTokens, 0)
+        objWorkbook["TemplateAsts"][objTemplateKey] = objAst
+    return objAst
+
+
+def evaluate_formula_workbook(
+    objWorkbook: Dict[str, Any],
+    pszFormula: str,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    objAst: Any = objWorkbook["CompiledCells"].get((pszCurrentSheet, iCurrentRow, iCurrentColumn))
+    if objAst is None:
+        objAst = compile_formula_workbook(objWorkbook, pszFormula, iCurrentRow, iCurrentColumn)
+    return evaluate_node_workbook(
+        objWorkbook,
+        objAst,
+        iCurrentRow,
+        iCurrentColumn,
+        pszCurrentSheet,
+    )
 
-        def evaluate_formula_project_list(
-            pszFormula: str,
-            iCurrentRow: int,
-            iCurrentColumn: int,
-            pszCurrentSheet: str,
-        ) -> Any:
-            objTokens = tokenize_formula_project_list(pszFormula)
-            objAst, _ = parse_expression_project_list(objTokens, 0)
-            return evaluate_node_project_list(
-                objAst,
+
+def evaluate_cell_by_sheet_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    iRow: int,
+    iColumn: int,
+    pszCurrentSheet: str,
+) -> Any:
+    if pszSheetName == pszWorkbookRawDataSheetName:
+        if (iRow < 0) or (iColumn < 0):
+            return ""
+        if iRow >= objWorkbook["RawDataShape"][0] or iColumn >= objWorkbook["RawDataShape"][1]:
+            return ""
+        return objWorkbook["RawDataColumns"][iColumn][iRow]
+    if pszSheetName not in objWorkbook["Sheets"]:
+        return ""
+    return evaluate_cell_workbook(objWorkbook, pszSheetName, iRow, iColumn)
+
+
+def evaluate_cell_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    iRow: int,
+    iColumn: int,
+) -> Any:
+    objKey: Tuple[str, int, int] = (pszSheetName, iRow, iColumn)
+    if objKey in objWorkbook["EvaluatedCells"]:
+        if objWorkbook["Statistics"] is not None:
+            count_cache_access_workbook(objWorkbook, "EvaluatedCells", True)
+        return objWorkbook["EvaluatedCells"][objKey]
+    if objKey in objWorkbook["EvaluatingCells"]:
+        raise WorkbookCircularReferenceError(
+            "Error: circular reference detected at {0}!R{1}C{2}".format(
+                pszSheetName,
+                iRow + 1,
+                iColumn + 1,
+            ),
+        )
+    if (iRow < 0) or (iColumn < 0):
+        return ""
+    objSheet: Dict[str, Any] = objWorkbook["Sheets"][pszSheetName]
+    if iRow >= objSheet["RowCount"] or iColumn >= objSheet["ColumnCount"]:
+        return ""
+    pszValueStr: str = objSheet["Cells"].get((iRow, iColumn), "")
+    if objWorkbook["Statistics"] is not None:
+        count_cache_access_workbook(objWorkbook, "EvaluatedCells", False)
+    if len(pszValueStr) > 0 and pszValueStr.startswith("="):
+        if objWorkbook["Statistics"] is not None:
+            objWorkbook["Statistics"]["EvaluatedCellCount"] += 1
+        pszFormula: str = pszValueStr[1:]
+        objWorkbook["EvaluatingCells"].add(objKey)
+        try:
+            objResult: Any = evaluate_formula_workbook(
+                objWorkbook,
+                pszFormula,
+                iRow,
+                iColumn,
+                pszSheetName,
+            )
+        finally:
+            objWorkbook["EvaluatingCells"].discard(objKey)
+        objWorkbook["EvaluatedCells"][objKey] = objResult
+        return objResult
+    objWorkbook["EvaluatedCells"][objKey] = pszValueStr
+    return pszValueStr
+
+
+def collect_formula_dependencies_workbook(
+    objWorkbook: Dict[str, Any],
+    objAst: Any,
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+    objFormulaCellSet: set[Tuple[int, int]],
+) -> set[Tuple[int, int]]:
+    # 構文木が参照する数式セル (同じ数式シート内) の一覧。
+    # 範囲はシートの大きさに収まる部分だけを調べ、INDEX の参照先になりうる範囲内のセルもすべて含める。
+    objDependencies: set[Tuple[int, int]] = set()
+    objStack: List[Any] = [objAst]
+    while len(objStack) > 0:
+        objNode: Any = objStack.pop()
+        if objNode[0] in ["cell", "range"]:
+            pszTargetSheet, iStartRow, iStartColumn, iEndRow, iEndColumn = resolve_range_workbook(
+                objNode,
                 iCurrentRow,
                 iCurrentColumn,
                 pszCurrentSheet,
             )
+            if pszTargetSheet != pszCurrentSheet:
+                continue
+            objSheet: Dict[str, Any] = objWorkbook["Sheets"][pszCurrentSheet]
+            for iRow in range(max(iStartRow, 0), min(iEndRow, objSheet["RowCount"] - 1) + 1):
+                for iColumn in range(max(iStartColumn, 0), min(iEndColumn, objSheet["ColumnCount"] - 1) + 1):
+                    if (iRow, iColumn) in objFormulaCellSet:
+                        objDependencies.add((iRow, iColumn))
+        elif objNode[0] == "unary":
+            objStack.append(objNode[2])
+        elif objNode[0] in ["op", "cmp"]:
+            objStack.append(objNode[2])
+            objStack.append(objNode[3])
+        elif objNode[0] == "func":
+            objStack.extend(objNode[2])
+    return objDependencies
+
+
+def is_vectorizable_sumifs_workbook(objAst: Any) -> bool:
+    # 合計範囲・条件範囲がすべて絶対参照の SUMIFS (同じテンプレートのセルで範囲が共通)
+    if objAst[0] != "func" or objAst[1] != "SUMIFS":
+        return False
+    objArgsNodes: List[Any] = objAst[2]
+    if len(objArgsNodes) < 3 or len(objArgsNodes) % 2 == 0:
+        return False
+    for objRangeNode in [objArgsNodes[0]] + objArgsNodes[1::2]:
+        if objRangeNode[0] not in ["range", "cell"]:
+            return False
+        for objReference in objRangeNode[1:]:
+            if objReference is not None and not (objReference[1] and objReference[3]):
+                return False
+    return True
 
-        def evaluate_cell_by_sheet_project_list(
-            pszSheetName: str,
-            iRow: int,
-            iColumn: int,
-            pszCurrentSheet: str,
-        ) -> Any:
-            if pszSheetName == "ローデータ":
-                if (iRow < 0) or (iColumn < 0):
-                    return ""
-                if iRow >= objRawDataSheetForProjectList.shape[0] or iColumn >= objRawDataSheetForProjectList.shape[1]:
-                    return ""
-                objValue = objRawDataSheetForProjectList.iat[iRow, iColumn]
-                return "" if pd.isna(objValue) else objValue
-            return evaluate_cell_project_list(pszSheetName, iRow, iColumn)
-
-        def evaluate_cell_project_list(
-            pszSheetName: str,
-            iRow: int,
-            iColumn: int,
-        ) -> Any:
-            objKey: Tuple[str, int, int] = (pszSheetName, iRow, iColumn)
-            if objKey in objEvaluatedCellsProjectList:
-                return objEvaluatedCellsProjectList[objKey]
-            if objKey in objEvaluatingCellsProjectList:
-                raise ProjectListCircularReferenceError(
-                    "Error: circular reference detected at {0}!R{1}C{2}".format(
-                        "プロジェクトリスト",
-                        iRow + 1,
-                        iColumn + 1,
-                    ),
-                )
-            if (iRow < 0) or (iColumn < 0):
-                return ""
-            if iRow >= objProjectListFormulaSheet.shape[0] or iColumn >= objProjectListFormulaSheet.shape[1]:
-                return ""
-            objValue = objProjectListFormulaSheet.iat[iRow, iColumn]
-            pszValueStr: str = "" if pd.isna(objValue) else str(objValue)
-            if len(pszValueStr) > 0 and pszValueStr.startswith("="):
-                pszFormula: str = pszValueStr[1:]
-                objEvaluatingCellsProjectList.add(objKey)
-                try:
-                    objResult: Any = evaluate_formula_project_list(
-                        pszFormula,
-                        iRow,
-                        iColumn,
-                        pszSheetName,
+
+def evaluate_sumifs_block_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objCells: List[Tuple[int, int]],
+    objAst: Any,
+) -> None:
+    # 同じテンプレートの SUMIFS セルをまとめて評価する。
+    # 各セルの条件値の比較キーを列にした DataFrame を、SUMIFS の集計インデックス
+    # (スカラー評価と共有) と 1 回の merge で突き合わせる。
+    # 比較演算子・ワイルドカードを含む条件や範囲の大きさが異なる場合など、
+    # 一括評価できないセルはスカラー評価 (evaluate_cell_workbook) で評価する。
+    # 評価済みのセル (永続キャッシュから前回の値を入れたセル) は除く。
+    objCells = [
+        objCell for objCell in objCells if (pszSheetName, objCell[0], objCell[1]) not in objWorkbook["EvaluatedCells"]
+    ]
+    if len(objCells) == 0:
+        return
+    objArgsNodes: List[Any] = objAst[2]
+    iFirstRow, iFirstColumn = objCells[0]
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...] = tuple(
+        resolve_range_workbook(objRangeNode, iFirstRow, iFirstColumn, pszSheetName)
+        for objRangeNode in [objArgsNodes[0]] + objArgsNodes[1::2]
+    )
+    objSizes: set[Tuple[int, int]] = {
+        (iEndRow - iStartRow, iEndColumn - iStartColumn)
+        for _, iStartRow, iStartColumn, iEndRow, iEndColumn in objRanges
+    }
+    objScalarCells: List[Tuple[int, int]] = list(objCells)
+    if len(objSizes) == 1:
+        try:
+            objTotals, bDuration = get_sumifs_index_workbook(objWorkbook, objRanges, pszSheetName)
+            objRegularCells: List[Tuple[int, int]] = []
+            objScalarCells = []
+            objKeyColumns: List[List[Tuple[str, Any]]] = [[] for _ in objArgsNodes[2::2]]
+            for iRow, iColumn in objCells:
+                objCriteria: List[Any] = [
+                    evaluate_node_workbook(objWorkbook, objCriterionNode, iRow, iColumn, pszSheetName)
+                    for objCriterionNode in objArgsNodes[2::2]
+                ]
+                if any(
+                    isinstance(objCriterion, list)
+                    or build_criteria_matcher_for_workbook(objCriterion) is not None
+                    for objCriterion in objCriteria
+                ):
+                    objScalarCells.append((iRow, iColumn))
+                    continue
+                objRegularCells.append((iRow, iColumn))
+                for objKeyColumn, objCriterion in zip(objKeyColumns, objCriteria):
+                    # 空のセルを条件にした場合は 0 として扱う (スカラー評価と同じ)
+                    objKeyColumn.append(
+                        build_lookup_key_for_workbook(objCriterion if objCriterion != "" else 0),
                     )
-                except ProjectListCircularReferenceError as objCircularError:
-                    with open(
-                        pszOutputTsvPath.replace(".tsv", "_error.tsv"),
-                        "w",
-                        encoding="utf-8",
-                    ) as objFile:
-                        objFile.write(str(objCircularError))
-                    raise
-                except Exception as objException:
-                    with open(
-                        pszOutputTsvPath.replace(".tsv", "_error.tsv"),
-                        "w",
-                        encoding="utf-8",
-                    ) as objFile:
-                        objFile.write(
-                            "Error: formula evaluation failed at {0}!R{1}C{2}: {3}".format(
-                                "プロジェクトリスト",
-                                iRow + 1,
-                                iColumn + 1,
-                                objException,
-                            )
-                        )
-                    raise
-                finally:
-                    objEvaluatingCellsProjectList.discard(objKey)
-                objEvaluatedCellsProjectList[objKey] = objResult
-                return objResult
-            objEvaluatedCellsProjectList[objKey] = pszValueStr
-            return pszValueStr
-
-        for iRowIndex in range(objProjectListFormulaSheet.shape[0]):
-            for iColumnIndex in range(objProjectListFormulaSheet.shape[1]):
-                objEvaluatedValueProjectList: Any = evaluate_cell_project_list(
-                    "プロジェクトリスト",
-                    iRowIndex,
-                    iColumnIndex,
+
+            objKeyNames: List[str] = [f"Key{iIndex}" for iIndex in range(len(objKeyColumns))]
+            objBlockFrame: pd.DataFrame = pd.DataFrame(
+                {pszKeyName: pd.Series(objKeyColumn, dtype=object) for pszKeyName, objKeyColumn in zip(objKeyNames, objKeyColumns)},
+            )
+            objTotalsFrame: pd.DataFrame = pd.DataFrame(
+                {
+                    **{
+                        pszKeyName: pd.Series([objKey[iIndex] for objKey in objTotals], dtype=object)
+                        for iIndex, pszKeyName in enumerate(objKeyNames)
+                    },
+                    "Total": pd.Series(list(objTotals.values()), dtype=object),
+                },
+            )
+            objMergedTotals: List[Any] = objBlockFrame.merge(
+                objTotalsFrame,
+                how="left",
+                on=objKeyNames,
+                sort=False,
+            )["Total"].tolist()
+            for (iRow, iColumn), objTotal in zip(objRegularCells, objMergedTotals):
+                if isinstance(objTotal, float) and pd.isna(objTotal):
+                    objTotal = 0
+                objWorkbook["EvaluatedCells"][(pszSheetName, iRow, iColumn)] = (
+                    WorkbookDuration(int(objTotal)) if bDuration else objTotal
                 )
-                objOutputProjectList.iat[iRowIndex, iColumnIndex] = objEvaluatedValueProjectList
+            if objWorkbook["Statistics"] is not None:
+                objWorkbook["Statistics"]["EvaluatedCellCount"] += len(objRegularCells)
+        except Exception:
+            # 一括評価に失敗した場合は、スカラー評価でエラーを出力させる
+            objScalarCells = [
+                objCell for objCell in objCells if (pszSheetName, objCell[0], objCell[1]) not in objWorkbook["EvaluatedCells"]
+            ]
+    for iRow, iColumn in objScalarCells:
+        evaluate_cell_workbook(objWorkbook, pszSheetName, iRow, iColumn)
 
-        objOutputProjectList.to_csv(
-            pszOutputTsvPath,
-            sep="\t",
-            header=False,
-            index=False,
-            encoding="utf-8",
-            lineterminator="\n",
+
+def build_formula_sheet_plan_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+) -> Dict[str, Any]:
+    # 数式セルの評価計画: 数式セルの一覧 (行優先)、セルごとの構文木と依存先の数式セル。
+    # 永続キャッシュから復元した計画があれば (数式シートが同じ内容の場合)、構文解析を省略する。
+    objPlan: Dict[str, Any] | None = objWorkbook["SheetPlans"].get(pszSheetName)
+    if objPlan is not None:
+        return objPlan
+    objFormulaCells: List[Tuple[int, int]] = sorted(collect_formula_cells_workbook(objWorkbook, pszSheetName))
+    objPlan = compile_formula_cells_workbook(
+        objWorkbook,
+        pszSheetName,
+        objFormulaCells,
+        set(objFormulaCells),
+    )
+    objWorkbook["SheetPlans"][pszSheetName] = objPlan
+    return objPlan
+
+
+def collect_formula_cells_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+) -> set[Tuple[int, int]]:
+    return {
+        objCell
+        for objCell, pszValue in objWorkbook["Sheets"][pszSheetName]["Cells"].items()
+        if pszValue.startswith("=")
+    }
+
+
+def compile_formula_cells_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objFormulaCells: List[Tuple[int, int]],
+    objFormulaCellSet: set[Tuple[int, int]],
+) -> Dict[str, Any]:
+    # objFormulaCells (行優先) の評価計画。依存先はシートのすべての数式セル (objFormulaCellSet) から探す
+    objSheetCells: Dict[Tuple[int, int], str] = objWorkbook["Sheets"][pszSheetName]["Cells"]
+    objCellAsts: Dict[Tuple[int, int], Any] = {}
+    objCellDependencies: Dict[Tuple[int, int], set[Tuple[int, int]]] = {}
+    for iRow, iColumn in objFormulaCells:
+        objAst: Any = compile_formula_workbook(
+            objWorkbook,
+            objSheetCells[(iRow, iColumn)][1:],
+            iRow,
+            iColumn,
         )
+        objCellAsts[(iRow, iColumn)] = objAst
+        objCellDependencies[(iRow, iColumn)] = collect_formula_dependencies_workbook(
+            objWorkbook,
+            objAst,
+            iRow,
+            iColumn,
+            pszSheetName,
+            objFormulaCellSet,
+        )
+    return {
+        "FormulaCells": objFormulaCells,
+        "CellAsts": objCellAsts,
+        "CellDependencies": objCellDependencies,
+    }
 
-        objCheckProjectList: pd.DataFrame = pd.read_csv(
-            pszOutputTsvPath,
-            sep="\t",
-            dtype=str,
-            encoding="utf-8",
-            header=None,
-            engine="python",
+
+def evaluate_formula_cells_in_dependency_order_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objPlan: Dict[str, Any] | None = None,
+) -> None:
+    # 数式セルの依存グラフを作り、参照先が先になる順 (トポロジカル順) に反復で評価する。
+    # 各セルの評価時には参照先が評価済みのため、再帰は 1 段で終わる。
+    # 同じテンプレートの SUMIFS セルは 1 つの単位 (ブロック) として一括評価する。
+    # 循環参照に含まれる (または循環参照に依存する) セルはここでは評価せず、
+    # 従来どおり行優先の再帰評価で循環参照のエラーを出力させる。
+    # objPlan を渡した場合は、その計画の数式セルだけを評価する
+    # (依存先は計画内のセルに限ること。並列評価で見出し行・行の範囲ごとに使う)。
+    if objPlan is None:
+        objPlan = build_formula_sheet_plan_workbook(objWorkbook, pszSheetName)
+    objFormulaCells: List[Tuple[int, int]] = objPlan["FormulaCells"]
+    objCellDependencies: Dict[Tuple[int, int], set[Tuple[int, int]]] = objPlan["CellDependencies"]
+    objBlockCellsByTemplate: Dict[int, List[Tuple[int, int]]] = {}
+    for iRow, iColumn in objFormulaCells:
+        objAst: Any = objPlan["CellAsts"][(iRow, iColumn)]
+        objWorkbook["CompiledCells"][(pszSheetName, iRow, iColumn)] = objAst
+        if is_vectorizable_sumifs_workbook(objAst):
+            # 同じテンプレートの構文木は同じオブジェクトのため、id でまとめる
+            objBlockCellsByTemplate.setdefault(id(objAst), []).append((iRow, iColumn))
+
+    # 評価の単位: 一括評価するブロック (ブロック内で参照し合わないもの) と、それ以外の 1 セル
+    objUnits: List[List[Tuple[int, int]]] = []
+    objBlockedCells: set[Tuple[int, int]] = set()
+    for objBlockCells in objBlockCellsByTemplate.values():
+        objBlockCellSet: set[Tuple[int, int]] = set(objBlockCells)
+        if len(objBlockCells) < 2 or any(
+            len(objCellDependencies[objCell] & objBlockCellSet) > 0 for objCell in objBlockCells
+        ):
+            continue
+        objUnits.append(objBlockCells)
+        objBlockedCells |= objBlockCellSet
+    objUnits.extend([objCell] for objCell in objFormulaCells if objCell not in objBlockedCells)
+    objUnits.sort(key=lambda objUnitCells: objUnitCells[0])
+    objUnitIndexByCell: Dict[Tuple[int, int], int] = {
+        objCell: iUnitIndex for iUnitIndex, objUnitCells in enumerate(objUnits) for objCell in objUnitCells
+    }
+
+    # 前回の評価結果 (永続キャッシュ) があれば、Raw_Data の変更の影響を受けるセルだけを評価し直す
+    if pszSheetName in objWorkbook["CachedCellValues"]:
+        refresh_cells_from_cache_workbook(objWorkbook, pszSheetName, objPlan)
+
+    objDependents: Dict[int, List[int]] = {}
+    objInDegrees: List[int] = []
+    for iUnitIndex, objUnitCells in enumerate(objUnits):
+        objDependencyUnits: set[int] = {
+            objUnitIndexByCell[objDependency]
+            for objCell in objUnitCells
+            for objDependency in objCellDependencies[objCell]
+        }
+        objInDegrees.append(len(objDependencyUnits))
+        for iDependencyUnitIndex in objDependencyUnits:
+            objDependents.setdefault(iDependencyUnitIndex, []).append(iUnitIndex)
+
+    objReadyUnits: List[int] = [
+        iUnitIndex for iUnitIndex in range(len(objUnits)) if objInDegrees[iUnitIndex] == 0
+    ]
+    # 計測時の依存関係の深さ (参照先のない単位を 1 とする)
+    objStatistics: Dict[str, Any] | None = objWorkbook["Statistics"]
+    objDepths: List[int] = [1] * len(objUnits)
+    iReadyIndex: int = 0
+    while iReadyIndex < len(objReadyUnits):
+        iUnitIndex = objReadyUnits[iReadyIndex]
+        iReadyIndex += 1
+        objUnitCells = objUnits[iUnitIndex]
+        if len(objUnitCells) == 1:
+            evaluate_cell_workbook(objWorkbook, pszSheetName, objUnitCells[0][0], objUnitCells[0][1])
+        elif objStatistics is None:
+            evaluate_sumifs_block_workbook(
+                objWorkbook,
+                pszSheetName,
+                objUnitCells,
+                objWorkbook["CompiledCells"][(pszSheetName, objUnitCells[0][0], objUnitCells[0][1])],
+            )
+        else:
+            fStartTime: float = time.perf_counter()
+            evaluate_sumifs_block_workbook(
+                objWorkbook,
+                pszSheetName,
+                objUnitCells,
+                objWorkbook["CompiledCells"][(pszSheetName, objUnitCells[0][0], objUnitCells[0][1])],
+            )
+            record_function_call_workbook(objWorkbook, "SUMIFS(block)", time.perf_counter() - fStartTime)
+        if objStatistics is not None:
+            objStatistics["MaxDependencyDepth"] = max(objStatistics["MaxDependencyDepth"], objDepths[iUnitIndex])
+        for iDependentUnitIndex in objDependents.get(iUnitIndex, []):
+            objDepths[iDependentUnitIndex] = max(objDepths[iDependentUnitIndex], objDepths[iUnitIndex] + 1)
+            objInDegrees[iDependentUnitIndex] -= 1
+            if objInDegrees[iDependentUnitIndex] == 0:
+                objReadyUnits.append(iDependentUnitIndex)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 数式シートのセルを評価し、出力用の行リストを返す関数。
+# 数式セルを依存関係の順に評価した後、行優先で全セルの値を出力用の形式に変換する
+# (循環参照に含まれるセルは、この行優先の評価で循環参照のエラーになる)。
+# objExecutor を渡した場合は、3 行目以降を行の範囲ごとにプロセスプールで評価する
+# (evaluate_formula_sheet_rows_in_parallel_workbook)。範囲に分けられないシートや、
+# 永続キャッシュから前回の値を復元したシートは、従来どおり 1 プロセスで評価する。
+#
+# ///////////////////////////////////////////////////////////////
+def evaluate_formula_sheet_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objExecutor: ProcessPoolExecutor | None = None,
+    iJobs: int = 1,
+) -> List[List[Any]]:
+    if objExecutor is not None and iJobs > 1 and pszSheetName not in objWorkbook["CachedCellValues"]:
+        objParallelOutputRows: List[List[Any]] | None = evaluate_formula_sheet_rows_in_parallel_workbook(
+            objWorkbook,
+            pszSheetName,
+            objExecutor,
+            iJobs,
         )
-        bHasFormulaCell: bool = False
-        for iRowIndex in range(1, objCheckProjectList.shape[0]):
-            for iColumnIndex in range(objCheckProjectList.shape[1]):
-                objValue = objCheckProjectList.iat[iRowIndex, iColumnIndex]
-                if isinstance(objValue, str) and objValue.startswith("="):
-                    bHasFormulaCell = True
-                    break
-            if bHasFormulaCell:
-                break
-        if bHasFormulaCell:
-            if os.path.isfile(pszOutputTsvPath):
-                os.remove(pszOutputTsvPath)
-            with open(
-                pszOutputTsvPath.replace(".tsv", "_error.tsv"),
-                "w",
-                encoding="utf-8",
-            ) as objFile:
-                objFile.write(
-                    "Error: Project_List.tsv still contains formula cells starting with '='."
-                )
-    except Exception as objException:
-        if os.path.isfile(pszOutputTsvPath):
-            os.remove(pszOutputTsvPath)
-        with open(
-            pszOutputTsvPath.replace(".tsv", "_error.tsv"),
-            "w",
-            encoding="utf-8",
-        ) as objFile:
-            objFile.write(
-                "Error: unexpected exception. Detail = {0}".format(
-                    objException,
+        if objParallelOutputRows is not None:
+            return objParallelOutputRows
+    evaluate_formula_cells_in_dependency_order_workbook(objWorkbook, pszSheetName)
+    return format_formula_sheet_rows_workbook(
+        objWorkbook,
+        pszSheetName,
+        0,
+        objWorkbook["Sheets"][pszSheetName]["RowCount"],
+    )
+
+
+def format_formula_sheet_rows_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    iStartRow: int,
+    iEndRow: int,
+) -> List[List[Any]]:
+    # iStartRow 行目から iEndRow 行目の手前までのセルを、行優先で出力用の形式に変換する (0 始まり)
+    objSheet: Dict[str, Any] = objWorkbook["Sheets"][pszSheetName]
+    objOutputRows: List[List[Any]] = []
+    for iRowIndex in range(iStartRow, iEndRow):
+        objOutputRows.append(
+            [
+                format_formula_value_for_workbook(
+                    evaluate_cell_workbook(objWorkbook, pszSheetName, iRowIndex, iColumnIndex),
                 )
-            )
+                for iColumnIndex in range(objSheet["ColumnCount"])
+            ]
+        )
+    return objOutputRows
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 数式シートの 3 行目以降を、行の範囲ごとにプロセスプールで評価する関数。
+#   1) 見出し行 (1〜2 行目) の数式セルをこのプロセスで評価する
+#   2) 3 行目の SUMIFS のうち Raw_Data だけを参照するものについて、
+#      範囲ごとに共通して使う集計インデックスを作成しておく
+#   3) 3 行目以降を iJobs 個の連続した行の範囲に分け、範囲内の数式セルの構文解析と評価を
+#      ワーカーで行う (ワーカーには Raw_Data・評価済みのセル・集計インデックスの複製を渡す)
+#   4) 範囲ごとの評価結果を入力順に評価済みのセルに加え、ワーカーで評価しなかったセル
+#      (別の範囲のセルを参照する合計行などと、それに依存するセル) をこのプロセスで評価してから、
+#      全セルを行優先で出力する
+# 見出し行が 3 行目以降を参照する場合は範囲に分けられないため、何もせずに None を返す。
+# ワーカーで例外が発生した場合も None を返し、呼び出し側で 1 プロセスの評価に戻す
+# (エラーの内容を 1 プロセスで評価した場合と一致させるため)。
+# 循環参照に含まれるセルはどの段階でも評価せず、最後の行優先の出力で循環参照のエラーになる。
+#
+# ///////////////////////////////////////////////////////////////
+def evaluate_formula_sheet_rows_in_parallel_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objExecutor: ProcessPoolExecutor,
+    iJobs: int,
+) -> List[List[Any]] | None:
+    iRowCount: int = objWorkbook["Sheets"][pszSheetName]["RowCount"]
+    iDataRowCount: int = iRowCount - iWorkbookHeaderRowCount
+    if iDataRowCount < 2:
+        return None
+    objFormulaCellSet: set[Tuple[int, int]] = collect_formula_cells_workbook(objWorkbook, pszSheetName)
+
+    # 1) 見出し行 (依存先は見出し行のセルだけ)
+    objHeaderPlan: Dict[str, Any] = compile_formula_cells_workbook(
+        objWorkbook,
+        pszSheetName,
+        sorted(objCell for objCell in objFormulaCellSet if objCell[0] < iWorkbookHeaderRowCount),
+        objFormulaCellSet,
+    )
+    if any(
+        objDependency[0] >= iWorkbookHeaderRowCount
+        for objDependencies in objHeaderPlan["CellDependencies"].values()
+        for objDependency in objDependencies
+    ):
+        return None
+    evaluate_formula_cells_in_dependency_order_workbook(objWorkbook, pszSheetName, objHeaderPlan)
+
+    # 2) 3 行目の Raw_Data だけを参照する SUMIFS の集計インデックス (テンプレートごとに 1 つ)
+    objFirstDataRowPlan: Dict[str, Any] = compile_formula_cells_workbook(
+        objWorkbook,
+        pszSheetName,
+        sorted(objCell for objCell in objFormulaCellSet if objCell[0] == iWorkbookHeaderRowCount),
+        objFormulaCellSet,
+    )
+    objPreparedTemplates: set[int] = set()
+    for (iRow, iColumn), objAst in objFirstDataRowPlan["CellAsts"].items():
+        if id(objAst) in objPreparedTemplates or not is_vectorizable_sumifs_workbook(objAst):
+            continue
+        objPreparedTemplates.add(id(objAst))
+        objRanges: Tuple[Tuple[str, int, int, int, int], ...] = tuple(
+            resolve_range_workbook(objRangeNode, iRow, iColumn, pszSheetName)
+            for objRangeNode in [objAst[2][0]] + objAst[2][1::2]
+        )
+        if all(objRange[0] == pszWorkbookRawDataSheetName for objRange in objRanges):
+            get_sumifs_index_workbook(objWorkbook, objRanges, pszSheetName)
+
+    # 3) 行の範囲ごとの評価
+    iChunkCount: int = min(iJobs, iDataRowCount)
+    objChunkStartRows: List[int] = [
+        iWorkbookHeaderRowCount + (iDataRowCount * iChunkIndex) // iChunkCount
+        for iChunkIndex in range(iChunkCount + 1)
+    ]
+    objSnapshot: Dict[str, Any] = {
+        pszKey: objWorkbook[pszKey]
+        for pszKey in [
+            "RawDataColumns",
+            "RawDataShape",
+            "Sheets",
+            "EvaluatedCells",
+            "SumIfsIndex",
+            "MatchIndex",
+            "TemplateAsts",
+        ]
+    }
+    bStatistics: bool = objWorkbook["Statistics"] is not None
+    objFutures: List[Future] = [
+        objExecutor.submit(
+            evaluate_formula_sheet_rows_in_worker,
+            objSnapshot,
+            pszSheetName,
+            objChunkStartRows[iChunkIndex],
+            objChunkStartRows[iChunkIndex + 1],
+            bStatistics,
+        )
+        for iChunkIndex in range(iChunkCount)
+    ]
+
+    # 4) 入力順に結果を集め、残りのセルを評価してから出力する
+    objResults: List[Tuple[bool, Dict[Tuple[str, int, int], Any], Dict[str, Any], Dict[str, Any] | None]] = [
+        objFuture.result() for objFuture in objFutures
+    ]
+    if not all(objResult[0] for objResult in objResults):
+        return None
+    objRemainingPlan: Dict[str, Any] = {"FormulaCells": [], "CellAsts": {}, "CellDependencies": {}}
+    for _, objChunkValues, objChunkRemainingPlan, objChunkStatistics in objResults:
+        objWorkbook["EvaluatedCells"].update(objChunkValues)
+        objRemainingPlan["FormulaCells"].extend(objChunkRemainingPlan["FormulaCells"])
+        objRemainingPlan["CellAsts"].update(objChunkRemainingPlan["CellAsts"])
+        objRemainingPlan["CellDependencies"].update(objChunkRemainingPlan["CellDependencies"])
+        if objChunkStatistics is not None:
+            merge_workbook_statistics(objWorkbook, objChunkStatistics)
+    # 依存先は、ワーカーで評価しなかったセルだけに絞る (それ以外は評価済み)
+    objRemainingCellSet: set[Tuple[int, int]] = set(objRemainingPlan["FormulaCells"])
+    for objCell in objRemainingPlan["FormulaCells"]:
+        objRemainingPlan["CellDependencies"][objCell] &= objRemainingCellSet
+    evaluate_formula_cells_in_dependency_order_workbook(objWorkbook, pszSheetName, objRemainingPlan)
+    return format_formula_sheet_rows_workbook(objWorkbook, pszSheetName, 0, iRowCount)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ワーカーで数式シートの行の範囲 (iStartRow 行目から iEndRow 行目の手前まで) の数式セルを評価する関数。
+# 範囲外の 3 行目以降のセルを参照するセルと、それに (直接・間接に) 依存するセルは評価せず、
+# 構文解析した評価計画を返す (呼び出し側で構文解析をやり直さないため)。
+# 戻り値: (成功したか, 評価した数式セルの評価結果, 評価しなかった数式セルの評価計画, 計測結果)
+# 循環参照に含まれるセルは評価結果から除く。例外が発生した場合は、成功しなかったものとして返す。
+#
+# ///////////////////////////////////////////////////////////////
+def evaluate_formula_sheet_rows_in_worker(
+    objSnapshot: Dict[str, Any],
+    pszSheetName: str,
+    iStartRow: int,
+    iEndRow: int,
+    bStatistics: bool,
+) -> Tuple[bool, Dict[Tuple[str, int, int], Any], Dict[str, Any], Dict[str, Any] | None]:
+    objWorkbook: Dict[str, Any] = build_formula_workbook(
+        objSnapshot["RawDataColumns"],
+        objSnapshot["RawDataShape"],
+        [],
+    )
+    for pszKey in ["Sheets", "EvaluatedCells", "SumIfsIndex", "MatchIndex", "TemplateAsts"]:
+        objWorkbook[pszKey] = objSnapshot[pszKey]
+    if bStatistics:
+        enable_workbook_statistics(objWorkbook)
+    try:
+        objFormulaCellSet: set[Tuple[int, int]] = collect_formula_cells_workbook(objWorkbook, pszSheetName)
+        objPlan: Dict[str, Any] = compile_formula_cells_workbook(
+            objWorkbook,
+            pszSheetName,
+            sorted(objCell for objCell in objFormulaCellSet if iStartRow <= objCell[0] < iEndRow),
+            objFormulaCellSet,
+        )
+        # 範囲外のセルを参照するセルと、それに依存する範囲内のセルを除く
+        # (範囲内のセルに依存する範囲外のセルは、範囲外のセルを参照するため除かれる)
+        objDependentCells: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        objRemainingCellSet: set[Tuple[int, int]] = set()
+        for objCell in objPlan["FormulaCells"]:
+            objDependencies: set[Tuple[int, int]] = {
+                objDependency
+                for objDependency in objPlan["CellDependencies"][objCell]
+                if objDependency[0] >= iWorkbookHeaderRowCount
+            }
+            objPlan["CellDependencies"][objCell] = objDependencies
+            for objDependency in objDependencies:
+                if iStartRow <= objDependency[0] < iEndRow:
+                    objDependentCells.setdefault(objDependency, []).append(objCell)
+                else:
+                    objRemainingCellSet.add(objCell)
+        objRemainingStack: List[Tuple[int, int]] = list(objRemainingCellSet)
+        while len(objRemainingStack) > 0:
+            for objDependentCell in objDependentCells.get(objRemainingStack.pop(), []):
+                if objDependentCell not in objRemainingCellSet:
+                    objRemainingCellSet.add(objDependentCell)
+                    objRemainingStack.append(objDependentCell)
+        objRemainingCells: List[Tuple[int, int]] = [
+            objCell for objCell in objPlan["FormulaCells"] if objCell in objRemainingCellSet
+        ]
+        objRemainingPlan: Dict[str, Any] = {
+            "FormulaCells": objRemainingCells,
+            "CellAsts": {objCell: objPlan["CellAsts"][objCell] for objCell in objRemainingCells},
+            "CellDependencies": {objCell: objPlan["CellDependencies"][objCell] for objCell in objRemainingCells},
+        }
+        objPlan["FormulaCells"] = [
+            objCell for objCell in objPlan["FormulaCells"] if objCell not in objRemainingCellSet
+        ]
+        evaluate_formula_cells_in_dependency_order_workbook(objWorkbook, pszSheetName, objPlan)
+    except Exception:
+        return (False, {}, {}, None)
+    objValues: Dict[Tuple[str, int, int], Any] = {}
+    for iRow, iColumn in objPlan["FormulaCells"]:
+        objKey: Tuple[str, int, int] = (pszSheetName, iRow, iColumn)
+        if objKey in objWorkbook["EvaluatedCells"]:
+            objValues[objKey] = objWorkbook["EvaluatedCells"][objKey]
+    return (True, objValues, objRemainingPlan, objWorkbook["Statistics"])
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 数式シートの評価に失敗した場合に、出力 TSV を削除してエラーファイルを出力する関数
+#
+# ///////////////////////////////////////////////////////////////
+def write_formula_sheet_error_workbook(
+    pszOutputTsvPath: str,
+    pszErrorMessage: str,
+) -> None:
+    if os.path.isfile(pszOutputTsvPath):
+        os.remove(pszOutputTsvPath)
+    with open(
+        pszOutputTsvPath.replace(".tsv", "_error.tsv"),
+        "w",
+        encoding="utf-8",
+    ) as objFile:
+        objFile.write(pszErrorMessage)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 数式ワークブックの永続キャッシュ
+#
+# 数式セルの評価結果、数式セルの評価計画 (構文木・依存先)、Raw_Data の列に対する SUMIFS の集計
+# (条件値の組ごとの合計と、合計した行の条件値の組) を temp/formula_workbook_cache/ 以下に
+# marshal で保存する。数式シートと本ファイルの SHA-256 が前回と同じ場合に再利用する。
+#   ◇ Raw_Data.tsv の SHA-256 も同じ場合は、すべての数式セルに前回の値を使う
+#   ◇ Raw_Data.tsv だけが異なる場合は、変更された行が属する条件値の組の合計だけを計算し直し、
+#     その影響を受けるセル (と Raw_Data を直接参照するセル) だけを評価し直す。
+#     評価し直した値が前回と同じセルの参照元は、評価し直さない
+# キャッシュの読み書きに失敗した場合は、通常どおりすべてのセルを評価する。
+#
+# ///////////////////////////////////////////////////////////////
+def encode_cell_value_for_cache_workbook(objValue: Any) -> Tuple[str, Any]:
+    # marshal は int / str の派生クラスを保存できないため、種別を付けた値にする
+    if isinstance(objValue, WorkbookDuration):
+        return ("duration", int(objValue))
+    if isinstance(objValue, WorkbookFormulaError):
+        return ("error", str(objValue))
+    if isinstance(objValue, list):
+        return ("list", [encode_cell_value_for_cache_workbook(objItem) for objItem in objValue])
+    return ("value", objValue)
+
+
+def decode_cell_value_for_cache_workbook(objEncodedValue: Tuple[str, Any]) -> Any:
+    pszKind, objValue = objEncodedValue
+    if pszKind == "duration":
+        return WorkbookDuration(objValue)
+    if pszKind == "error":
+        return WorkbookFormulaError(objValue)
+    if pszKind == "list":
+        return [decode_cell_value_for_cache_workbook(objItem) for objItem in objValue]
+    return objValue
+
+
+def build_formula_workbook_cache_path(
+    objFormulaSheetSpecs: List[Tuple[str, str, str]],
+) -> str:
+    # シート名と数式シートのフルパスの組ごとに 1 ファイルとする
+    pszSpecText: str = "\n".join(
+        "{0}\t{1}".format(pszSheetName, os.path.abspath(pszFormulaTsvPath))
+        for pszSheetName, pszFormulaTsvPath, _ in objFormulaSheetSpecs
+    )
+    pszSpecHash: str = hashlib.sha256(pszSpecText.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "temp",
+        "formula_workbook_cache",
+        f"workbook_{pszSpecHash}.bin",
+    )
+
+
+def build_formula_workbook_cache_key(
+    objFormulaSheetSpecs: List[Tuple[str, str, str]],
+) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    # 本ファイルの SHA-256 と、シートごとの (シート名, 数式シートの SHA-256)
+    if "code_version" not in objCodeVersionCache:
+        objCodeVersionCache["code_version"] = compute_file_sha256(os.path.abspath(__file__))
+    return (
+        objCodeVersionCache["code_version"],
+        tuple(
+            (pszSheetName, compute_file_sha256(pszFormulaTsvPath))
+            for pszSheetName, pszFormulaTsvPath, _ in objFormulaSheetSpecs
+        ),
+    )
+
+
+def read_formula_workbook_cache(
+    pszCachePath: str,
+) -> Dict[str, Any] | None:
+    objMagicNumberBytes: bytes = importlib.util.MAGIC_NUMBER
+    try:
+        with open(pszCachePath, mode="rb") as objCacheFile:
+            objCacheBytes: bytes = objCacheFile.read()
+        if not objCacheBytes.startswith(objMagicNumberBytes):
+            return None
+        objRecord: Any = marshal.loads(objCacheBytes[len(objMagicNumberBytes) :])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(objRecord, dict):
+        return None
+    return objRecord
+
+
+def write_formula_workbook_cache(
+    pszCachePath: str,
+    objRecord: Dict[str, Any],
+) -> None:
+    try:
+        os.makedirs(os.path.dirname(pszCachePath), exist_ok=True)
+        pszTemporaryPath: str = f"{pszCachePath}.{os.getpid()}.tmp"
+        with open(pszTemporaryPath, mode="wb") as objCacheFile:
+            objCacheFile.write(importlib.util.MAGIC_NUMBER + marshal.dumps(objRecord))
+        os.replace(pszTemporaryPath, pszCachePath)
+    except (OSError, ValueError):
+        pass
+
+
+def is_incremental_sumifs_ranges_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+) -> bool:
+    # 集計を行単位で更新できる SUMIFS の範囲
+    # (すべて Raw_Data の 1 列で、開始行・終了行が同じもの)
+    iStartRow: int = objRanges[0][1]
+    iEndRow: int = objRanges[0][3]
+    return iStartRow >= 0 and all(
+        pszSheet == pszWorkbookRawDataSheetName
+        and iRangeStartRow == iStartRow
+        and iRangeEndRow == iEndRow
+        and iStartColumn == iEndColumn
+        and 0 <= iStartColumn < objWorkbook["RawDataShape"][1]
+        for pszSheet, iRangeStartRow, iStartColumn, iRangeEndRow, iEndColumn in objRanges
+    )
+
+
+def build_sumifs_row_entry_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+    iRow: int,
+) -> Tuple[Any, Tuple[Tuple[str, Any], ...]] | None:
+    # Raw_Data の 1 行の (合計する値, 条件値の比較キーの組)。合計しない行は None
+    # (build_sumifs_index_workbook と同じく、数値・時間以外の値は合計しない)
+    if iRow >= objWorkbook["RawDataShape"][0]:
+        return None
+    objRawDataColumns: List[List[Any]] = objWorkbook["RawDataColumns"]
+    objValue: Any = objRawDataColumns[objRanges[0][2]][iRow]
+    if isinstance(objValue, bool) or not isinstance(objValue, (int, float)):
+        return None
+    return objValue, tuple(
+        build_lookup_key_for_workbook(objRawDataColumns[iColumn][iRow])
+        for _, _, iColumn, _, _ in objRanges[1:]
+    )
+
+
+def build_sumifs_aggregate_for_cache_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+    objTotals: Dict[Tuple[Tuple[str, Any], ...], Any],
+) -> Dict[str, Any]:
+    # 保存する SUMIFS の集計: 条件値の組ごとの合計、合計した行 (範囲内の位置) の条件値の組、
+    # 時間の値を持つ行の位置
+    iStartRow: int = objRanges[0][1]
+    iEndRow: int = min(objRanges[0][3], objWorkbook["RawDataShape"][0] - 1)
+    objOffsetKeys: Dict[int, Tuple[Tuple[str, Any], ...]] = {}
+    objDurationOffsets: set[int] = set()
+    for iRow in range(iStartRow, iEndRow + 1):
+        objEntry = build_sumifs_row_entry_workbook(objWorkbook, objRanges, iRow)
+        if objEntry is None:
+            continue
+        objOffsetKeys[iRow - iStartRow] = objEntry[1]
+        if isinstance(objEntry[0], WorkbookDuration):
+            objDurationOffsets.add(iRow - iStartRow)
+    return {
+        "Totals": dict(objTotals),
+        "OffsetKeys": objOffsetKeys,
+        "DurationOffsets": objDurationOffsets,
+    }
+
+
+def update_sumifs_aggregate_workbook(
+    objWorkbook: Dict[str, Any],
+    objRanges: Tuple[Tuple[str, int, int, int, int], ...],
+    objAggregate: Dict[str, Any],
+    objChangedRows: List[int],
+) -> set[Tuple[Tuple[str, Any], ...]] | None:
+    # 変更された行について、属する条件値の組を付け替え、影響を受ける組の合計だけを計算し直す。
+    # 集計インデックス (SumIfsIndex) に登録し、値が変わりうる条件値の組の set を返す
+    # (時間の合計かどうかが変わった場合は、すべての組が変わりうるため None を返す)。
+    iStartRow: int = objRanges[0][1]
+    iEndRow: int = objRanges[0][3]
+    objTotals: Dict[Tuple[Tuple[str, Any], ...], Any] = objAggregate["Totals"]
+    objOffsetKeys: Dict[int, Tuple[Tuple[str, Any], ...]] = objAggregate["OffsetKeys"]
+    objDurationOffsets: set[int] = objAggregate["DurationOffsets"]
+    bOldDuration: bool = len(objDurationOffsets) > 0
+
+    objChangedKeys: set[Tuple[Tuple[str, Any], ...]] = set()
+    for iRow in objChangedRows:
+        if iRow < iStartRow or iRow > iEndRow:
+            continue
+        iOffset: int = iRow - iStartRow
+        objOldKey = objOffsetKeys.pop(iOffset, None)
+        if objOldKey is not None:
+            objChangedKeys.add(objOldKey)
+        objDurationOffsets.discard(iOffset)
+        objEntry = build_sumifs_row_entry_workbook(objWorkbook, objRanges, iRow)
+        if objEntry is None:
+            continue
+        objOffsetKeys[iOffset] = objEntry[1]
+        objChangedKeys.add(objEntry[1])
+        if isinstance(objEntry[0], WorkbookDuration):
+            objDurationOffsets.add(iOffset)
+
+    # 合計の順序 (範囲内の位置の順) は build_sumifs_index_workbook と同じにする
+    for objKey in objChangedKeys:
+        objTotals.pop(objKey, None)
+    objRawDataColumns: List[List[Any]] = objWorkbook["RawDataColumns"]
+    for iOffset in sorted(objOffsetKeys):
+        objKey = objOffsetKeys[iOffset]
+        if objKey in objChangedKeys:
+            objTotals[objKey] = objTotals.get(objKey, 0) + objRawDataColumns[objRanges[0][2]][iStartRow + iOffset]
+
+    bDuration: bool = len(objDurationOffsets) > 0
+    objWorkbook["SumIfsIndex"][objRanges] = (objTotals, bDuration)
+    if bDuration != bOldDuration:
+        return None
+    return objChangedKeys
+
+
+def restore_formula_workbook_cache(
+    objWorkbook: Dict[str, Any],
+    objRecord: Dict[str, Any],
+    pszRawDataHash: str,
+) -> bool:
+    # 前回の評価計画・評価結果をワークブックに登録する。
+    # Raw_Data.tsv が同じ場合は全数式セルに前回の値を入れて True を返す。
+    objSheetPlans: Dict[str, Dict[str, Any]] = {}
+    objCachedCellValues: Dict[str, Dict[Tuple[int, int], Any]] = {}
+    for pszSheetName, objSheetRecord in objRecord["Sheets"].items():
+        objTemplates: List[Any] = objSheetRecord["Templates"]
+        objCellAsts: Dict[Tuple[int, int], Any] = {
+            objCell: objTemplates[iTemplateIndex]
+            for objCell, iTemplateIndex in objSheetRecord["CellTemplates"].items()
+        }
+        objSheetPlans[pszSheetName] = {
+            "FormulaCells": sorted(objCellAsts),
+            "CellAsts": objCellAsts,
+            "CellDependencies": objSheetRecord["CellDependencies"],
+        }
+        objCachedCellValues[pszSheetName] = {
+            objCell: decode_cell_value_for_cache_workbook(objEncodedValue)
+            for objCell, objEncodedValue in objSheetRecord["Values"].items()
+        }
+    objWorkbook["SheetPlans"].update(objSheetPlans)
+
+    if objRecord["RawDataHash"] == pszRawDataHash:
+        for pszSheetName, objCellValues in objCachedCellValues.items():
+            for (iRow, iColumn), objValue in objCellValues.items():
+                objWorkbook["EvaluatedCells"][(pszSheetName, iRow, iColumn)] = objValue
+            objWorkbook["AffectedCells"][pszSheetName] = set()
+        return True
+
+    # 列数が変わった場合は、評価計画だけを使ってすべてのセルを評価する
+    if tuple(objRecord["RawDataShape"])[1] != objWorkbook["RawDataShape"][1]:
+        return False
+    objOldRows: List[Tuple[str, ...]] = objRecord["RawDataRows"]
+    objNewRows: List[Tuple[str, ...]] = objWorkbook["RawDataRows"]
+    objChangedRows: List[int] = [
+        iRow
+        for iRow in range(max(len(objOldRows), len(objNewRows)))
+        if iRow >= len(objOldRows) or iRow >= len(objNewRows) or objOldRows[iRow] != objNewRows[iRow]
+    ]
+    for objRanges, objAggregate in objRecord["SumIfsAggregates"].items():
+        objWorkbook["ChangedSumIfsKeys"][objRanges] = update_sumifs_aggregate_workbook(
+            objWorkbook,
+            objRanges,
+            objAggregate,
+            objChangedRows,
+        )
+    objWorkbook["CachedCellValues"].update(objCachedCellValues)
+    return False
+
+
+def collect_referenced_sheets_workbook(
+    objNodes: List[Any],
+    iCurrentRow: int,
+    iCurrentColumn: int,
+    pszCurrentSheet: str,
+) -> set[str]:
+    # 構文木が参照するシート名の一覧
+    objSheetNames: set[str] = set()
+    objStack: List[Any] = list(objNodes)
+    while len(objStack) > 0:
+        objNode: Any = objStack.pop()
+        if objNode[0] in ["cell", "range"]:
+            objSheetNames.add(resolve_range_workbook(objNode, iCurrentRow, iCurrentColumn, pszCurrentSheet)[0])
+        elif objNode[0] == "unary":
+            objStack.append(objNode[2])
+        elif objNode[0] in ["op", "cmp"]:
+            objStack.append(objNode[2])
+            objStack.append(objNode[3])
+        elif objNode[0] == "func":
+            objStack.extend(objNode[2])
+    return objSheetNames
+
+
+def is_cell_affected_by_raw_data_change_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    iRow: int,
+    iColumn: int,
+    objAst: Any,
+    objTemplateInfos: Dict[int, Tuple[Any, bool, set[str]]],
+) -> bool:
+    # Raw_Data の変更で値が変わりうるセルかどうか (参照先の数式セルの影響は呼び出し側で判定する)。
+    # 集計を更新した SUMIFS は、条件値の組が値の変わった組に含まれる場合だけ評価し直す。
+    # 参照するシートと SUMIFS の範囲 (絶対参照) はテンプレートごとに同じため、
+    # objTemplateInfos (構文木の id → (SUMIFS の範囲, 条件が他のシートを参照するか, 参照するシート))
+    # に 1 回だけ求めて保持する。
+    objTemplateInfo: Tuple[Any, bool, set[str]] | None = objTemplateInfos.get(id(objAst))
+    if objTemplateInfo is None:
+        objSumIfsRanges: Tuple[Tuple[str, int, int, int, int], ...] | None = None
+        bCriteriaReferToOtherSheets: bool = False
+        if is_vectorizable_sumifs_workbook(objAst):
+            objSumIfsRanges = tuple(
+                resolve_range_workbook(objRangeNode, iRow, iColumn, pszSheetName)
+                for objRangeNode in [objAst[2][0]] + objAst[2][1::2]
+            )
+            bCriteriaReferToOtherSheets = (
+                len(collect_referenced_sheets_workbook(objAst[2][2::2], iRow, iColumn, pszSheetName) - {pszSheetName})
+                > 0
+            )
+        objTemplateInfo = (
+            objSumIfsRanges,
+            bCriteriaReferToOtherSheets,
+            collect_referenced_sheets_workbook([objAst], iRow, iColumn, pszSheetName),
+        )
+        objTemplateInfos[id(objAst)] = objTemplateInfo
+    objRanges, bCriteriaReferToOtherSheets, objReferencedSheets = objTemplateInfo
+
+    if objRanges is not None and objRanges in objWorkbook["ChangedSumIfsKeys"]:
+        objChangedKeys = objWorkbook["ChangedSumIfsKeys"][objRanges]
+        if objChangedKeys is None or bCriteriaReferToOtherSheets:
+            return True
+        objCriteria: List[Any] = [
+            evaluate_node_workbook(objWorkbook, objCriterionNode, iRow, iColumn, pszSheetName)
+            for objCriterionNode in objAst[2][2::2]
+        ]
+        if any(
+            isinstance(objCriterion, list) or build_criteria_matcher_for_workbook(objCriterion) is not None
+            for objCriterion in objCriteria
+        ):
+            return True
+        # 空のセルを条件にした場合は 0 として扱う (evaluate_sumifs_workbook と同じ)
+        return tuple(
+            build_lookup_key_for_workbook(objCriterion if objCriterion != "" else 0)
+            for objCriterion in objCriteria
+        ) in objChangedKeys
+    for pszTargetSheet in objReferencedSheets:
+        if pszTargetSheet == pszWorkbookRawDataSheetName:
+            return True
+        if pszTargetSheet != pszSheetName:
+            # 他の数式シートは、前回から値の変わったセルがない場合だけ変わらない
+            objOtherAffectedCells: set[Tuple[int, int]] | None = objWorkbook["AffectedCells"].get(pszTargetSheet)
+            if objOtherAffectedCells is None or len(objOtherAffectedCells) > 0:
+                return True
+    return False
+
+
+def is_same_cell_value_workbook(objLeft: Any, objRight: Any) -> bool:
+    # 型も含めて同じ値かどうか (時間と秒数の整数、論理値と数値などは区別する)
+    if type(objLeft) is not type(objRight):
+        return False
+    if isinstance(objLeft, list):
+        return len(objLeft) == len(objRight) and all(
+            is_same_cell_value_workbook(objLeftItem, objRightItem)
+            for objLeftItem, objRightItem in zip(objLeft, objRight)
+        )
+    return objLeft == objRight
+
+
+def refresh_cells_from_cache_workbook(
+    objWorkbook: Dict[str, Any],
+    pszSheetName: str,
+    objPlan: Dict[str, Any],
+) -> None:
+    # 数式セルを依存関係の順に調べ、Raw_Data の変更の影響を受けず、参照先の値も前回と同じセルには
+    # 前回の値を入れる。それ以外のセルはその場で評価し直し、前回と値が変わったセルだけを
+    # 「変わったセル」として参照元に伝える (値が同じなら、参照元は評価し直さない)。
+    objCachedValues: Dict[Tuple[int, int], Any] = objWorkbook["CachedCellValues"][pszSheetName]
+    objCellDependencies: Dict[Tuple[int, int], set[Tuple[int, int]]] = objPlan["CellDependencies"]
+    objDependents: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    objInDegrees: Dict[Tuple[int, int], int] = {}
+    for objCell in objPlan["FormulaCells"]:
+        objInDegrees[objCell] = len(objCellDependencies[objCell])
+        for objDependency in objCellDependencies[objCell]:
+            objDependents.setdefault(objDependency, []).append(objCell)
+    objOrder: List[Tuple[int, int]] = [objCell for objCell in objPlan["FormulaCells"] if objInDegrees[objCell] == 0]
+    iOrderIndex: int = 0
+    while iOrderIndex < len(objOrder):
+        for objDependent in objDependents.get(objOrder[iOrderIndex], []):
+            objInDegrees[objDependent] -= 1
+            if objInDegrees[objDependent] == 0:
+                objOrder.append(objDependent)
+        iOrderIndex += 1
+
+    # 循環参照に含まれるセルは前回の値を使わず、この後の通常の評価に任せる
+    objChangedCells: set[Tuple[int, int]] = set(objPlan["FormulaCells"]) - set(objOrder)
+    objTemplateInfos: Dict[int, Tuple[Any, bool, set[str]]] = {}
+    iReevaluatedCellCount: int = 0
+    for iRow, iColumn in objOrder:
+        if (
+            (iRow, iColumn) in objCachedValues
+            and not any(objDependency in objChangedCells for objDependency in objCellDependencies[(iRow, iColumn)])
+            and not is_cell_affected_by_raw_data_change_workbook(
+                objWorkbook,
+                pszSheetName,
+                iRow,
+                iColumn,
+                objPlan["CellAsts"][(iRow, iColumn)],
+                objTemplateInfos,
+            )
+        ):
+            objWorkbook["EvaluatedCells"][(pszSheetName, iRow, iColumn)] = objCachedValues[(iRow, iColumn)]
+            continue
+        iReevaluatedCellCount += 1
+        objValue: Any = evaluate_cell_workbook(objWorkbook, pszSheetName, iRow, iColumn)
+        if (iRow, iColumn) not in objCachedValues or not is_same_cell_value_workbook(
+            objValue,
+            objCachedValues[(iRow, iColumn)],
+        ):
+            objChangedCells.add((iRow, iColumn))
+    objWorkbook["AffectedCells"][pszSheetName] = objChangedCells
+
+    objStatistics: Dict[str, Any] | None = objWorkbook["Statistics"]
+    if objStatistics is not None:
+        objStatistics["CacheHits"]["PersistentCells"] = (
+            objStatistics["CacheHits"].get("PersistentCells", 0) + len(objOrder) - iReevaluatedCellCount
+        )
+        objStatistics["CacheMisses"]["PersistentCells"] = (
+            objStatistics["CacheMisses"].get("PersistentCells", 0) + iReevaluatedCellCount
+        )
+
+
+def build_formula_workbook_cache_record(
+    objWorkbook: Dict[str, Any],
+    objCacheKey: Tuple[str, Tuple[Tuple[str, str], ...]],
+    pszRawDataHash: str,
+) -> Dict[str, Any]:
+    # 保存するレコード。構文木は同じテンプレートを 1 つにまとめ、セルからは番号で参照する
+    objSheetRecords: Dict[str, Dict[str, Any]] = {}
+    for pszSheetName, _ in objCacheKey[1]:
+        objPlan: Dict[str, Any] = objWorkbook["SheetPlans"][pszSheetName]
+        objTemplates: List[Any] = []
+        objTemplateIndexById: Dict[int, int] = {}
+        objCellTemplates: Dict[Tuple[int, int], int] = {}
+        for objCell in objPlan["FormulaCells"]:
+            objAst: Any = objPlan["CellAsts"][objCell]
+            if id(objAst) not in objTemplateIndexById:
+                objTemplateIndexById[id(objAst)] = len(objTemplates)
+                objTemplates.append(objAst)
+            objCellTemplates[objCell] = objTemplateIndexById[id(objAst)]
+        objSheetRecords[pszSheetName] = {
+            "Templates": objTemplates,
+            "CellTemplates": objCellTemplates,
+            "CellDependencies": objPlan["CellDependencies"],
+            "Values": {
+                objCell: encode_cell_value_for_cache_workbook(
+                    objWorkbook["EvaluatedCells"][(pszSheetName, objCell[0], objCell[1])],
+                )
+                for objCell in objPlan["FormulaCells"]
+            },
+        }
+    return {
+        "Key": objCacheKey,
+        "RawDataHash": pszRawDataHash,
+        "RawDataShape": tuple(objWorkbook["RawDataShape"]),
+        "RawDataRows": objWorkbook["RawDataRows"],
+        "Sheets": objSheetRecords,
+        "SumIfsAggregates": {
+            objRanges: build_sumifs_aggregate_for_cache_workbook(objWorkbook, objRanges, objTotals)
+            for objRanges, (objTotals, _) in objWorkbook["SumIfsIndex"].items()
+            if is_incremental_sumifs_ranges_workbook(objWorkbook, objRanges)
+        },
+    }
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Raw_Data.tsv と複数の数式シートから、数式を評価した TSV を作成する関数。
+#   objFormulaSheetSpecs : (シート名, 数式シートの TSV, 出力 TSV) のリスト。
+#                          この順に評価する (他のシートを参照するシートは後に置く)。
+# ワークブックは 1 回だけ作成し、シート間の参照・SUMIFS / MATCH のインデックスを共有する。
+# シートごとにエラーファイルを出力し、失敗したシートがあっても残りのシートは評価する。
+# bWriteStatistics=True の場合は、シートごとの計測結果を出力 TSV と同じフォルダに
+# *_statistics.tsv として出力する。
+# bUsePersistentCache=True の場合は、前回の評価結果を永続キャッシュから再利用する
+# (Raw_Data.tsv だけが変わった場合は、影響を受けるセルだけを評価し直す)。
+# iJobs が 2 以上の場合は、各シートの 3 行目以降を iJobs 個の行の範囲に分けてプロセスプールで評価する
+# (出力は 1 プロセスで評価した場合と同じ。永続キャッシュを使う場合は 1 プロセスで評価する)。
+#
+# ///////////////////////////////////////////////////////////////
+def make_formula_sheet_tsvs_from_raw_data(
+    pszRawDataTsvPath: str,
+    objFormulaSheetSpecs: List[Tuple[str, str, str]],
+    bWriteStatistics: bool = False,
+    bUsePersistentCache: bool = False,
+    iJobs: int = 1,
+) -> None:
+    if not os.path.isfile(pszRawDataTsvPath):
+        with open(
+            pszRawDataTsvPath.replace(".tsv", "_error.tsv"),
+            "w",
+            encoding="utf-8",
+        ) as objFile:
+            objFile.write(
+                "Error: input TSV file not found. Path = {0}".format(
+                    pszRawDataTsvPath,
+                )
+            )
+        return
+
+    try:
+        objWorkbook: Dict[str, Any] = create_formula_workbook(pszRawDataTsvPath)
+    except Exception as objException:
+        for _, _, pszOutputTsvPath in objFormulaSheetSpecs:
+            write_formula_sheet_error_workbook(
+                pszOutputTsvPath,
+                "Error: unexpected exception. Detail = {0}".format(objException),
+            )
+        return
+
+    # 他のシートから参照できるよう、評価の前にすべての数式シートを登録する
+    objTargetSpecs: List[Tuple[str, str, str]] = []
+    for pszSheetName, pszFormulaTsvPath, pszOutputTsvPath in objFormulaSheetSpecs:
+        if not os.path.isfile(pszFormulaTsvPath):
+            with open(
+                pszFormulaTsvPath.replace(".tsv", "_error.tsv"),
+                "w",
+                encoding="utf-8",
+            ) as objFile:
+                objFile.write(
+                    "Error: input TSV file not found. Path = {0}".format(
+                        pszFormulaTsvPath,
+                    )
+                )
+            continue
+        try:
+            add_formula_sheet_to_workbook(objWorkbook, pszSheetName, pszFormulaTsvPath)
+        except Exception as objException:
+            write_formula_sheet_error_workbook(
+                pszOutputTsvPath,
+                "Error: unexpected exception. Detail = {0}".format(objException),
+            )
+            continue
+        objTargetSpecs.append((pszSheetName, pszFormulaTsvPath, pszOutputTsvPath))
+
+    # 永続キャッシュは、すべての数式シートを登録できた場合だけ使う
+    bUsePersistentCache = bUsePersistentCache and len(objTargetSpecs) == len(objFormulaSheetSpecs)
+    bCacheUpToDate: bool = False
+    if bUsePersistentCache:
+        pszCachePath: str = build_formula_workbook_cache_path(objTargetSpecs)
+        objCacheKey: Tuple[str, Tuple[Tuple[str, str], ...]] = build_formula_workbook_cache_key(objTargetSpecs)
+        pszRawDataHash: str = compute_file_sha256(pszRawDataTsvPath)
+        objRecord: Dict[str, Any] | None = read_formula_workbook_cache(pszCachePath)
+        if objRecord is not None and objRecord.get("Key") == objCacheKey:
+            try:
+                bCacheUpToDate = restore_formula_workbook_cache(objWorkbook, objRecord, pszRawDataHash)
+            except Exception:
+                # 形式の異なるキャッシュは使わない (登録しかけた内容も捨てて評価し直す)
+                for pszKey in [
+                    "EvaluatedCells",
+                    "SheetPlans",
+                    "CachedCellValues",
+                    "ChangedSumIfsKeys",
+                    "AffectedCells",
+                    "SumIfsIndex",
+                ]:
+                    objWorkbook[pszKey].clear()
+                bCacheUpToDate = False
+
+    bAllSheetsSucceeded: bool = True
+    # --jobs 2 以上の場合は、各シートの 3 行目以降を行の範囲ごとにプロセスプールで評価する
+    # (永続キャッシュを使う場合は、前回の値を再利用するため 1 プロセスで評価する)
+    objExecutor: ProcessPoolExecutor | None = None
+    if iJobs > 1 and not bUsePersistentCache:
+        objExecutor = ProcessPoolExecutor(max_workers=iJobs)
+    try:
+        for pszSheetName, _, pszOutputTsvPath in objTargetSpecs:
+            try:
+                if bWriteStatistics:
+                    enable_workbook_statistics(objWorkbook)
+                objOutputRows: List[List[Any]] = evaluate_formula_sheet_workbook(
+                    objWorkbook,
+                    pszSheetName,
+                    objExecutor,
+                    iJobs,
+                )
+                if bWriteStatistics:
+                    write_workbook_statistics_tsv(
+                        objWorkbook,
+                        pszOutputTsvPath.replace(".tsv", "_statistics.tsv"),
+                    )
+                pd.DataFrame(objOutputRows, dtype=object).to_csv(
+                    pszOutputTsvPath,
+                    sep="\t",
+                    header=False,
+                    index=False,
+                    encoding="utf-8",
+                    lineterminator="\n",
+                )
+                # 2 行目以降に "=" で始まるセル (評価されずに残った数式) がないことを確認する
+                bHasFormulaCell: bool = any(
+                    isinstance(objValue, str) and objValue.startswith("=")
+                    for objOutputRow in objOutputRows[1:]
+                    for objValue in objOutputRow
+                )
+                if bHasFormulaCell:
+                    bAllSheetsSucceeded = False
+                    write_formula_sheet_error_workbook(
+                        pszOutputTsvPath,
+                        "Error: {0} still contains formula cells starting with '='.".format(
+                            os.path.basename(pszOutputTsvPath),
+                        ),
+                    )
+            except Exception as objException:
+                bAllSheetsSucceeded = False
+                write_formula_sheet_error_workbook(
+                    pszOutputTsvPath,
+                    "Error: unexpected exception. Detail = {0}".format(objException),
+                )
+    finally:
+        if objExecutor is not None:
+            objExecutor.shutdown()
+
+    if bUsePersistentCache and bAllSheetsSucceeded and not bCacheUpToDate:
+        write_formula_workbook_cache(
+            pszCachePath,
+            build_formula_workbook_cache_record(objWorkbook, objCacheKey, pszRawDataHash),
+        )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Raw_Data.tsv と Project_List_Formula.tsv から Project_List.tsv を作成する関数
+#
+# ///////////////////////////////////////////////////////////////
+def make_project_list_tsv_from_raw_data(
+    pszRawDataTsvPath: str,
+    pszProjectListFormulaTsvPath: str,
+    pszOutputTsvPath: str,
+    bWriteStatistics: bool = False,
+    bUsePersistentCache: bool = False,
+    iJobs: int = 1,
+) -> None:
+    make_formula_sheet_tsvs_from_raw_data(
+        pszRawDataTsvPath,
+        [(pszWorkbookProjectListSheetName, pszProjectListFormulaTsvPath, pszOutputTsvPath)],
+        bWriteStatistics,
+        bUsePersistentCache,
+        iJobs,
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Raw_Data.tsv と Project_List_Formula.tsv / Staff_List_Formula.tsv / With_Salary_Formula.tsv
+# から Project_List.tsv / Staff_List.tsv / With_Salary.tsv を 1 回の評価で作成する関数。
+# Staff_List / With_Salary は プロジェクトリスト! を参照するため、Project_List の後に評価する。
+#
+# ///////////////////////////////////////////////////////////////
+def make_project_staff_salary_list_tsvs_from_raw_data(
+    pszRawDataTsvPath: str,
+    pszProjectListFormulaTsvPath: str,
+    pszStaffListFormulaTsvPath: str,
+    pszWithSalaryFormulaTsvPath: str,
+    pszProjectListTsvPath: str,
+    pszStaffListTsvPath: str,
+    pszWithSalaryTsvPath: str,
+    bWriteStatistics: bool = False,
+    bUsePersistentCache: bool = False,
+    iJobs: int = 1,
+) -> None:
+    make_formula_sheet_tsvs_from_raw_data(
+        pszRawDataTsvPath,
+        [
+            (pszWorkbookProjectListSheetName, pszProjectListFormulaTsvPath, pszProjectListTsvPath),
+            (pszWorkbookStaffListSheetName, pszStaffListFormulaTsvPath, pszStaffListTsvPath),
+            (pszWorkbookWithSalarySheetName, pszWithSalaryFormulaTsvPath, pszWithSalaryTsvPath),
+        ],
+        bWriteStatistics,
+        bUsePersistentCache,
+        iJobs,
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# インメモリ・データフロー用ヘルパー
+#
+# ///////////////////////////////////////////////////////////////
+# pandas.read_csv が既定 (keep_default_na=True) で欠損値 NaN とみなす文字列の一覧。
+# 正解スクリプト群のうち、既定設定で TSV を読み直している段
+# (スタッフコード順ソート・日付正規化・Sheet6・Sheet7/8/9/10 作成) の
+# 読み込み結果をメモリ上で再現するために使用する。
+objPandasDefaultNaValueSet: set[str] = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# DataFrame を「TSV に書き出して既定設定で読み直した結果」と
+# 同じ内容に変換する関数。
+# 既定の欠損値文字列に一致するセルを NaN に置き換える。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_dataframe_to_default_na_view(
+    objDataFrameInput: pd.DataFrame,
+) -> pd.DataFrame:
+    objDataFrameOutput: pd.DataFrame = objDataFrameInput.mask(
+        objDataFrameInput.isin(objPandasDefaultNaValueSet),
+    )
+    return objDataFrameOutput.reset_index(drop=True)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 行リストを、正解スクリプトと同じ to_csv 設定で TSV 文字列に変換する関数。
+# 中間ファイルを残す場合は、この文字列をそのまま書き出すことで
+# 正解スクリプトの出力とバイト単位で一致させる。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_rows_to_tsv_text_in_memory(
+    objRows: List[List[str]],
+    objColumnNames: List[str] | None,
+) -> str:
+    objDataFrameOutput: pd.DataFrame
+    if objColumnNames is None:
+        objDataFrameOutput = pd.DataFrame(objRows)
+    else:
+        objDataFrameOutput = pd.DataFrame(objRows, columns=objColumnNames)
+    pszTsvText: str = objDataFrameOutput.to_csv(
+        None,
+        sep="\t",
+        index=False,
+        header=objColumnNames is not None,
+        lineterminator="\n",
+    )
+    return pszTsvText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# TSV 文字列を UTF-8 のファイルとして、改行コードを変換せずに書き出す関数。
+#
+# ///////////////////////////////////////////////////////////////
+def write_tsv_text_utf8(
+    pszOutputTsvPath: str,
+    pszTsvText: str,
+) -> None:
+    with open(pszOutputTsvPath, mode="w", encoding="utf-8", newline="") as objOutputFile:
+        objOutputFile.write(pszTsvText)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 中間ファイルの書き出し先を開く関数。
+# 中間ファイルを残さない場合は os.devnull を開き、
+# 呼び出し側の書き込み処理をそのまま流用できるようにする。
+#
+# ///////////////////////////////////////////////////////////////
+def open_intermediate_output_file(
+    pszOutputPath: str,
+    bWriteIntermediates: bool,
+) -> TextIO:
+    if bWriteIntermediates:
+        return open(pszOutputPath, "w", encoding="utf-8")
+    return open(os.devnull, "w", encoding="utf-8")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 増分再構築 (--incremental) 用のマニフェスト
+#
+# 各月の (1)〜(7) の出力ファイルごとに、
+# 入力 CSV のハッシュ・管轄PJ表.csv のハッシュ・コードのバージョン (本ファイルのハッシュ)・
+# 出力ファイル自身のハッシュを TSV で記録する。
+# 再実行時に 3 つのハッシュが一致し、出力ファイルが記録時のまま残っていれば、
+# (1)〜(7) を省略して既存の出力ファイルを再利用する。
+#
+# ///////////////////////////////////////////////////////////////
+objCodeVersionCache: Dict[str, str] = {}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ファイル内容の SHA-256 を、一定サイズずつ読みながら求める関数
+#
+# ///////////////////////////////////////////////////////////////
+def compute_file_sha256(
+    pszFilePath: str,
+) -> str:
+    objHash = hashlib.sha256()
+    with open(pszFilePath, mode="rb") as objFile:
+        while True:
+            objChunk: bytes = objFile.read(1024 * 1024)
+            if not objChunk:
+                break
+            objHash.update(objChunk)
+    return objHash.hexdigest()
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# マニフェストの照合キー (入力 CSV・管轄PJ表.csv・コードのバージョン) を作成する関数。
+# 管轄PJ表.csv が無い場合、そのハッシュは空文字とする。
+#
+# ///////////////////////////////////////////////////////////////
+def build_step_manifest_key(
+    pszInputCsvPath: str,
+) -> Tuple[str, str, str]:
+    objScriptPath: Path = Path(__file__).resolve()
+    if "code_version" not in objCodeVersionCache:
+        objCodeVersionCache["code_version"] = compute_file_sha256(str(objScriptPath))
+    objOrgTableCsvPath: Path = objScriptPath.parent / "管轄PJ表.csv"
+    pszOrgTableHash: str = ""
+    if objOrgTableCsvPath.is_file():
+        pszOrgTableHash = compute_file_sha256(str(objOrgTableCsvPath))
+    return (
+        compute_file_sha256(pszInputCsvPath),
+        pszOrgTableHash,
+        objCodeVersionCache["code_version"],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# マニフェストと現在の状態を照合し、出力ファイルを再利用できるかを返す関数。
+# 対象の出力ファイルがすべて記録されており、キーが一致し、
+# 出力ファイルの内容が記録時から変わっていない場合のみ True を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def is_step_manifest_up_to_date(
+    pszManifestPath: str,
+    objOutputPaths: List[str],
+    objManifestKey: Tuple[str, str, str],
+) -> bool:
+    if not os.path.isfile(pszManifestPath):
+        return False
+    objRecordByFileName: Dict[str, List[str]] = {}
+    with open(pszManifestPath, mode="r", encoding="utf-8", newline="") as objManifestFile:
+        for objRow in csv.reader(objManifestFile, delimiter="\t"):
+            if len(objRow) == 5:
+                objRecordByFileName[objRow[0]] = objRow
+    for pszOutputPath in objOutputPaths:
+        objRecord: List[str] | None = objRecordByFileName.get(os.path.basename(pszOutputPath))
+        if objRecord is None or tuple(objRecord[1:4]) != objManifestKey:
+            return False
+        if not os.path.isfile(pszOutputPath) or compute_file_sha256(pszOutputPath) != objRecord[4]:
+            return False
+    return True
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 出力ファイルごとのキーとハッシュをマニフェストに書き出す関数
+#
+# ///////////////////////////////////////////////////////////////
+def write_step_manifest(
+    pszManifestPath: str,
+    objOutputPaths: List[str],
+    objManifestKey: Tuple[str, str, str],
+) -> None:
+    os.makedirs(os.path.dirname(pszManifestPath), exist_ok=True)
+    with open(pszManifestPath, mode="w", encoding="utf-8", newline="") as objManifestFile:
+        objWriter = csv.writer(objManifestFile, delimiter="\t", lineterminator="\n")
+        objWriter.writerow(["出力ファイル", "入力CSVハッシュ", "管轄PJ表ハッシュ", "コードバージョン", "出力ハッシュ"])
+        for pszOutputPath in objOutputPaths:
+            objWriter.writerow(
+                [os.path.basename(pszOutputPath)]
+                + list(objManifestKey)
+                + [compute_file_sha256(pszOutputPath)],
+            )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 管轄PJ表インデックスのキャッシュ
+#
+# 管轄PJ表.tsv から作成した検索用インデックス
+# (PJコード接頭辞 → 計上カンパニー / 計上グループ、PJコード → 計上カンパニー) を、
+# 同一プロセス内のメモと temp/org_table_index_cache/ 以下のバイナリキャッシュ (marshal) で再利用する。
+# (src/org_table_index.py と同じ仕組みを、本ファイル単体で動くように持つ)
+#
+# 管轄PJ表.tsv の mtime・サイズ・SHA-256 と本ファイルのハッシュを記録し、
+# mtime とサイズが一致し、かつ mtime が記録時刻より十分古い場合はハッシュ計算を省略する。
+# それ以外は SHA-256 を比較し、内容が同じなら再利用する
+# (月ごとに同じ内容で上書きされる 管轄PJ表.tsv では作り直さない)。
+# キャッシュの読み書きに失敗した場合は、通常どおりインデックスを作成する。
+#
+# ///////////////////////////////////////////////////////////////
+iOrgTableIndexRacyMarginNs: int = 2 * 1000 * 1000 * 1000
+objOrgTableIndexMemo: Dict[Tuple[str, str], Tuple[int, int, str, str, int, Dict[str, Any]]] = {}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイナリキャッシュを読み込む関数。
+# 読み込めない・形式が異なる場合は None を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def read_org_table_index_cache(
+    pszCachePath: str,
+) -> Tuple[int, int, str, str, int, Dict[str, Any]] | None:
+    objMagicNumberBytes: bytes = importlib.util.MAGIC_NUMBER
+    try:
+        with open(pszCachePath, mode="rb") as objCacheFile:
+            objCacheBytes: bytes = objCacheFile.read()
+        if not objCacheBytes.startswith(objMagicNumberBytes):
+            return None
+        objRecord: Any = marshal.loads(objCacheBytes[len(objMagicNumberBytes) :])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(objRecord, tuple) or len(objRecord) != 6 or not isinstance(objRecord[5], dict):
+        return None
+    return objRecord
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイナリキャッシュを書き出す関数。
+# 並列実行時に書きかけのファイルを読まないよう、一時ファイル経由で置き換える。
+#
+# ///////////////////////////////////////////////////////////////
+def write_org_table_index_cache(
+    pszCachePath: str,
+    objRecord: Tuple[int, int, str, str, int, Dict[str, Any]],
+) -> None:
+    try:
+        os.makedirs(os.path.dirname(pszCachePath), exist_ok=True)
+        pszTemporaryPath: str = f"{pszCachePath}.{os.getpid()}.tmp"
+        with open(pszTemporaryPath, mode="wb") as objCacheFile:
+            objCacheFile.write(importlib.util.MAGIC_NUMBER + marshal.dumps(objRecord))
+        os.replace(pszTemporaryPath, pszCachePath)
+    except (OSError, ValueError):
+        pass
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 管轄PJ表.tsv を 1 回だけ読み、計上カンパニー・計上グループの検索用インデックスを作成する関数。
+#   BillingMapPrefix : PJコード接頭辞 (P\d{5}_ / [A-OQ-Z]\d{3}_) → 最初に現れた空でない計上カンパニー
+#   BillingMapExact  : PJコード → 最初に現れた空でない計上カンパニー
+#   GroupMapPrefix   : PJコード接頭辞 → 最初に現れた空でない計上グループ
+#
+# ///////////////////////////////////////////////////////////////
+def build_org_table_index(
+    pszOrgTableTsvPath: str,
+) -> Dict[str, Any]:
+    objBillingMapPrefix: Dict[str, str] = {}
+    objBillingMapExact: Dict[str, str] = {}
+    objGroupMapPrefix: Dict[str, str] = {}
+    objPrefixPattern: re.Pattern[str] = re.compile(r"^(P\d{5}_|[A-OQ-Z]\d{3}_)")
+    with open(pszOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
+        for objRow in csv.reader(objOrgTableFile, delimiter="\t"):
+            if len(objRow) < 4:
+                continue
+            pszProjectCodeOrg: str = objRow[2].strip()
+            pszBillingCompany: str = objRow[3].strip()
+            pszBillingGroup: str = objRow[4].strip() if len(objRow) >= 5 else ""
+            if not pszProjectCodeOrg:
+                continue
+            if pszBillingCompany:
+                objBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
+            objPrefixMatch: re.Match[str] | None = objPrefixPattern.match(pszProjectCodeOrg)
+            if objPrefixMatch is None:
+                continue
+            pszProjectCodePrefix: str = objPrefixMatch.group(1)
+            if pszBillingCompany:
+                objBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
+            if pszBillingGroup:
+                objGroupMapPrefix.setdefault(pszProjectCodePrefix, pszBillingGroup)
+    return {
+        "BillingMapPrefix": objBillingMapPrefix,
+        "BillingMapExact": objBillingMapExact,
+        "GroupMapPrefix": objGroupMapPrefix,
+    }
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 管轄PJ表.tsv のインデックスを返す関数 (存在確認は呼び出し側で行う)。
+# 返却した dict はメモと共有しているため、呼び出し側で変更しないこと。
+#
+# ///////////////////////////////////////////////////////////////
+def load_org_table_index(
+    pszOrgTableTsvPath: str,
+) -> Dict[str, Any]:
+    pszOrgTableTsvPath = os.path.abspath(pszOrgTableTsvPath)
+    objStat: os.stat_result = os.stat(pszOrgTableTsvPath)
+    iMtimeNs: int = objStat.st_mtime_ns
+    iSize: int = objStat.st_size
+    objScriptPath: Path = Path(__file__).resolve()
+    if "code_version" not in objCodeVersionCache:
+        objCodeVersionCache["code_version"] = compute_file_sha256(str(objScriptPath))
+    pszCodeVersion: str = objCodeVersionCache["code_version"]
+
+    objMemoKey: Tuple[str, str] = (pszOrgTableTsvPath, "step11")
+    pszPathHash: str = hashlib.sha256(pszOrgTableTsvPath.encode("utf-8")).hexdigest()[:16]
+    pszCachePath: str = str(
+        objScriptPath.parent / "temp" / "org_table_index_cache" / f"step11_{pszPathHash}.bin"
+    )
+    objRecord = objOrgTableIndexMemo.get(objMemoKey)
+    if objRecord is None:
+        objRecord = read_org_table_index_cache(pszCachePath)
+    if objRecord is not None and objRecord[3] != pszCodeVersion:
+        objRecord = None
+
+    # mtime・サイズが一致し、mtime が記録時刻より十分古ければハッシュ計算を省略する
+    if (
+        objRecord is not None
+        and objRecord[0] == iMtimeNs
+        and objRecord[1] == iSize
+        and iMtimeNs + iOrgTableIndexRacyMarginNs < objRecord[4]
+    ):
+        objOrgTableIndexMemo[objMemoKey] = objRecord
+        return objRecord[5]
+
+    # 内容が同じであれば、mtime だけを記録し直してインデックスを再利用する
+    pszSourceHash: str = compute_file_sha256(pszOrgTableTsvPath)
+    objIndex: Dict[str, Any]
+    if objRecord is not None and objRecord[2] == pszSourceHash:
+        objIndex = objRecord[5]
+    else:
+        objIndex = build_org_table_index(pszOrgTableTsvPath)
+    objRecord = (iMtimeNs, iSize, pszSourceHash, pszCodeVersion, time.time_ns(), objIndex)
+    write_org_table_index_cache(pszCachePath, objRecord)
+    objOrgTableIndexMemo[objMemoKey] = objRecord
+    return objIndex
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 入力 CSV の文字コード判定
+#
+# UTF-8(BOM あり/なし) か cp932 かを、BOM または先頭の一定バイト数から 1 回で判定する。
+# src/text_encoding_loader.py と同じ実装 (本ファイルは単体で動作させるため同梱する)。
+# 先頭のサンプルが UTF-8 として正しくても、それ以降に不正なバイトがある場合は、
+# 従来どおり cp932 で読み直す (utf-8-sig → cp932 の順に試していた場合と同じ結果になる)。
+#
+# ///////////////////////////////////////////////////////////////
+# UTF-8 かどうかを判定する先頭のバイト数
+iEncodingSampleByteCount: int = 64 * 1024
+
+
+def detect_text_encoding(
+    objBytes: bytes,
+    iSampleByteCount: int = iEncodingSampleByteCount,
+) -> str:
+    # 戻り値は "utf-8-sig" または "cp932"。サンプルの末尾で途切れた UTF-8 の文字は不正とみなさない
+    if objBytes.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    objSampleBytes: bytes = objBytes[:iSampleByteCount]
+    try:
+        codecs.getincrementaldecoder("utf-8")("strict").decode(
+            objSampleBytes,
+            final=len(objSampleBytes) == len(objBytes),
+        )
+    except UnicodeDecodeError:
+        return "cp932"
+    return "utf-8-sig"
+
+
+def decode_text_bytes(
+    objBytes: bytes,
+) -> Tuple[str, str]:
+    # 戻り値: (文字列, 使用した文字コード)
+    pszEncoding: str = detect_text_encoding(objBytes)
+    if pszEncoding == "utf-8-sig":
+        try:
+            return objBytes.decode("utf-8-sig"), "utf-8-sig"
+        except UnicodeDecodeError:
+            pass
+    return objBytes.decode("cp932"), "cp932"
+
+
+def build_encoding_candidates_from_file_head(
+    pszInputFilePath: str,
+) -> List[str]:
+    # ファイル全体を読まずに判定する場合 (ストリーミング変換) の、試す文字コードの順
+    with open(pszInputFilePath, mode="rb") as objFile:
+        objHeadBytes: bytes = objFile.read(iEncodingSampleByteCount + 1)
+    if detect_text_encoding(objHeadBytes) == "cp932":
+        return ["cp932"]
+    return ["utf-8-sig", "cp932"]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# CSV ヘッダ先頭セルの BOM・ダブルクォートを、
+# 正解スクリプト (csv_to_tsv_h_mm_ss) と同じ手順で除去する関数。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_csv_header_first_cell(
+    pszHeaderFirstCell: str,
+) -> str:
+    # BOM を除去
+    if pszHeaderFirstCell.startswith("\ufeff"):
+        pszHeaderFirstCell = pszHeaderFirstCell.lstrip("\ufeff")
+    # 外側の " を 1 回だけ除去し、"" を " に戻す
+    if len(pszHeaderFirstCell) >= 2 and pszHeaderFirstCell.startswith('"') and pszHeaderFirstCell.endswith('"'):
+        pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
+        pszHeaderFirstCell = pszHeaderFirstCell.replace('""', '"')
+    # まだ "日時" の形なら再度外側だけ落とす
+    if len(pszHeaderFirstCell) >= 2 and pszHeaderFirstCell.startswith('"') and pszHeaderFirstCell.endswith('"'):
+        pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
+    return pszHeaderFirstCell
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ジョブカン工数 CSV を、一定行数のチャンク単位で読みながら TSV に書き出す関数。
+# (1) CSV → TSV (H:MM:SS 化) のストリーミング版。
+#
+# 正解スクリプト (csv_to_tsv_h_mm_ss.convert_csv_to_tsv_file) と同じ出力を、
+# ファイル全体をメモリに載せずに作成する。
+# ・文字コードは先頭のサンプルから判定し (cp932 のファイルは 1 回だけ読む)、
+#   UTF-8 と判定したファイルが途中で UnicodeDecodeError になった場合は cp932 で出力を作り直す
+# ・データ行が無い (ヘッダのみ・空ファイル) 場合は、そのまま出力する
+# ・ヘッダ先頭セルの BOM・ダブルクォートを除去する
+# ・F列・K列の "h:mm" をチャンクごとに列単位で "h:mm:ss" に揃える
+#
+# ///////////////////////////////////////////////////////////////
+def convert_csv_to_tsv_file_streaming(
+    pszInputCsvPath: str,
+    pszOutputTsvPath: str,
+    iChunkRowCount: int,
+) -> str:
+    if not os.path.exists(pszInputCsvPath):
+        raise FileNotFoundError(f"Input CSV not found: {pszInputCsvPath}")
+
+    arrEncodings: List[str] = build_encoding_candidates_from_file_head(pszInputCsvPath)
+    objLastDecodeError: Exception | None = None
+    for pszEncoding in arrEncodings:
+        try:
+            with open(
+                pszInputCsvPath,
+                mode="r",
+                encoding=pszEncoding,
+                newline="",
+            ) as objInputFile, open(
+                pszOutputTsvPath,
+                mode="w",
+                encoding="utf-8",
+                newline="",
+            ) as objOutputFile:
+                objReader = csv.reader(objInputFile)
+                objWriter = csv.writer(objOutputFile, delimiter="\t")
+
+                objHeaderRow: List[str] | None = next(objReader, None)
+                if objHeaderRow is not None:
+                    objChunkRows: List[List[str]] = list(itertools.islice(objReader, iChunkRowCount))
+                    # データ行がある場合のみ、正解スクリプトと同じくヘッダ先頭セルを正規化する
+                    if len(objChunkRows) > 0 and len(objHeaderRow) >= 1:
+                        objHeaderRow[0] = normalize_csv_header_first_cell(objHeaderRow[0])
+                    objWriter.writerow(objHeaderRow)
+                    while len(objChunkRows) > 0:
+                        # F列「総労働時間」・K列「工数」
+                        for iTimeColumnIndex in (5, 10):
+                            normalize_time_column_h_mm_to_h_mm_ss(objChunkRows, iTimeColumnIndex, 0)
+                        objWriter.writerows(objChunkRows)
+                        objChunkRows = list(itertools.islice(objReader, iChunkRowCount))
+            objLastDecodeError = None
+            break
+        except UnicodeDecodeError as objError:
+            objLastDecodeError = objError
+
+    if objLastDecodeError is not None:
+        # 正解スクリプトと同じく、変換できなかった場合は出力ファイルを残さない
+        if os.path.exists(pszOutputTsvPath):
+            os.remove(pszOutputTsvPath)
+        raise objLastDecodeError
+    return pszOutputTsvPath
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Sheet7 / Sheet8 / Sheet9 / Sheet10 の行リストを
+# (スタッフコード, プロジェクト名) の groupby 1 回で作成する関数。
+#
+# 入力は Sheet4 を既定設定 (keep_default_na=True) で読み込んだ DataFrame。
+# Sheet4_staff_code_range.tsv や Sheet6 は使用せず、
+# スタッフコードが連続していない入力でも同じスタッフの行をまとめて集計する。
+#
+# 出力は正解スクリプト (make_sheet789_from_sheet4) と同じ規則で並べる。
+# ・スタッフの順序: 空でないスタッフコード (前後空白除去) の初出順
+# ・プロジェクトの順序: スタッフごとのプロジェクト名の昇順
+# ・工数: 同一スタッフ・同一プロジェクトの工数秒数の合計
+# ・計上カンパニー名: 同一スタッフ・同一プロジェクトで最初の欠損でない値
+# ・Sheet9: 上記スタッフ順の後に、氏名辞書にだけ存在するコードを追加
+#
+# ///////////////////////////////////////////////////////////////
+def make_sheet789_rows_by_groupby(
+    objDataFrameSheet4: pd.DataFrame,
+) -> Tuple[List[List[str]], List[List[str]], List[List[str]], List[List[str]]]:
+    objModuleMakeSheet789: Dict[str, Any] = create_module_from_source(
+        "make_sheet789_from_sheet4",
+        pszSource_make_sheet789_from_sheet4_py,
+    )
+    objSheet4Columns: List[str] = list(objDataFrameSheet4.columns)
+    pszNameColumn: str = ""
+    if "姓 名" in objSheet4Columns:
+        pszNameColumn = "姓 名"
+    elif "氏名" in objSheet4Columns:
+        pszNameColumn = "氏名"
+    pszCompanyColumn: str = ""
+    for pszCompanyColumnCandidate in ["計上カンパニー名", "計上カンパニー", "所属グループ名", "所属グループ"]:
+        if pszCompanyColumnCandidate in objSheet4Columns:
+            pszCompanyColumn = pszCompanyColumnCandidate
+            break
+
+    objSeriesStaffCode: pd.Series = objDataFrameSheet4["スタッフコード"]
+
+    # スタッフの順序（空でないスタッフコードの初出順）
+    objSeriesStaffCodeStripped: pd.Series = objSeriesStaffCode.dropna().astype(str).str.strip()
+    objListStaffCode: List[str] = (
+        objSeriesStaffCodeStripped[objSeriesStaffCodeStripped != ""].drop_duplicates().tolist()
+    )
+
+    # スタッフコード → 氏名（最初に出現した行の氏名）
+    # 正解スクリプトと同じく、欠損値のコード・氏名は文字列 "nan" として扱う
+    objDictStaffCodeToName: Dict[str, str] = {}
+    if pszNameColumn != "":
+        objSeriesNameKey: pd.Series = objSeriesStaffCode.astype(str).str.strip()
+        objSeriesNameKey = objSeriesNameKey[objSeriesNameKey != ""].drop_duplicates()
+        objSeriesStaffName: pd.Series = (
+            objDataFrameSheet4.loc[objSeriesNameKey.index, pszNameColumn].astype(str).str.strip()
+        )
+        objDictStaffCodeToName = dict(zip(objSeriesNameKey.tolist(), objSeriesStaffName.tolist()))
+
+    # (スタッフコード, プロジェクト名) ごとの工数秒数の合計と計上カンパニー名
+    objDataFrameWork: pd.DataFrame = pd.DataFrame(
+        {
+            "スタッフコード": objSeriesStaffCode,
+            "プロジェクト名": objDataFrameSheet4["プロジェクト名"],
+            "__time_seconds__": convert_time_texts_to_seconds(objDataFrameSheet4["工数"]),
+        }
+    )
+    objAggregation: Dict[str, Tuple[str, str]] = {"__time_seconds__": ("__time_seconds__", "sum")}
+    if pszCompanyColumn != "":
+        objDataFrameWork["__company__"] = objDataFrameSheet4[pszCompanyColumn]
+        objAggregation["__company__"] = ("__company__", "first")
+    objDataFrameGrouped: pd.DataFrame = objDataFrameWork.groupby(
+        ["スタッフコード", "プロジェクト名"],
+        sort=False,
+        dropna=True,
+    ).agg(**objAggregation)
+
+    objDictSecondsByKey: Dict[Tuple[str, str], int] = dict(
+        zip(objDataFrameGrouped.index.tolist(), objDataFrameGrouped["__time_seconds__"].tolist()),
+    )
+    objDictCompanyByKey: Dict[Tuple[str, str], str] = {}
+    if pszCompanyColumn != "":
+        for objKey, objCompanyValue in zip(
+            objDataFrameGrouped.index.tolist(),
+            objDataFrameGrouped["__company__"].tolist(),
+        ):
+            objDictCompanyByKey[objKey] = "" if pd.isna(objCompanyValue) else str(objCompanyValue)
+
+    # スタッフコード → プロジェクト名一覧（空白のみの名前を除き昇順・重複なし）
+    objDictProjectNamesByStaff: Dict[str, List[str]] = {}
+    for pszStaffCode, pszProjectName in objDictSecondsByKey.keys():
+        if str(pszProjectName).strip() == "":
+            continue
+        objDictProjectNamesByStaff.setdefault(pszStaffCode, []).append(str(pszProjectName))
+
+    objListOutputRowsSheet7: List[List[str]] = []
+    objListOutputRowsSheet8: List[List[str]] = []
+    objListOutputRowsSheet9: List[List[str]] = []
+    objListOutputRowsSheet10: List[List[str]] = []
+
+    objSetAddedStaffCodeForSheet9: set[str] = set()
+    for pszStaffCode in objListStaffCode:
+        objListOutputRowsSheet9.append([objDictStaffCodeToName.get(pszStaffCode, ""), pszStaffCode])
+        objSetAddedStaffCodeForSheet9.add(pszStaffCode)
+    for pszStaffCodeExtra, pszStaffNameExtra in objDictStaffCodeToName.items():
+        if pszStaffCodeExtra in objSetAddedStaffCodeForSheet9:
+            continue
+        objListOutputRowsSheet9.append([pszStaffNameExtra, pszStaffCodeExtra])
+        objSetAddedStaffCodeForSheet9.add(pszStaffCodeExtra)
+
+    for pszStaffCode in objListStaffCode:
+        iRowIndexWithinStaff: int = 0
+        pszStaffNameForSheet8: str = objDictStaffCodeToName.get(pszStaffCode, "")
+        for pszProjectNameSorted in sorted(objDictProjectNamesByStaff.get(pszStaffCode, [])):
+            # 正解スクリプトは Sheet6 のプロジェクト名を前後空白除去してから照合する
+            objKey: Tuple[str, str] = (pszStaffCode, pszProjectNameSorted.strip())
+            if objKey not in objDictSecondsByKey:
+                continue
+            pszTimeTotal: str = objModuleMakeSheet789["convert_seconds_to_time_string"](
+                int(objDictSecondsByKey[objKey]),
+            )
+            pszCompanyName: str = objDictCompanyByKey.get(objKey, "")
+            pszStaffNameForRow: str = pszStaffNameForSheet8 if iRowIndexWithinStaff == 0 else ""
+            objListOutputRowsSheet7.append([objKey[1], pszStaffCode, pszTimeTotal])
+            objListOutputRowsSheet8.append([pszStaffNameForRow, objKey[1], pszStaffCode, pszTimeTotal])
+            objListOutputRowsSheet10.append([objKey[1], pszCompanyName, pszStaffCode, pszTimeTotal])
+            iRowIndexWithinStaff += 1
+
+    return (
+        objListOutputRowsSheet7,
+        objListOutputRowsSheet8,
+        objListOutputRowsSheet9,
+        objListOutputRowsSheet10,
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Sheet4.tsv を読み込み、groupby 方式で Sheet7 / Sheet8 / Sheet9 / Sheet10 を出力する関数。
+# 出力設定は正解スクリプト (make_sheet789_from_sheet4) と同じ。
+#
+# ///////////////////////////////////////////////////////////////
+def make_sheet789_tsv_by_groupby(
+    pszSheet4TsvPath: str,
+    pszSheet7TsvPath: str,
+    pszSheet8TsvPath: str,
+    pszSheet9TsvPath: str,
+    pszSheet10TsvPath: str,
+) -> None:
+    objDataFrameSheet4: pd.DataFrame = pd.read_csv(
+        pszSheet4TsvPath,
+        sep="\t",
+        dtype=str,
+        encoding="utf-8-sig",
+        engine="python",
+    )
+    objSheet4Columns: List[str] = list(objDataFrameSheet4.columns)
+    for pszRequiredColumn in ["スタッフコード", "プロジェクト名", "工数"]:
+        if pszRequiredColumn not in objSheet4Columns:
+            raise ValueError(
+                "required columns not found in Sheet4 TSV. "
+                "Required columns: スタッフコード, プロジェクト名, 工数. "
+                "Columns = {0}".format(", ".join(objSheet4Columns))
+            )
+    objListOutputRowsSheet7: List[List[str]]
+    objListOutputRowsSheet8: List[List[str]]
+    objListOutputRowsSheet9: List[List[str]]
+    objListOutputRowsSheet10: List[List[str]]
+    (
+        objListOutputRowsSheet7,
+        objListOutputRowsSheet8,
+        objListOutputRowsSheet9,
+        objListOutputRowsSheet10,
+    ) = make_sheet789_rows_by_groupby(objDataFrameSheet4)
+    write_tsv_text_utf8(pszSheet7TsvPath, convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet7, None))
+    write_tsv_text_utf8(pszSheet8TsvPath, convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet8, None))
+    write_tsv_text_utf8(
+        pszSheet9TsvPath,
+        convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet9, ["氏名", "スタッフコード"]),
+    )
+    write_tsv_text_utf8(pszSheet10TsvPath, convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet10, None))
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 日付の正規化 (yyyy/m/d → yyyy/mm/dd) を列単位でまとめて行う関数。
+# 正解スクリプト (convert_yyyy_mm_dd.normalize_yyyy_mm_dd_in_dataframe) は
+# 全セルに 1 セルずつ関数を適用しているが、ここでは各列に正規表現の一括抽出を行い、
+# 月・日が範囲内のセルだけを書き換える。文字列以外のセル (欠損値) はそのまま残す。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_yyyy_mm_dd_columns(
+    objDataFrameInput: pd.DataFrame,
+) -> pd.DataFrame:
+    pszDatePattern: str = r"^\s*(\d{4})/(\d{1,2})/(\d{1,2})\s*$"
+    objDataFrameOutput: pd.DataFrame = objDataFrameInput.copy()
+    for iColumnIndex in range(objDataFrameOutput.shape[1]):
+        objSeriesColumn: pd.Series = objDataFrameOutput.iloc[:, iColumnIndex]
+        if objSeriesColumn.dtype != object:
+            continue
+        objDataFrameParts: pd.DataFrame = objSeriesColumn.str.extract(pszDatePattern)
+        objSeriesMatched: pd.Series = objDataFrameParts[0].notna()
+        if not objSeriesMatched.any():
+            continue
+        objDataFrameMatched: pd.DataFrame = objDataFrameParts[objSeriesMatched]
+        objSeriesMonth: pd.Series = objDataFrameMatched[1].map(int)
+        objSeriesDay: pd.Series = objDataFrameMatched[2].map(int)
+        objSeriesValid: pd.Series = (
+            (objSeriesMonth >= 1) & (objSeriesMonth <= 12) & (objSeriesDay >= 1) & (objSeriesDay <= 31)
+        )
+        if not objSeriesValid.any():
+            continue
+        objSeriesNormalized: pd.Series = (
+            objDataFrameMatched.loc[objSeriesValid, 0]
+            + "/"
+            + objSeriesMonth[objSeriesValid].map(lambda iMonth: str(iMonth).zfill(2))
+            + "/"
+            + objSeriesDay[objSeriesValid].map(lambda iDay: str(iDay).zfill(2))
+        )
+        objSeriesColumn = objSeriesColumn.copy()
+        objSeriesColumn.loc[objSeriesNormalized.index] = objSeriesNormalized
+        objDataFrameOutput.isetitem(iColumnIndex, objSeriesColumn)
+    return objDataFrameOutput
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# (2) 未入力行除去・(3) スタッフコード順ソート・(4) 日付正規化を
+# 1 回の走査で行う融合ステージ。
+#
+# 入力は Step1 TSV を keep_default_na=False で読み込んだ DataFrame。
+# ・G〜J 列の判定とスタッフコードの数値化は必要な列だけで行い、
+#   残す行とその並び順 (数値化したスタッフコードの安定ソート) を行番号として求める
+# ・表全体の行の取り出しは 1 回だけ行い、欠損値の扱いは
+#   正解スクリプト (3) が中間 TSV を既定設定で読み直した結果に合わせる
+# ・日付正規化は列単位でまとめて行う
+#
+# bWriteIntermediates が True の場合は、正解スクリプト (2)(3)(4) と同じ
+# 3 つの中間 TSV を同じ設定で書き出す。
+#
+# 戻り値は Sheet4 の DataFrame (正解スクリプト (4) の出力前の状態)。
+# 正解スクリプトがエラー TSV を出力する条件 (10 列未満) に該当した場合は None を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def make_sheet4_dataframe_by_fused_stage(
+    objDataFrameStep1: pd.DataFrame,
+    pszStep2TsvPath: str,
+    pszStep3TsvPath: str,
+    pszSheet4TsvPath: str,
+    bWriteIntermediates: bool,
+) -> pd.DataFrame | None:
+    if objDataFrameStep1.shape[1] < 10:
+        return None
+
+    # (2) G〜J 列のいずれかが「未入力」の行を除く
+    objSeriesHasUninputAny: pd.Series = pd.Series(False, index=objDataFrameStep1.index)
+    for iColumnIndex in range(6, 10):
+        objSeriesHasUninputAny = objSeriesHasUninputAny | (
+            objDataFrameStep1.iloc[:, iColumnIndex].fillna("").astype(str).str.strip() == "未入力"
+        )
+    arrKeepPositions: np.ndarray = np.flatnonzero(~objSeriesHasUninputAny.to_numpy())
+
+    # (3) 残す行のスタッフコードを数値化し、安定ソートで並び順を求める
+    #     (欠損値扱いの文字列は数値化の前に欠損値へ置き換える)
+    objSeriesStaffCode: pd.Series = objDataFrameStep1.iloc[arrKeepPositions, 1].reset_index(drop=True)
+    objSeriesStaffCode = objSeriesStaffCode.mask(objSeriesStaffCode.isin(objPandasDefaultNaValueSet))
+    objSeriesSortKey: pd.Series = pd.to_numeric(objSeriesStaffCode, errors="coerce")
+    arrSortedPositions: np.ndarray = arrKeepPositions[
+        objSeriesSortKey.sort_values(ascending=True, kind="mergesort").index.to_numpy()
+    ]
+
+    objDataFrameStep3: pd.DataFrame = convert_dataframe_to_default_na_view(
+        objDataFrameStep1.iloc[arrSortedPositions],
+    )
+    if bWriteIntermediates:
+        objDataFrameStep1.iloc[arrKeepPositions].to_csv(
+            pszStep2TsvPath,
+            sep="\t",
+            index=False,
+            encoding="utf-8",
+            lineterminator="\n",
+        )
+        objDataFrameStep3.to_csv(
+            pszStep3TsvPath,
+            sep="\t",
+            index=False,
+            encoding="utf-8",
+            lineterminator="\n",
+        )
+
+    # (4) 日付正規化 (Sheet4)
+    objDataFrameSheet4: pd.DataFrame = normalize_yyyy_mm_dd_columns(objDataFrameStep3)
+    if bWriteIntermediates:
+        objDataFrameSheet4.to_csv(
+            pszSheet4TsvPath,
+            sep="\t",
+            index=False,
+            encoding="utf-8",
+        )
+    return objDataFrameSheet4
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# (1)〜(7) をメモリ上で実行し、
+# Sheet7 と Sheet10(スタッフ計上カンパニー名) の行リストを返す関数。
+#
+# 正解スクリプト群は各段で TSV を書き出し、次の段で読み直している。
+# ここでは CSV を 1 回だけ読み、各段には DataFrame / 行リストを直接渡す。
+# 各段の読み込み設定 (keep_default_na の有無など) による値の違いは
+# convert_dataframe_to_default_na_view で再現し、
+# 出力内容は正解スクリプト群の直列実行と一致させる。
+#
+# bKeepIntermediates が True の場合のみ、
+# 正解スクリプト群と同じ中間 TSV を同じ設定で書き出す。
+#
+# 正解スクリプト群がエラー TSV を出力する条件に該当した場合は None を返し、
+# 呼び出し側でファイル経由の処理に切り替えて同じエラー出力を得る。
+#
+# ///////////////////////////////////////////////////////////////
+def build_sheet7_sheet10_lines_in_memory(
+    pszInputCsvPath: str,
+    pszStep1TsvPath: str,
+    pszSheet4TsvPath: str,
+    pszSheet6TsvPath: str,
+    pszSheet7TsvPath: str,
+    pszSheet8TsvPath: str,
+    pszSheet9TsvPath: str,
+    pszSheet10StaffCompanyTsvPath: str,
+    bKeepIntermediates: bool,
+    pszSheet789Engine: str = "reference",
+) -> Tuple[List[str], List[str]] | None:
+    objModuleRemoveUninput: Dict[str, Any] = create_module_from_source(
+        "manhour_remove_uninput_rows",
+        pszSource_manhour_remove_uninput_rows_py,
+    )
+    objModuleSortByStaffCode: Dict[str, Any] = create_module_from_source(
+        "sort_manhour_by_staff_code",
+        pszSource_sort_manhour_by_staff_code_py,
+    )
+    objModuleUniqueStaffCodeList: Dict[str, Any] = create_module_from_source(
+        "make_unique_staff_code_list",
+        pszSource_make_unique_staff_code_list_py,
+    )
+    objModuleMakeRange: Dict[str, Any] = create_module_from_source(
+        "make_staff_code_range",
+        pszSource_make_staff_code_range_py,
+    )
+    objModuleMakeSheet789: Dict[str, Any] = create_module_from_source(
+        "make_sheet789_from_sheet4",
+        pszSource_make_sheet789_from_sheet4_py,
+    )
+
+    #
+    # (1) CSV → TSV (H:MM:SS 化)
+    #     ファイルを 1 回だけ読み込み、文字コード (UTF-8(BOM あり) / cp932) を判定してから
+    #     F列・K列の工数を h:mm:ss にそろえる。
+    #
+    with open(pszInputCsvPath, mode="rb") as objInputFile:
+        pszInputText, _ = decode_text_bytes(objInputFile.read())
+    objRows: List[List[str]] = [
+        list(objRow) for objRow in csv.reader(io.StringIO(pszInputText, newline=""))
+    ]
+    if len(objRows) <= 1:
+        # ヘッダのみの入力は後段でエラー TSV を出力するため、ファイル経由で処理する
+        return None
+
+    # F列「総労働時間」・K列「工数」を列単位でまとめて "h:mm:ss" に揃える
+    for iTimeColumnIndex in (5, 10):
+        normalize_time_column_h_mm_to_h_mm_ss(objRows, iTimeColumnIndex)
+
+    # ヘッダ先頭セルの BOM・ダブルクォートを、正解スクリプトと同じ手順で除去する
+    if len(objRows[0]) >= 1:
+        objRows[0][0] = normalize_csv_header_first_cell(objRows[0][0])
+
+    objStep1TextBuffer: io.StringIO = io.StringIO()
+    objStep1Writer = csv.writer(objStep1TextBuffer, delimiter="\t")
+    for objRow in objRows:
+        objStep1Writer.writerow(objRow)
+    pszStep1TsvText: str = objStep1TextBuffer.getvalue()
+    if bKeepIntermediates:
+        write_tsv_text_utf8(pszStep1TsvPath, pszStep1TsvText)
+
+    # 以降の各段の入力となる表を、ここで 1 回だけ解析する
+    objDataFrameStep1: pd.DataFrame = pd.read_csv(
+        io.StringIO(pszStep1TsvText),
+        sep="\t",
+        dtype=str,
+        keep_default_na=False,
+        engine="python",
+    )
+
+    #
+    # (2) 未入力行除去・(3) スタッフコード順ソート・(4) 日付正規化 (融合ステージ)
+    #
+    pszStep2TsvPath: str = objModuleRemoveUninput["build_output_file_full_path"](pszStep1TsvPath)
+    objDataFrameSheet4Fused: pd.DataFrame | None = make_sheet4_dataframe_by_fused_stage(
+        objDataFrameStep1,
+        pszStep2TsvPath,
+        objModuleSortByStaffCode["build_output_file_full_path"](pszStep2TsvPath),
+        pszSheet4TsvPath,
+        bKeepIntermediates,
+    )
+    if objDataFrameSheet4Fused is None:
+        return None
+    objDataFrameSheet4: pd.DataFrame = objDataFrameSheet4Fused
+    # スタッフコード一覧・範囲は keep_default_na=False で読み直した表を対象とする
+    objDataFrameSheet4Text: pd.DataFrame = objDataFrameSheet4.fillna("")
+    objDataFrameSheet4 = convert_dataframe_to_default_na_view(objDataFrameSheet4)
+    pszStaffCodeColumnName: str = list(objDataFrameSheet4Text.columns)[1]
+
+    #
+    # Sheet4 のスタッフコード一覧 (中間ファイルのみで、後段では使用しない)
+    #
+    if bKeepIntermediates:
+        objListUniqueStaffCode: List[str] = []
+        objSetSeenStaffCode: set[str] = set()
+        for pszValueRaw in objDataFrameSheet4Text.iloc[:, 1].tolist():
+            pszValueStripped: str = str(pszValueRaw).strip()
+            if pszValueStripped == "" or pszValueStripped in objSetSeenStaffCode:
+                continue
+            objSetSeenStaffCode.add(pszValueStripped)
+            objListUniqueStaffCode.append(pszValueStripped)
+        pd.DataFrame({pszStaffCodeColumnName: objListUniqueStaffCode}).to_csv(
+            objModuleUniqueStaffCodeList["build_output_file_full_path"](pszSheet4TsvPath),
+            sep="\t",
+            index=False,
+            encoding="utf-8",
+            lineterminator="\n",
+        )
+
+    #
+    # (5) スタッフコードごとの開始行・終了行
+    #
+    objListRangeStaffCode: List[str]
+    objDictCodeToRange: Dict[str, Tuple[int, int]]
+    objListRangeStaffCode, objDictCodeToRange = objModuleMakeRange["analyze_staff_code_column"](
+        objDataFrameSheet4Text.iloc[:, 1],
+    )
+    if len(objListRangeStaffCode) == 0:
+        return None
+    if bKeepIntermediates:
+        pd.DataFrame(
+            {
+                pszStaffCodeColumnName: objListRangeStaffCode,
+                "開始行": [objDictCodeToRange[pszCode][0] + 2 for pszCode in objListRangeStaffCode],
+                "終了行": [objDictCodeToRange[pszCode][1] + 2 for pszCode in objListRangeStaffCode],
+            }
+        ).to_csv(
+            objModuleMakeRange["build_output_file_full_path"](pszSheet4TsvPath),
+            sep="\t",
+            index=False,
+            encoding="utf-8",
+            lineterminator="\n",
+        )
+    # 後段は範囲 TSV を既定設定で読み直すため、欠損値文字列のコードは "nan" になる
+    objListRangeRows: List[Tuple[str, int, int]] = []
+    for pszCode in objListRangeStaffCode:
+        pszCodeAsRead: str = str(float("nan")) if pszCode in objPandasDefaultNaValueSet else pszCode
+        objListRangeRows.append(
+            (pszCodeAsRead, objDictCodeToRange[pszCode][0], objDictCodeToRange[pszCode][1]),
+        )
+
+    #
+    # (6) スタッフ別担当プロジェクト (Sheet6)
+    #
+    objSheet4Columns: List[str] = list(objDataFrameSheet4.columns)
+    if (
+        ("スタッフコード" not in objSheet4Columns)
+        or ("プロジェクト名" not in objSheet4Columns)
+        or ("工数" not in objSheet4Columns)
+    ):
+        return None
+    # groupby 方式では Sheet6 を使用しないため、中間ファイルを残す場合のみ作成する
+    if bKeepIntermediates or pszSheet789Engine != "groupby":
+        objListProjectListPerStaff: List[List[str]] = []
+        for pszStaffCode, iStartIndex, iEndIndex in objListRangeRows:
+            objDataFrameSub: pd.DataFrame = objDataFrameSheet4.iloc[iStartIndex : iEndIndex + 1]
+            objDataFrameSub = objDataFrameSub[objDataFrameSub["スタッフコード"] == pszStaffCode]
+            objSeriesProject: pd.Series = objDataFrameSub["プロジェクト名"].dropna().astype(str)
+            objSeriesProject = objSeriesProject[objSeriesProject.str.strip() != ""]
+            objListProjectListPerStaff.append(
+                objSeriesProject.sort_values().drop_duplicates().tolist(),
+            )
+        iStaffCount: int = len(objListProjectListPerStaff)
+        iMaxProjectCount: int = max(len(objList) for objList in objListProjectListPerStaff)
+        objSheet6Rows: List[List[str]] = [
+            [str(iIndex + 1) for iIndex in range(iStaffCount)],
+            [pszStaffCode for pszStaffCode, _, _ in objListRangeRows],
+        ]
+        for iProjectIndex in range(iMaxProjectCount):
+            objSheet6Rows.append(
+                [
+                    objProjectList[iProjectIndex] if iProjectIndex < len(objProjectList) else ""
+                    for objProjectList in objListProjectListPerStaff
+                ]
+            )
+        if bKeepIntermediates:
+            write_tsv_text_utf8(
+                pszSheet6TsvPath,
+                convert_rows_to_tsv_text_in_memory(objSheet6Rows, None),
+            )
+        objDataFrameSheet6: pd.DataFrame = convert_dataframe_to_default_na_view(
+            pd.DataFrame(objSheet6Rows),
+        )
+
+    objListOutputRowsSheet7: List[List[str]]
+    objListOutputRowsSheet8: List[List[str]]
+    objListOutputRowsSheet9: List[List[str]]
+    objListOutputRowsSheet10: List[List[str]]
+    if pszSheet789Engine == "groupby":
+        #
+        # (7) Sheet7 / Sheet8 / Sheet9 / Sheet10 (groupby 方式)
+        #
+        (
+            objListOutputRowsSheet7,
+            objListOutputRowsSheet8,
+            objListOutputRowsSheet9,
+            objListOutputRowsSheet10,
+        ) = make_sheet789_rows_by_groupby(objDataFrameSheet4)
+    else:
+        #
+        # (7) Sheet7 / Sheet8 / Sheet9 / Sheet10 (Sheet6 主体アルゴリズム)
+        #
+        pszNameColumn: str = ""
+        if "姓 名" in objSheet4Columns:
+            pszNameColumn = "姓 名"
+        elif "氏名" in objSheet4Columns:
+            pszNameColumn = "氏名"
+        pszCompanyColumn: str = ""
+        for pszCompanyColumnCandidate in ["計上カンパニー名", "計上カンパニー", "所属グループ名", "所属グループ"]:
+            if pszCompanyColumnCandidate in objSheet4Columns:
+                pszCompanyColumn = pszCompanyColumnCandidate
+                break
+
+        objDataFrameSheet4["__time_seconds__"] = convert_time_texts_to_seconds(objDataFrameSheet4["工数"])
+
+        objDictStaffCodeToRange: Dict[str, Tuple[int, int]] = {}
+        for pszStaffCode, iStartIndex, iEndIndex in objListRangeRows:
+            pszStaffCodeRange: str = pszStaffCode.strip()
+            if len(pszStaffCodeRange) > 0 and pszStaffCodeRange not in objDictStaffCodeToRange:
+                objDictStaffCodeToRange[pszStaffCodeRange] = (iStartIndex, iEndIndex)
+
+        objDictStaffCodeToName: Dict[str, str] = {}
+        if pszNameColumn != "":
+            for objStaffCodeValue, objStaffNameValue in zip(
+                objDataFrameSheet4["スタッフコード"].tolist(),
+                objDataFrameSheet4[pszNameColumn].tolist(),
+            ):
+                pszStaffCodeFromSheet4: str = str(objStaffCodeValue).strip()
+                if len(pszStaffCodeFromSheet4) == 0:
+                    continue
+                if pszStaffCodeFromSheet4 not in objDictStaffCodeToName:
+                    objDictStaffCodeToName[pszStaffCodeFromSheet4] = str(objStaffNameValue).strip()
+
+        iSheet6RowCount: int = objDataFrameSheet6.shape[0]
+        iSheet6ColumnCount: int = objDataFrameSheet6.shape[1]
+        objListStaffCodeFromSheet6: List[str] = []
+        for iColumnIndex in range(iSheet6ColumnCount):
+            pszStaffCodeFromSheet6: str = str(objDataFrameSheet6.iat[1, iColumnIndex]).strip()
+            if len(pszStaffCodeFromSheet6) > 0:
+                objListStaffCodeFromSheet6.append(pszStaffCodeFromSheet6)
+
+        objListOutputRowsSheet7 = []
+        objListOutputRowsSheet8 = []
+        objListOutputRowsSheet9 = []
+        objListOutputRowsSheet10 = []
+
+        objSetAddedStaffCodeForSheet9: set[str] = set()
+        for pszStaffCodeForSheet9 in objListStaffCodeFromSheet6:
+            objListOutputRowsSheet9.append(
+                [objDictStaffCodeToName.get(pszStaffCodeForSheet9, ""), pszStaffCodeForSheet9],
+            )
+            objSetAddedStaffCodeForSheet9.add(pszStaffCodeForSheet9)
+        for pszStaffCodeExtra, pszStaffNameExtra in objDictStaffCodeToName.items():
+            if pszStaffCodeExtra in objSetAddedStaffCodeForSheet9:
+                continue
+            objListOutputRowsSheet9.append([pszStaffNameExtra, pszStaffCodeExtra])
+            objSetAddedStaffCodeForSheet9.add(pszStaffCodeExtra)
+
+        for pszStaffCode in objListStaffCodeFromSheet6:
+            if pszStaffCode in objDictStaffCodeToRange:
+                iStartIndex, iEndIndex = objDictStaffCodeToRange[pszStaffCode]
+                objDataFrameSubStaff: pd.DataFrame = objDataFrameSheet4.iloc[iStartIndex : iEndIndex + 1]
+                objDataFrameSubStaff = objDataFrameSubStaff[objDataFrameSubStaff["スタッフコード"] == pszStaffCode]
+            else:
+                objDataFrameSubStaff = objDataFrameSheet4[objDataFrameSheet4["スタッフコード"] == pszStaffCode]
+            if objDataFrameSubStaff.empty:
+                continue
+
+            pszStaffNameForSheet8: str = objDictStaffCodeToName.get(pszStaffCode, "")
+            iRowIndexWithinStaff: int = 0
+            for iColumnIndex in range(iSheet6ColumnCount):
+                if str(objDataFrameSheet6.iat[1, iColumnIndex]).strip() != pszStaffCode:
+                    continue
+                for iRowIndex in range(2, iSheet6RowCount):
+                    pszProjectNameFromSheet6: str = str(objDataFrameSheet6.iat[iRowIndex, iColumnIndex]).strip()
+                    if len(pszProjectNameFromSheet6) == 0:
+                        continue
+                    objDataFrameSubProject: pd.DataFrame = objDataFrameSubStaff[
+                        objDataFrameSubStaff["プロジェクト名"] == pszProjectNameFromSheet6
+                    ]
+                    if objDataFrameSubProject.empty:
+                        continue
+                    try:
+                        iTotalSeconds: int = int(objDataFrameSubProject["__time_seconds__"].sum())
+                    except Exception:
+                        iTotalSeconds = 0
+                    pszTimeTotal: str = objModuleMakeSheet789["convert_seconds_to_time_string"](iTotalSeconds)
+                    pszCompanyName: str = ""
+                    if pszCompanyColumn != "":
+                        objCompanySeries: pd.Series = objDataFrameSubProject[pszCompanyColumn].dropna()
+                        if not objCompanySeries.empty:
+                            pszCompanyName = str(objCompanySeries.iloc[0])
+                    pszStaffNameForRow: str = pszStaffNameForSheet8 if iRowIndexWithinStaff == 0 else ""
+                    objListOutputRowsSheet7.append(
+                        [pszProjectNameFromSheet6, pszStaffCode, pszTimeTotal],
+                    )
+                    objListOutputRowsSheet8.append(
+                        [pszStaffNameForRow, pszProjectNameFromSheet6, pszStaffCode, pszTimeTotal],
+                    )
+                    objListOutputRowsSheet10.append(
+                        [pszProjectNameFromSheet6, pszCompanyName, pszStaffCode, pszTimeTotal],
+                    )
+                    iRowIndexWithinStaff += 1
+                break
+
+    pszSheet7TsvText: str = convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet7, None)
+    pszSheet10TsvText: str = convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet10, None)
+    if bKeepIntermediates:
+        write_tsv_text_utf8(pszSheet7TsvPath, pszSheet7TsvText)
+        write_tsv_text_utf8(
+            pszSheet8TsvPath,
+            convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet8, None),
+        )
+        write_tsv_text_utf8(
+            pszSheet9TsvPath,
+            convert_rows_to_tsv_text_in_memory(objListOutputRowsSheet9, ["氏名", "スタッフコード"]),
+        )
+        write_tsv_text_utf8(pszSheet10StaffCompanyTsvPath, pszSheet10TsvText)
+
+    # テキストモードでファイルを読み直した場合と同じく、改行を \n にそろえた行リストを返す
+    objSheet7Lines: List[str] = io.StringIO(pszSheet7TsvText, newline=None).readlines()
+    objSheet10StaffCompanyLines: List[str] = io.StringIO(pszSheet10TsvText, newline=None).readlines()
+    return objSheet7Lines, objSheet10StaffCompanyLines
 
 
 # ///////////////////////////////////////////////////////////////
@@ -3396,7 +6908,69 @@ def make_project_list_tsv_from_raw_data(
 # main
 #
 # ///////////////////////////////////////////////////////////////
-def process_single_input(pszInputManhourCsvPath: str) -> int:
+# ///////////////////////////////////////////////////////////////
+#
+# 正解スクリプト (6) (7) を実行する月ごとの作業フォルダを作成する関数。
+# 前回の実行で残った作業フォルダは削除してから作り直す。
+#
+# ///////////////////////////////////////////////////////////////
+def prepare_reference_work_directory(
+    objBaseDirectoryPath: Path,
+    iFileYear: int,
+    iFileMonth: int,
+) -> Path:
+    objReferenceWorkDirectoryPath: Path = (
+        objBaseDirectoryPath / "temp" / f"工数_{iFileYear}年{iFileMonth:02d}月_reference_work"
+    )
+    shutil.rmtree(objReferenceWorkDirectoryPath, ignore_errors=True)
+    objReferenceWorkDirectoryPath.mkdir(parents=True, exist_ok=True)
+    return objReferenceWorkDirectoryPath
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダに残ったファイル (正解スクリプトのエラー TSV など) を
+# 入力フォルダに移動し、作業フォルダを削除する関数。
+# 作業フォルダで実行した場合も、入力フォルダで実行した場合と同じ場所にファイルが残る。
+# Sheet4 の複製 (pszReferenceSheet4TsvPath) は移動しない。
+#
+# ///////////////////////////////////////////////////////////////
+def move_back_reference_work_files(
+    objReferenceWorkDirectoryPath: Path,
+    objBaseDirectoryPath: Path,
+    pszReferenceSheet4TsvPath: str,
+) -> None:
+    pszSheet4CopyFileName: str = Path(pszReferenceSheet4TsvPath).name
+    for objWorkFilePath in sorted(objReferenceWorkDirectoryPath.iterdir()):
+        if objWorkFilePath.name == pszSheet4CopyFileName or not objWorkFilePath.is_file():
+            continue
+        os.replace(objWorkFilePath, objBaseDirectoryPath / objWorkFilePath.name)
+    shutil.rmtree(objReferenceWorkDirectoryPath, ignore_errors=True)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# process_single_input前半
+#
+# 入力 CSV から (1)〜(7) を実行し、
+# Sheet7 と Sheet10(計上カンパニー名) の行リストまでを作成する。
+# 管轄PJ表の一時ファイルは読み書きしないため、複数月を別プロセスで同時に実行できる。
+# 別プロセスで実行する場合は bIsolateReferenceSteps=True とし、固定のファイル名に出力する
+# 正解スクリプト (6) (7) を月ごとの作業フォルダで実行する。
+#
+# 戻り値: 後半に渡す値のタプル（Sheet6 の作成に失敗した場合は None）
+#
+# ///////////////////////////////////////////////////////////////
+def process_single_input_first_half(
+    pszInputManhourCsvPath: str,
+    bInMemory: bool = False,
+    bKeepIntermediates: bool = False,
+    pszSheet789Engine: str = "reference",
+    iCsvChunkRowCount: int = 0,
+    bFusedSteps: bool = False,
+    bIncremental: bool = False,
+    bIsolateReferenceSteps: bool = False,
+) -> Tuple[Path, Path, int, int, List[str], List[str], bool] | None:
     objInputPath: Path = Path(pszInputManhourCsvPath)
 
     objCandidatePaths: List[Path] = [objInputPath]
@@ -3428,136 +7002,19 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
 
     objBaseDirectoryPath: Path = objInputPath.resolve().parent
 
-    # (1) CSV → TSV (H:MM:SS 化)
-    objModuleCsvToTsv: Dict[str, Any] = create_module_from_source(
-        "csv_to_tsv_h_mm_ss",
-        pszSource_csv_to_tsv_h_mm_ss_py,
-    )
-    pszStep1DefaultTsvPath: str = objModuleCsvToTsv["convert_csv_to_tsv_file"](
-        str(objInputPath),
-    )
     iFileYear: int
     iFileMonth: int
     iFileYear, iFileMonth = get_target_year_month_from_filename(str(objInputPath))
     pszStep1TsvPath: str = str(
         objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月.tsv"
     )
-    if pszStep1DefaultTsvPath != pszStep1TsvPath:
-        os.replace(pszStep1DefaultTsvPath, pszStep1TsvPath)
-
-    # (2) 未入力行除去
-    objModuleRemoveUninput: Dict[str, Any] = create_module_from_source(
-        "manhour_remove_uninput_rows",
-        pszSource_manhour_remove_uninput_rows_py,
-    )
-    objModuleRemoveUninput["make_removed_uninput_tsv_from_manhour_tsv"](
-        pszStep1TsvPath,
-    )
-    pszStep2TsvPath: str = objModuleRemoveUninput["build_output_file_full_path"](
-        pszStep1TsvPath,
-    )
-
-    # (3) スタッフコード順ソート
-    objModuleSortByStaffCode: Dict[str, Any] = create_module_from_source(
-        "sort_manhour_by_staff_code",
-        pszSource_sort_manhour_by_staff_code_py,
-    )
-    objModuleSortByStaffCode["make_sorted_staff_code_tsv_from_manhour_tsv"](
-        pszStep2TsvPath,
-    )
-    pszStep3TsvPath: str = objModuleSortByStaffCode["build_output_file_full_path"](
-        pszStep2TsvPath,
-    )
-
-    # (4) 日付正規化 → 工数_yyyy年mm月_step04_yyyy_mm_dd.tsv
-    objModuleConvertDate: Dict[str, Any] = create_module_from_source(
-        "convert_yyyy_mm_dd",
-        pszSource_convert_yyyy_mm_dd_py,
-    )
     pszSheet4TsvPath: str = str(
         objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月_step04_yyyy_mm_dd.tsv"
     )
-    objModuleConvertDate["make_sheet4_tsv_from_input_tsv"](
-        pszStep3TsvPath,
-        pszSheet4TsvPath,
-    )
-
-    # Sheet4.tsv からスタッフコード一覧を作成
-    objModuleUniqueStaffCodeList: Dict[str, Any] = create_module_from_source(
-        "make_unique_staff_code_list",
-        pszSource_make_unique_staff_code_list_py,
-    )
-    objModuleUniqueStaffCodeList["make_unique_staff_code_tsv_from_sheet1_tsv"](
-        pszSheet4TsvPath,
-    )
-    pszSheet4UniqueStaffCodeTsvPath: str = objModuleUniqueStaffCodeList[
-        "build_output_file_full_path"
-    ](pszSheet4TsvPath)
-
-    # (5) Sheet4_staff_code_range.tsv
-    objModuleMakeRange: Dict[str, Any] = create_module_from_source(
-        "make_staff_code_range",
-        pszSource_make_staff_code_range_py,
-    )
-    objModuleMakeRange["make_staff_code_range_tsv_from_sheet1_tsv"](
-        pszSheet4TsvPath,
-    )
-    pszSheet4StaffCodeRangeTsvPath: str = objModuleMakeRange[
-        "build_output_file_full_path"
-    ](pszSheet4TsvPath)
-
-    # (6) 工数_yyyy年mm月_step05_スタッフ別担当プロジェクト.tsv
-    objModuleMakeSheet6: Dict[str, Any] = create_module_from_source(
-        "make_sheet6_from_sheet4",
-        pszSource_make_sheet6_from_sheet4_py,
-    )
-    pszSheet6DefaultTsvPath: str = objModuleMakeSheet6["build_output_file_full_path"](
-        pszSheet4TsvPath,
-    )
     pszSheet6TsvPath: str = str(
         objBaseDirectoryPath
         / f"工数_{iFileYear}年{iFileMonth:02d}月_step05_スタッフ別担当プロジェクト.tsv"
     )
-    objModuleMakeSheet6["make_sheet6_from_sheet4"](
-        pszSheet4TsvPath,
-        pszSheet4StaffCodeRangeTsvPath,
-    )
-    if not os.path.isfile(pszSheet6DefaultTsvPath):
-        print(
-            "Error: failed to generate Sheet6 TSV. Path = {0}".format(
-                pszSheet6DefaultTsvPath,
-            )
-        )
-        write_debug_error(
-            "Error: failed to generate Sheet6 TSV. Path = {0}".format(
-                pszSheet6DefaultTsvPath,
-            ),
-            objBaseDirectoryPath,
-        )
-        return 1
-    if pszSheet6DefaultTsvPath != pszSheet6TsvPath:
-        os.replace(pszSheet6DefaultTsvPath, pszSheet6TsvPath)
-
-    # (7) 工数_yyyy年mm月_step06_プロジェクト_タスク_工数.tsv
-    #     工数_yyyy年mm月_step06_旧版_スタッフ別_プロジェクト_タスク_工数.tsv
-    #     工数_yyyy年mm月_step06_旧版_氏名_スタッフコード.tsv
-    #     工数_yyyy年mm月_step06_プロジェクト_計上カンパニー名_タスク_工数.tsv
-    objModuleMakeSheet789: Dict[str, Any] = create_module_from_source(
-        "make_sheet789_from_sheet4",
-        pszSource_make_sheet789_from_sheet4_py,
-    )
-    pszSheet7DefaultTsvPath: str = objModuleMakeSheet789[
-        "build_output_file_full_path_for_sheet7"
-    ](pszSheet4TsvPath)
-    pszSheet8DefaultTsvPath: str = objModuleMakeSheet789[
-        "build_output_file_full_path_for_sheet8"
-    ](pszSheet4TsvPath)
-    pszSheet9DefaultTsvPath: str = objModuleMakeSheet789[
-        "build_output_file_full_path_for_sheet9"
-    ](pszSheet4TsvPath)
-    pszSheet10DefaultTsvPath: str = objModuleMakeSheet789[
-        "build_output_file_full_path_for_sheet10"
-    ](pszSheet4TsvPath)
     pszSheet7TsvPath: str = str(
         objBaseDirectoryPath
         / f"工数_{iFileYear}年{iFileMonth:02d}月_step06_プロジェクト_タスク_工数.tsv"
@@ -3578,19 +7035,9 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         objBaseDirectoryPath
         / f"工数_{iFileYear}年{iFileMonth:02d}月_step06_プロジェクト_計上カンパニー名_タスク_工数.tsv"
     )
-    objModuleMakeSheet789["make_sheet789_from_sheet4"](
-        pszSheet4TsvPath,
-        pszSheet4StaffCodeRangeTsvPath,
-        pszSheet6TsvPath,
-    )
-    if pszSheet7DefaultTsvPath != pszSheet7TsvPath:
-        os.replace(pszSheet7DefaultTsvPath, pszSheet7TsvPath)
-    if pszSheet8DefaultTsvPath != pszSheet8TsvPath:
-        os.replace(pszSheet8DefaultTsvPath, pszSheet8TsvPath)
-    if pszSheet9DefaultTsvPath != pszSheet9TsvPath:
-        os.replace(pszSheet9DefaultTsvPath, pszSheet9TsvPath)
-    if pszSheet10DefaultTsvPath != pszSheet10StaffCompanyTsvPath:
-        os.replace(pszSheet10DefaultTsvPath, pszSheet10StaffCompanyTsvPath)
+
+    # インメモリ・データフローでは、中間 TSV は --keep-intermediates 指定時のみ出力する
+    bWriteIntermediates: bool = (not bInMemory) or bKeepIntermediates
 
     def normalize_company_name_sheet10(pszCompanyName: str) -> str:
         objReplaceTargets: List[Tuple[str, str]] = [
@@ -3612,18 +7059,352 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
                 return pszReplacement
         return pszCompanyName
 
-    with open(pszSheet10StaffCompanyTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        with open(pszSheet10CompanyTaskTsvPath, "w", encoding="utf-8") as objSheet10CompanyOutputFile:
-            for pszLine in objSheet10CompanyFile:
+    # 増分再構築: 入力 CSV・管轄PJ表.csv・コードが前回と同じで、
+    # (1)〜(7) の出力ファイルが記録時のまま残っていれば、それらを再利用する
+    objStepOutputPaths: List[str] = [
+        pszStep1TsvPath,
+        str(objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月_removed_uninput.tsv"),
+        str(
+            objBaseDirectoryPath
+            / f"工数_{iFileYear}年{iFileMonth:02d}月_removed_uninput_sorted_staff_code.tsv"
+        ),
+        pszSheet4TsvPath,
+        str(
+            objBaseDirectoryPath
+            / f"工数_{iFileYear}年{iFileMonth:02d}月_step04_yyyy_mm_dd_unique_staff_code.tsv"
+        ),
+        str(
+            objBaseDirectoryPath
+            / f"工数_{iFileYear}年{iFileMonth:02d}月_step04_yyyy_mm_dd_staff_code_range.tsv"
+        ),
+        pszSheet6TsvPath,
+        pszSheet7TsvPath,
+        pszSheet8TsvPath,
+        pszSheet9TsvPath,
+        pszSheet10StaffCompanyTsvPath,
+        pszSheet10CompanyTaskTsvPath,
+    ]
+    pszStepManifestPath: str = str(
+        objBaseDirectoryPath / "temp" / f"工数_{iFileYear}年{iFileMonth:02d}月_step_manifest.tsv"
+    )
+    objStepManifestKey: Tuple[str, str, str] = ("", "", "")
+    bReuseStepOutputs: bool = False
+    if bIncremental:
+        objStepManifestKey = build_step_manifest_key(str(objInputPath))
+        bReuseStepOutputs = is_step_manifest_up_to_date(
+            pszStepManifestPath,
+            objStepOutputPaths,
+            objStepManifestKey,
+        )
+        if bReuseStepOutputs:
+            print(
+                "Info: inputs are unchanged. Reuse outputs of steps (1)-(7). Input = {0}".format(
+                    objInputPath,
+                )
+            )
+
+    # (1)〜(7) をメモリ上で実行する（失敗時はファイル経由の処理に切り替える）
+    objInMemoryLines: Tuple[List[str], List[str]] | None = None
+    if bInMemory and not bReuseStepOutputs:
+        try:
+            objInMemoryLines = build_sheet7_sheet10_lines_in_memory(
+                str(objInputPath),
+                pszStep1TsvPath,
+                pszSheet4TsvPath,
+                pszSheet6TsvPath,
+                pszSheet7TsvPath,
+                pszSheet8TsvPath,
+                pszSheet9TsvPath,
+                pszSheet10StaffCompanyTsvPath,
+                bKeepIntermediates,
+                pszSheet789Engine,
+            )
+        except Exception as objException:
+            print(
+                "Warning: in-memory dataflow failed. Fallback to file pipeline. Detail = {0}".format(
+                    objException,
+                )
+            )
+            objInMemoryLines = None
+        if objInMemoryLines is None:
+            # ファイル経由の処理は、正解スクリプト群と同じ中間 TSV を必要とする
+            bWriteIntermediates = True
+
+    objSheet7Lines: List[str] = []
+    objSheet10CompanyLines: List[str] = []
+    if objInMemoryLines is not None:
+        objSheet7Lines = objInMemoryLines[0]
+        with open_intermediate_output_file(
+            pszSheet10CompanyTaskTsvPath,
+            bWriteIntermediates,
+        ) as objSheet10CompanyOutputFile:
+            for pszLine in objInMemoryLines[1]:
                 pszLineContent = pszLine.rstrip("\n")
                 if pszLineContent == "":
                     objSheet10CompanyOutputFile.write("\n")
+                    objSheet10CompanyLines.append("\n")
                     continue
                 objColumns = pszLineContent.split("\t")
                 if len(objColumns) > 1:
                     objColumns[1] = normalize_company_name_sheet10(objColumns[1])
                 objSheet10CompanyOutputFile.write("\t".join(objColumns) + "\n")
+                objSheet10CompanyLines.append("\t".join(objColumns) + "\n")
+    elif not bReuseStepOutputs:
+        # (1) CSV → TSV (H:MM:SS 化)
+        if iCsvChunkRowCount > 0:
+            # ストリーミング版: iCsvChunkRowCount 行ずつ読みながら直接 Step1 TSV に書き出す
+            convert_csv_to_tsv_file_streaming(
+                str(objInputPath),
+                pszStep1TsvPath,
+                iCsvChunkRowCount,
+            )
+        else:
+            objModuleCsvToTsv: Dict[str, Any] = create_module_from_source(
+                "csv_to_tsv_h_mm_ss",
+                pszSource_csv_to_tsv_h_mm_ss_py,
+            )
+            pszStep1DefaultTsvPath: str = objModuleCsvToTsv["convert_csv_to_tsv_file"](
+                str(objInputPath),
+            )
+            if pszStep1DefaultTsvPath != pszStep1TsvPath:
+                os.replace(pszStep1DefaultTsvPath, pszStep1TsvPath)
+
+        objModuleRemoveUninput: Dict[str, Any] = create_module_from_source(
+            "manhour_remove_uninput_rows",
+            pszSource_manhour_remove_uninput_rows_py,
+        )
+        pszStep2TsvPath: str = objModuleRemoveUninput["build_output_file_full_path"](
+            pszStep1TsvPath,
+        )
+        objModuleSortByStaffCode: Dict[str, Any] = create_module_from_source(
+            "sort_manhour_by_staff_code",
+            pszSource_sort_manhour_by_staff_code_py,
+        )
+        pszStep3TsvPath: str = objModuleSortByStaffCode["build_output_file_full_path"](
+            pszStep2TsvPath,
+        )
+
+        # (2)〜(4) 融合ステージ: Step1 TSV を 1 回だけ読み、3 つの中間 TSV を書き出す
+        # (正解スクリプトがエラー TSV を出力する入力や、想定外の例外は下の (2)〜(4) で処理する)
+        objDataFrameSheet4Fused: pd.DataFrame | None = None
+        if bFusedSteps:
+            try:
+                objDataFrameSheet4Fused = make_sheet4_dataframe_by_fused_stage(
+                    pd.read_csv(
+                        pszStep1TsvPath,
+                        sep="\t",
+                        encoding="utf-8",
+                        dtype=str,
+                        keep_default_na=False,
+                        engine="python",
+                    ),
+                    pszStep2TsvPath,
+                    pszStep3TsvPath,
+                    pszSheet4TsvPath,
+                    True,
+                )
+            except Exception as objException:
+                print(
+                    "Warning: fused steps (2)-(4) failed. Fallback to reference scripts. Detail = {0}".format(
+                        objException,
+                    )
+                )
+                objDataFrameSheet4Fused = None
+
+        if objDataFrameSheet4Fused is None:
+            # (2) 未入力行除去
+            objModuleRemoveUninput["make_removed_uninput_tsv_from_manhour_tsv"](
+                pszStep1TsvPath,
+            )
+
+            # (3) スタッフコード順ソート
+            objModuleSortByStaffCode["make_sorted_staff_code_tsv_from_manhour_tsv"](
+                pszStep2TsvPath,
+            )
+
+            # (4) 日付正規化 → 工数_yyyy年mm月_step04_yyyy_mm_dd.tsv
+            objModuleConvertDate: Dict[str, Any] = create_module_from_source(
+                "convert_yyyy_mm_dd",
+                pszSource_convert_yyyy_mm_dd_py,
+            )
+            objModuleConvertDate["make_sheet4_tsv_from_input_tsv"](
+                pszStep3TsvPath,
+                pszSheet4TsvPath,
+            )
+
+        # Sheet4.tsv からスタッフコード一覧を作成
+        objModuleUniqueStaffCodeList: Dict[str, Any] = create_module_from_source(
+            "make_unique_staff_code_list",
+            pszSource_make_unique_staff_code_list_py,
+        )
+        objModuleUniqueStaffCodeList["make_unique_staff_code_tsv_from_sheet1_tsv"](
+            pszSheet4TsvPath,
+        )
+        pszSheet4UniqueStaffCodeTsvPath: str = objModuleUniqueStaffCodeList[
+            "build_output_file_full_path"
+        ](pszSheet4TsvPath)
+
+        # (5) Sheet4_staff_code_range.tsv
+        objModuleMakeRange: Dict[str, Any] = create_module_from_source(
+            "make_staff_code_range",
+            pszSource_make_staff_code_range_py,
+        )
+        objModuleMakeRange["make_staff_code_range_tsv_from_sheet1_tsv"](
+            pszSheet4TsvPath,
+        )
+        pszSheet4StaffCodeRangeTsvPath: str = objModuleMakeRange[
+            "build_output_file_full_path"
+        ](pszSheet4TsvPath)
+
+        # 正解スクリプトの (6) (7) は、Sheet4 と同じフォルダの固定のファイル名
+        # (Sheet6.tsv / Sheet7.tsv〜Sheet10.tsv) に出力してから月ごとのファイル名に移動する。
+        # --jobs で複数月を同時に実行する場合は、月ごとの作業フォルダに Sheet4 の複製を置いて実行し、
+        # 他の月のプロセスと同じファイルを上書き・移動し合わないようにする。
+        pszReferenceSheet4TsvPath: str = pszSheet4TsvPath
+        objReferenceWorkDirectoryPath: Path | None = None
+        # 正解スクリプトが例外で終了した場合も、作業フォルダに残ったファイル (エラー TSV など) は
+        # 入力フォルダに移動し、逐次実行した場合と同じ場所に残す
+        try:
+            if bIsolateReferenceSteps:
+                objReferenceWorkDirectoryPath = prepare_reference_work_directory(
+                    objBaseDirectoryPath,
+                    iFileYear,
+                    iFileMonth,
+                )
+                pszReferenceSheet4TsvPath = str(objReferenceWorkDirectoryPath / Path(pszSheet4TsvPath).name)
+                shutil.copyfile(pszSheet4TsvPath, pszReferenceSheet4TsvPath)
+
+            # (6) 工数_yyyy年mm月_step05_スタッフ別担当プロジェクト.tsv
+            objModuleMakeSheet6: Dict[str, Any] = create_module_from_source(
+                "make_sheet6_from_sheet4",
+                pszSource_make_sheet6_from_sheet4_py,
+            )
+            pszSheet6DefaultTsvPath: str = objModuleMakeSheet6["build_output_file_full_path"](
+                pszReferenceSheet4TsvPath,
+            )
+            objModuleMakeSheet6["make_sheet6_from_sheet4"](
+                pszReferenceSheet4TsvPath,
+                pszSheet4StaffCodeRangeTsvPath,
+            )
+            if not os.path.isfile(pszSheet6DefaultTsvPath):
+                print(
+                    "Error: failed to generate Sheet6 TSV. Path = {0}".format(
+                        pszSheet6DefaultTsvPath,
+                    )
+                )
+                write_debug_error(
+                    "Error: failed to generate Sheet6 TSV. Path = {0}".format(
+                        pszSheet6DefaultTsvPath,
+                    ),
+                    objBaseDirectoryPath,
+                )
+                return None
+            if pszSheet6DefaultTsvPath != pszSheet6TsvPath:
+                os.replace(pszSheet6DefaultTsvPath, pszSheet6TsvPath)
+
+            # (7) 工数_yyyy年mm月_step06_プロジェクト_タスク_工数.tsv
+            #     工数_yyyy年mm月_step06_旧版_スタッフ別_プロジェクト_タスク_工数.tsv
+            #     工数_yyyy年mm月_step06_旧版_氏名_スタッフコード.tsv
+            #     工数_yyyy年mm月_step06_プロジェクト_計上カンパニー名_タスク_工数.tsv
+            if pszSheet789Engine == "groupby":
+                # Sheet4 だけを読み込み、(スタッフコード, プロジェクト名) の groupby で集計する
+                make_sheet789_tsv_by_groupby(
+                    pszSheet4TsvPath,
+                    pszSheet7TsvPath,
+                    pszSheet8TsvPath,
+                    pszSheet9TsvPath,
+                    pszSheet10StaffCompanyTsvPath,
+                )
+            else:
+                objModuleMakeSheet789: Dict[str, Any] = create_module_from_source(
+                    "make_sheet789_from_sheet4",
+                    pszSource_make_sheet789_from_sheet4_py,
+                )
+                pszSheet7DefaultTsvPath: str = objModuleMakeSheet789[
+                    "build_output_file_full_path_for_sheet7"
+                ](pszReferenceSheet4TsvPath)
+                pszSheet8DefaultTsvPath: str = objModuleMakeSheet789[
+                    "build_output_file_full_path_for_sheet8"
+                ](pszReferenceSheet4TsvPath)
+                pszSheet9DefaultTsvPath: str = objModuleMakeSheet789[
+                    "build_output_file_full_path_for_sheet9"
+                ](pszReferenceSheet4TsvPath)
+                pszSheet10DefaultTsvPath: str = objModuleMakeSheet789[
+                    "build_output_file_full_path_for_sheet10"
+                ](pszReferenceSheet4TsvPath)
+                objModuleMakeSheet789["make_sheet789_from_sheet4"](
+                    pszReferenceSheet4TsvPath,
+                    pszSheet4StaffCodeRangeTsvPath,
+                    pszSheet6TsvPath,
+                )
+                if pszSheet7DefaultTsvPath != pszSheet7TsvPath:
+                    os.replace(pszSheet7DefaultTsvPath, pszSheet7TsvPath)
+                if pszSheet8DefaultTsvPath != pszSheet8TsvPath:
+                    os.replace(pszSheet8DefaultTsvPath, pszSheet8TsvPath)
+                if pszSheet9DefaultTsvPath != pszSheet9TsvPath:
+                    os.replace(pszSheet9DefaultTsvPath, pszSheet9TsvPath)
+                if pszSheet10DefaultTsvPath != pszSheet10StaffCompanyTsvPath:
+                    os.replace(pszSheet10DefaultTsvPath, pszSheet10StaffCompanyTsvPath)
+        finally:
+            if objReferenceWorkDirectoryPath is not None:
+                move_back_reference_work_files(
+                    objReferenceWorkDirectoryPath,
+                    objBaseDirectoryPath,
+                    pszReferenceSheet4TsvPath,
+                )
+
+        with open(pszSheet10StaffCompanyTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
+            with open(pszSheet10CompanyTaskTsvPath, "w", encoding="utf-8") as objSheet10CompanyOutputFile:
+                for pszLine in objSheet10CompanyFile:
+                    pszLineContent = pszLine.rstrip("\n")
+                    if pszLineContent == "":
+                        objSheet10CompanyOutputFile.write("\n")
+                        continue
+                    objColumns = pszLineContent.split("\t")
+                    if len(objColumns) > 1:
+                        objColumns[1] = normalize_company_name_sheet10(objColumns[1])
+                    objSheet10CompanyOutputFile.write("\t".join(objColumns) + "\n")
+
+    if objInMemoryLines is None:
+        with open(pszSheet7TsvPath, "r", encoding="utf-8") as objSheet7File:
+            objSheet7Lines = objSheet7File.readlines()
+        with open(pszSheet10CompanyTaskTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
+            objSheet10CompanyLines = objSheet10CompanyFile.readlines()
+
+    # 中間ファイルをすべて書き出した場合のみ、次回の再利用に備えてマニフェストを更新する
+    if bIncremental and bWriteIntermediates and not bReuseStepOutputs:
+        write_step_manifest(pszStepManifestPath, objStepOutputPaths, objStepManifestKey)
+
+    return (
+        objInputPath,
+        objBaseDirectoryPath,
+        iFileYear,
+        iFileMonth,
+        objSheet7Lines,
+        objSheet10CompanyLines,
+        bWriteIntermediates,
+    )
+
 
+# ///////////////////////////////////////////////////////////////
+#
+# process_single_input後半
+#
+# 前半で作成した Sheet7 / Sheet10 の行リストから step07〜step11 を作成し、
+# 管轄PJ表の一時ファイル (step0004〜step0008, 管轄PJ表.tsv) を更新する。
+# 管轄PJ表.tsv は前の月の処理結果を引き継ぐため、
+# 複数月を処理する場合も入力順に 1 件ずつ実行する。
+#
+# ///////////////////////////////////////////////////////////////
+def process_single_input_second_half(
+    objInputPath: Path,
+    objBaseDirectoryPath: Path,
+    iFileYear: int,
+    iFileMonth: int,
+    objSheet7Lines: List[str],
+    objSheet10CompanyLines: List[str],
+    bWriteIntermediates: bool,
+) -> int:
     # (8) 工数_yyyy年mm月_step07_計算前_プロジェクト_工数.tsv
     #     工数_yyyy年mm月_step07_計算前_プロジェクト_計上カンパニー名_工数.tsv
     #     工数_yyyy年mm月_step08_合計_プロジェクト_工数.tsv
@@ -3669,15 +7450,6 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
             return True
         return False
 
-    def parse_manhour_to_seconds_sheet11(pszManhour: str) -> int:
-        objMatch = re.match(r"^(\d+):([0-5]\d):([0-5]\d)$", pszManhour)
-        if not objMatch:
-            raise ValueError(f"Invalid manhour format: {pszManhour}")
-        iHours: int = int(objMatch.group(1))
-        iMinutes: int = int(objMatch.group(2))
-        iSeconds: int = int(objMatch.group(3))
-        return iHours * 3600 + iMinutes * 60 + iSeconds
-
     def format_seconds_to_manhour_sheet11(iTotalSeconds: int) -> str:
         if iTotalSeconds < 0:
             raise ValueError("Total seconds must not be negative.")
@@ -3780,13 +7552,8 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     #
     # 2. Sheet7/Sheet10 の生成と正規化
     #
-    with open(pszSheet7TsvPath, "r", encoding="utf-8") as objSheet7File:
-        objSheet7Lines: List[str] = objSheet7File.readlines()
-    with open(pszSheet10CompanyTaskTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        objSheet10CompanyLines: List[str] = objSheet10CompanyFile.readlines()
-
     objSheet10Rows: List[Tuple[str, str]] = []
-    with open(pszSheet10ProjectTsvPath, "w", encoding="utf-8") as objSheet10File:
+    with open_intermediate_output_file(pszSheet10ProjectTsvPath, bWriteIntermediates) as objSheet10File:
         for pszLine in objSheet7Lines:
             pszLineContent: str = pszLine.rstrip("\n")
             if pszLineContent == "":
@@ -3810,11 +7577,14 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
             objSheet10File.write(pszNormalizedName + "\t" + pszManhour + "\n")
             objSheet10Rows.append((pszNormalizedName, pszManhour))
 
-    with open(pszSheet10CompanyTsvPath, "w", encoding="utf-8") as objSheet10CompanyFile:
+    # 書き出した行をそのまま集計用の行リストとして保持する（読み直しは行わない）
+    objSheet10CompanyRows: List[Tuple[str, str, str]] = []
+    with open_intermediate_output_file(pszSheet10CompanyTsvPath, bWriteIntermediates) as objSheet10CompanyFile:
         for pszLine in objSheet10CompanyLines:
             pszLineContent = pszLine.rstrip("\n")
             if pszLineContent == "":
                 objSheet10CompanyFile.write("\t\t\n")
+                objSheet10CompanyRows.append(("", "", ""))
                 continue
             pszLineContent = preprocess_line_content_sheet10(pszLineContent)
             objColumns = pszLineContent.split("\t")
@@ -3838,24 +7608,7 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
             objSheet10CompanyFile.write(
                 pszNormalizedName + "\t" + pszCompanyName + "\t" + pszManhour + "\n",
             )
-
-    objSheet10CompanyRows: List[Tuple[str, str, str]] = []
-    with open(pszSheet10CompanyTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        for pszLine in objSheet10CompanyFile:
-            pszLineContent = pszLine.rstrip("\n")
-            if pszLineContent == "":
-                continue
-            objColumns = pszLineContent.split("\t")
-            pszProjectName = ""
-            pszCompanyName = ""
-            pszManhour = ""
-            if len(objColumns) > 0:
-                pszProjectName = objColumns[0]
-            if len(objColumns) > 1:
-                pszCompanyName = objColumns[1]
-            if len(objColumns) > 2:
-                pszManhour = objColumns[2]
-            objSheet10CompanyRows.append((pszProjectName, pszCompanyName, pszManhour))
+            objSheet10CompanyRows.append((pszNormalizedName, pszCompanyName, pszManhour))
 
     objOrgTableStep0005Sheet10CompanyPath: Path = (
         objTempOrgTableDirectoryPath / "管轄PJ表_step0005_Sheet10Company.tsv"
@@ -3911,19 +7664,25 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     #
     # 3. 集計（プロジェクト別、カンパニー別）
     #
+    # 工数は空行を除いた列全体をまとめて秒数に変換する (不正な工数は ValueError)
+    objSheet10RowsForAggregate: List[Tuple[str, str]] = [
+        (pszProjectName, pszManhour)
+        for pszProjectName, pszManhour in objSheet10Rows
+        if not (pszProjectName == "" and pszManhour == "")
+    ]
+    arrSheet10Seconds: np.ndarray = parse_manhour_texts_to_seconds_strict(
+        [pszManhour for _, pszManhour in objSheet10RowsForAggregate],
+    )
     objAggregatedSeconds: Dict[str, int] = {}
     objAggregatedOrder: List[str] = []
-    for pszProjectName, pszManhour in objSheet10Rows:
-        if pszProjectName == "" and pszManhour == "":
-            continue
-        iSeconds = parse_manhour_to_seconds_sheet11(pszManhour)
+    for (pszProjectName, _), iSeconds in zip(objSheet10RowsForAggregate, arrSheet10Seconds.tolist()):
         if pszProjectName not in objAggregatedSeconds:
             objAggregatedSeconds[pszProjectName] = 0
             objAggregatedOrder.append(pszProjectName)
         objAggregatedSeconds[pszProjectName] += iSeconds
 
     objSheet11Rows: List[Tuple[str, str]] = []
-    with open(pszSheet11TsvPath, "w", encoding="utf-8") as objSheet11File:
+    with open_intermediate_output_file(pszSheet11TsvPath, bWriteIntermediates) as objSheet11File:
         for pszProjectName in objAggregatedOrder:
             pszTotalManhour: str = format_seconds_to_manhour_sheet11(
                 objAggregatedSeconds[pszProjectName],
@@ -3934,10 +7693,18 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     objAggregatedCompanySeconds: Dict[str, int] = {}
     objAggregatedCompanyOrder: List[str] = []
     objAggregatedCompanyNames: Dict[str, List[str]] = {}
-    for pszProjectName, pszCompanyName, pszManhour in objSheet10CompanyRows:
-        if pszProjectName == "" and pszCompanyName == "" and pszManhour == "":
-            continue
-        iSeconds = parse_manhour_to_seconds_sheet11(pszManhour)
+    objSheet10CompanyRowsForAggregate: List[Tuple[str, str, str]] = [
+        (pszProjectName, pszCompanyName, pszManhour)
+        for pszProjectName, pszCompanyName, pszManhour in objSheet10CompanyRows
+        if not (pszProjectName == "" and pszCompanyName == "" and pszManhour == "")
+    ]
+    arrSheet10CompanySeconds: np.ndarray = parse_manhour_texts_to_seconds_strict(
+        [pszManhour for _, _, pszManhour in objSheet10CompanyRowsForAggregate],
+    )
+    for (pszProjectName, pszCompanyName, _), iSeconds in zip(
+        objSheet10CompanyRowsForAggregate,
+        arrSheet10CompanySeconds.tolist(),
+    ):
         if pszProjectName not in objAggregatedCompanySeconds:
             objAggregatedCompanySeconds[pszProjectName] = 0
             objAggregatedCompanyOrder.append(pszProjectName)
@@ -3977,26 +7744,9 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     objOrgTableGroupMap: Dict[str, str] = {}
     objOrgTableTsvPath: Path = objTempOrgTableDirectoryPath / "管轄PJ表.tsv"
     if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    pszBillingGroup: str = objRow[4].strip() if len(objRow) >= 5 else ""
-                    if pszProjectCodeOrg and (pszBillingCompany or pszBillingGroup):
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            if pszBillingCompany and pszProjectCodePrefix not in objOrgTableBillingMap:
-                                objOrgTableBillingMap[pszProjectCodePrefix] = pszBillingCompany
-                            if pszBillingGroup and pszProjectCodePrefix not in objOrgTableGroupMap:
-                                objOrgTableGroupMap[pszProjectCodePrefix] = pszBillingGroup
+        objOrgTableIndex: Dict[str, Any] = load_org_table_index(str(objOrgTableTsvPath))
+        objOrgTableBillingMap = objOrgTableIndex["BillingMapPrefix"]
+        objOrgTableGroupMap = objOrgTableIndex["GroupMapPrefix"]
     objHoldProjectLines: List[str] = []
 
     #
@@ -4032,7 +7782,7 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     #
     # 6. グループ別合計TSVの出力
     #
-    with open(pszSheet11CompanyTsvPath, "w", encoding="utf-8") as objSheet11CompanyFile:
+    with open_intermediate_output_file(pszSheet11CompanyTsvPath, bWriteIntermediates) as objSheet11CompanyFile:
         objSheet11CompanyRows: List[Tuple[str, str, str]] = []
         for pszProjectName in objAggregatedCompanyOrder:
             pszTotalManhour = format_seconds_to_manhour_sheet11(
@@ -4084,7 +7834,7 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         ),
     )
 
-    with open(pszSheet12TsvPath, "w", encoding="utf-8") as objSheet12File:
+    with open_intermediate_output_file(pszSheet12TsvPath, bWriteIntermediates) as objSheet12File:
         for _, objRow in objIndexedSheet11Rows:
             objSheet12File.write(objRow[0] + "\t" + objRow[1] + "\n")
 
@@ -4096,11 +7846,14 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         ),
     )
 
-    with open(pszSheet12CompanyTsvPath, "w", encoding="utf-8") as objSheet12CompanyFile:
+    with open_intermediate_output_file(pszSheet12CompanyTsvPath, bWriteIntermediates) as objSheet12CompanyFile:
         for _, objRow in objIndexedSheet11CompanyRows:
             objSheet12CompanyFile.write(objRow[0] + "\t" + objRow[1] + "\t" + objRow[2] + "\n")
 
-    with open(pszSheet12CompanyGroupTsvPath, "w", encoding="utf-8") as objSheet12CompanyGroupFile:
+    with open_intermediate_output_file(
+        pszSheet12CompanyGroupTsvPath,
+        bWriteIntermediates,
+    ) as objSheet12CompanyGroupFile:
         for _, objRow in objIndexedSheet11CompanyRows:
             pszProjectName, pszCompanyName, pszTotalManhour = objRow
             pszProjectCodePrefix: str = pszProjectName.split("_", 1)[0] + "_"
@@ -4328,37 +8081,52 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     return 0
 
 
+# ///////////////////////////////////////////////////////////////
+#
+# 単一の入力 CSV について、前半・後半を続けて実行する。
+#
+# ///////////////////////////////////////////////////////////////
+def process_single_input(
+    pszInputManhourCsvPath: str,
+    bInMemory: bool = False,
+    bKeepIntermediates: bool = False,
+    pszSheet789Engine: str = "reference",
+    iCsvChunkRowCount: int = 0,
+    bFusedSteps: bool = False,
+    bIncremental: bool = False,
+) -> int:
+    objFirstHalfResult: Tuple[Path, Path, int, int, List[str], List[str], bool] | None = (
+        process_single_input_first_half(
+            pszInputManhourCsvPath,
+            bInMemory,
+            bKeepIntermediates,
+            pszSheet789Engine,
+            iCsvChunkRowCount,
+            bFusedSteps,
+            bIncremental,
+        )
+    )
+    if objFirstHalfResult is None:
+        return 1
+    return process_single_input_second_half(*objFirstHalfResult)
+
+
 
 def load_org_table_billing_map_for_step11() -> Dict[str, str]:
     objBaseDirectoryPath: Path = Path(__file__).resolve().parent
-    objOrgTableCsvPath: Path = objBaseDirectoryPath / "管轄PJ表.csv"
     objTempOrgTableDirectoryPath: Path = objBaseDirectoryPath / "temp" / "管轄PJ表"
     objTempOrgTableDirectoryPath.mkdir(parents=True, exist_ok=True)
     objOrgTableTsvPath: Path = objTempOrgTableDirectoryPath / "管轄PJ表.tsv"
-    objOrgTableBillingMapExact: Dict[str, str] = {}
-    objOrgTableBillingMapPrefix: Dict[str, str] = {}
-    if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    if pszProjectCodeOrg and pszBillingCompany:
-                        objOrgTableBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            objOrgTableBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
-    return {**objOrgTableBillingMapPrefix, **objOrgTableBillingMapExact}
-
-
-def write_step11_from_step10_only(pszStep10Path: str) -> int:
+    if not objOrgTableTsvPath.exists():
+        return {}
+    objOrgTableIndex: Dict[str, Any] = load_org_table_index(str(objOrgTableTsvPath))
+    return {**objOrgTableIndex["BillingMapPrefix"], **objOrgTableIndex["BillingMapExact"]}
+
+
+def write_step11_from_step10_only(
+    pszStep10Path: str,
+    objBillingMap: Dict[str, str] | None = None,
+) -> int:
     objStep10Path: Path = Path(pszStep10Path).resolve()
     objBaseDirectoryPath: Path = objStep10Path.parent
     objMatch: re.Match[str] | None = re.match(
@@ -4372,7 +8140,8 @@ def write_step11_from_step10_only(pszStep10Path: str) -> int:
     iFileMonth: int = int(objMatch.group(2))
 
     pszStep11OutputPath: Path = objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月_step11_各プロジェクトの計上カンパニー名_工数_カンパニーの工数.tsv"
-    objBillingMap: Dict[str, str] = load_org_table_billing_map_for_step11()
+    if objBillingMap is None:
+        objBillingMap = load_org_table_billing_map_for_step11()
 
     with open(objStep10Path, "r", encoding="utf-8") as objStep10File, open(
         pszStep11OutputPath,
@@ -4438,33 +8207,48 @@ def write_step11_from_step10_only(pszStep10Path: str) -> int:
 
 
 
-def load_org_table_billing_map_for_step11() -> Dict[str, str]:
-    objBaseDirectoryPath: Path = Path(__file__).resolve().parent
-    objOrgTableCsvPath: Path = objBaseDirectoryPath / "管轄PJ表.csv"
-    objTempOrgTableDirectoryPath: Path = objBaseDirectoryPath / "temp" / "管轄PJ表"
-    objTempOrgTableDirectoryPath.mkdir(parents=True, exist_ok=True)
-    objOrgTableTsvPath: Path = objTempOrgTableDirectoryPath / "管轄PJ表.tsv"
-    objOrgTableBillingMapExact: Dict[str, str] = {}
-    objOrgTableBillingMapPrefix: Dict[str, str] = {}
-    if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    if pszProjectCodeOrg and pszBillingCompany:
-                        objOrgTableBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            objOrgTableBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
-    return {**objOrgTableBillingMapPrefix, **objOrgTableBillingMapExact}
+# ///////////////////////////////////////////////////////////////
+#
+# step10 のみの入力 (工数_yyyy年mm月_step10_各プロジェクトの工数.tsv) を
+# まとめて step11 に変換する関数。
+# 計上カンパニーのマッピングは最初に 1 回だけ読み込み、全ファイルで共有する。
+# objExecutor を渡した場合は、各ファイルをプロセスプールで同時に変換する
+# (この場合、各ファイルのメッセージの出力順は入れ替わることがある)。
+# 入力順に (終了コード, 発生した例外) を返すジェネレータで、
+# 逐次実行の場合は 1 ファイル変換するごとに結果を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def write_step11_from_step10_batch(
+    objStep10Paths: List[str],
+    objExecutor: ProcessPoolExecutor | None = None,
+) -> Iterator[Tuple[int, Exception | None]]:
+    try:
+        objBillingMap: Dict[str, str] = load_org_table_billing_map_for_step11()
+    except Exception as objException:
+        for _ in objStep10Paths:
+            yield 1, objException
+        return
+
+    if objExecutor is not None and len(objStep10Paths) > 1:
+        objFutures: List[Future] = [
+            objExecutor.submit(write_step11_from_step10_only, pszStep10Path, objBillingMap)
+            for pszStep10Path in objStep10Paths
+        ]
+        for objFuture in objFutures:
+            try:
+                yield objFuture.result(), None
+            except Exception as objException:
+                yield 1, objException
+        return
+
+    for pszStep10Path in objStep10Paths:
+        try:
+            iResult: int = write_step11_from_step10_only(pszStep10Path, objBillingMap)
+        except Exception as objException:
+            yield 1, objException
+            continue
+        yield iResult, None
+
 
 def main() -> int:
     objParser: argparse.ArgumentParser = argparse.ArgumentParser()
@@ -4473,23 +8257,102 @@ def main() -> int:
         nargs="+",
         help="Input Jobcan manhour CSV file paths",
     )
+    objParser.add_argument(
+        "--in-memory",
+        dest="bInMemory",
+        action="store_true",
+        help="Hand over intermediate tables in memory instead of re-reading TSV files",
+    )
+    objParser.add_argument(
+        "--keep-intermediates",
+        dest="bKeepIntermediates",
+        action="store_true",
+        help="Write intermediate TSV files also in --in-memory mode",
+    )
+    objParser.add_argument(
+        "--jobs",
+        dest="iJobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for steps (1)-(7) of each month",
+    )
+    objParser.add_argument(
+        "--sheet789-engine",
+        dest="pszSheet789Engine",
+        choices=["reference", "groupby"],
+        default="reference",
+        help="Engine for Sheet7/8/9/10: reference script or single groupby over (staff code, project)",
+    )
+    objParser.add_argument(
+        "--csv-chunk-rows",
+        dest="iCsvChunkRowCount",
+        type=int,
+        default=0,
+        help="Convert the input CSV to TSV in streaming mode, N rows per chunk (0: read the whole file)",
+    )
+    objParser.add_argument(
+        "--fused-steps",
+        dest="bFusedSteps",
+        action="store_true",
+        help="Run steps (2)-(4) (remove uninput rows, sort by staff code, normalize dates) as one fused stage",
+    )
+    objParser.add_argument(
+        "--incremental",
+        dest="bIncremental",
+        action="store_true",
+        help="Skip steps (1)-(7) when the input CSV, 管轄PJ表.csv and this script are unchanged since the last run",
+    )
     objArgs: argparse.Namespace = objParser.parse_args()
 
     convert_org_table_tsv(Path(__file__).resolve().parent)
 
+    objStep10OnlyPattern: re.Pattern[str] = re.compile(
+        r".*工数_\d{4}年\d{2}月_step10_各プロジェクトの工数\.tsv$",
+    )
+
+    # --jobs 2 以上の場合は、各月の前半 (1)〜(7) をプロセスプールで同時に実行する。
+    # 管轄PJ表.tsv は前の月の結果を引き継ぐため、後半は下のループで入力順に実行し、
+    # 結果と終了コードも入力順に集める。
+    objExecutor: ProcessPoolExecutor | None = None
+    objFirstHalfFutures: Dict[int, Future] = {}
+    if objArgs.iJobs > 1:
+        objExecutor = ProcessPoolExecutor(max_workers=objArgs.iJobs)
+        for iInputIndex, pszInputManhourCsvPath in enumerate(objArgs.pszInputManhourCsvPaths):
+            if objStep10OnlyPattern.match(pszInputManhourCsvPath):
+                continue
+            objFirstHalfFutures[iInputIndex] = objExecutor.submit(
+                process_single_input_first_half,
+                pszInputManhourCsvPath,
+                objArgs.bInMemory,
+                objArgs.bKeepIntermediates,
+                objArgs.pszSheet789Engine,
+                objArgs.iCsvChunkRowCount,
+                objArgs.bFusedSteps,
+                objArgs.bIncremental,
+                True,
+            )
+
+    # step10 のみの入力は、連続している範囲ごとにまとめて step11 に変換する。
+    # 間にある CSV 入力が 管轄PJ表.tsv を更新するため、範囲をまたいではまとめない。
+    objStep10OnlyResults: Iterator[Tuple[int, Exception | None]] | None = None
+
     iExitCode: int = 0
-    for pszInputManhourCsvPath in objArgs.pszInputManhourCsvPaths:
-        if re.match(
-            r".*工数_\d{4}年\d{2}月_step10_各プロジェクトの工数\.tsv$",
-            pszInputManhourCsvPath,
-        ):
-            try:
-                iResultStep10Only: int = write_step11_from_step10_only(pszInputManhourCsvPath)
-            except Exception as objException:
+    for iInputIndex, pszInputManhourCsvPath in enumerate(objArgs.pszInputManhourCsvPaths):
+        if objStep10OnlyPattern.match(pszInputManhourCsvPath):
+            if objStep10OnlyResults is None:
+                objBatchPaths: List[str] = list(
+                    itertools.takewhile(
+                        lambda pszPath: objStep10OnlyPattern.match(pszPath) is not None,
+                        objArgs.pszInputManhourCsvPaths[iInputIndex:],
+                    )
+                )
+                objStep10OnlyResults = write_step11_from_step10_batch(objBatchPaths, objExecutor)
+            iResultStep10Only, objStep10OnlyException = next(objStep10OnlyResults)
+            if objStep10OnlyException is not None:
                 print(
                     "Error: failed to process step10 TSV input: {0}. Detail = {1}".format(
                         pszInputManhourCsvPath,
-                        objException,
+                        objStep10OnlyException,
                     )
                 )
                 iExitCode = 1
@@ -4497,8 +8360,26 @@ def main() -> int:
             if iResultStep10Only != 0:
                 iExitCode = 1
             continue
+        objStep10OnlyResults = None
         try:
-            iResult: int = process_single_input(pszInputManhourCsvPath)
+            if iInputIndex in objFirstHalfFutures:
+                objFirstHalfResult: Tuple[Path, Path, int, int, List[str], List[str], bool] | None = (
+                    objFirstHalfFutures[iInputIndex].result()
+                )
+                if objFirstHalfResult is None:
+                    iResult: int = 1
+                else:
+                    iResult = process_single_input_second_half(*objFirstHalfResult)
+            else:
+                iResult = process_single_input(
+                    pszInputManhourCsvPath,
+                    objArgs.bInMemory,
+                    objArgs.bKeepIntermediates,
+                    objArgs.pszSheet789Engine,
+                    objArgs.iCsvChunkRowCount,
+                    objArgs.bFusedSteps,
+                    objArgs.bIncremental,
+                )
         except Exception as objException:
             print(
                 "Error: failed to process input file: {0}. Detail = {1}".format(
@@ -4511,6 +8392,9 @@ def main() -> int:
         if iResult != 0:
             iExitCode = 1
 
+    if objExecutor is not None:
+        objExecutor.shutdown()
+
     return iExitCode
 
 
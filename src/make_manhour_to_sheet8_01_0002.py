@@ -8,21 +8,33 @@ make_manhour_to_sheet8_01_0002.py
 
 実行例:
   python make_manhour_to_sheet8_01_0002.py manhour_xxxxxx.csv
+  python make_manhour_to_sheet8_01_0002.py --csv-chunk-rows 50000 manhour_xxxxxx.csv
+
+  --csv-chunk-rows N (N >= 1) を指定すると、CSV → TSV を N 行ずつのストリーミングで行い、
+  入力 CSV の行数によらずメモリ使用量を一定に保つ。
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import itertools
 import os
 import re
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import pandas as pd
 from pandas import DataFrame
 
+from manhour_time_codec import (
+    normalize_time_column_h_mm_to_h_mm_ss,
+    normalize_time_text_h_mm_to_h_mm_ss,
+)
+from org_table_index import load_org_table_index
+from project_name_normalizer import normalize_project_name_for_step0004
+
 
 def write_error_text_utf8(pszErrorFilePath: str, pszText: str) -> None:
     with open(pszErrorFilePath, mode="a", encoding="utf-8") as objFile:
@@ -49,21 +61,87 @@ def build_output_file_full_path(pszInputFileFullPath: str, pszOutputSuffix: str)
 
 
 def normalize_time_h_mm_to_h_mm_ss(pszTimeText: str) -> str:
-    pszText: str = (pszTimeText or "").strip()
-    if pszText == "":
-        return ""
-    if pszText.count(":") == 2:
-        return pszText
-    if pszText.count(":") == 1:
-        return pszText + ":00"
-    return pszText
+    return normalize_time_text_h_mm_to_h_mm_ss(pszTimeText)
+
+
+def normalize_csv_header_row(objHeaderRow: List[str]) -> None:
+    pszHeaderFirstCell: str = objHeaderRow[0]
+    if pszHeaderFirstCell.startswith("\ufeff"):
+        pszHeaderFirstCell = pszHeaderFirstCell.lstrip("\ufeff")
+    if (
+        len(pszHeaderFirstCell) >= 2
+        and pszHeaderFirstCell.startswith('"')
+        and pszHeaderFirstCell.endswith('"')
+    ):
+        pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
+        pszHeaderFirstCell = pszHeaderFirstCell.replace('""', '"')
+    if (
+        len(pszHeaderFirstCell) >= 2
+        and pszHeaderFirstCell.startswith('"')
+        and pszHeaderFirstCell.endswith('"')
+    ):
+        pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
+    objHeaderRow[0] = pszHeaderFirstCell
+    if len(objHeaderRow) >= 4 and objHeaderRow[3] == "所属グループ名":
+        objHeaderRow[3] = "所属カンパニー名"
+
+
+def convert_csv_to_tsv_file_streaming(
+    pszInputCsvPath: str,
+    pszOutputTsvPath: str,
+    iChunkRowCount: int,
+) -> str:
+    # ファイル全体を読み込まず、iChunkRowCount 行ずつ H:MM:SS 化して書き出す。
+    # 途中で UnicodeDecodeError になった場合は、次の文字コードで出力を作り直す。
+    arrEncodings: List[str] = ["utf-8-sig", "cp932"]
+    objLastDecodeError: Exception | None = None
+
+    for pszEncoding in arrEncodings:
+        try:
+            with open(
+                pszInputCsvPath,
+                mode="r",
+                encoding=pszEncoding,
+                newline="",
+            ) as objInputFile, open(
+                pszOutputTsvPath,
+                mode="w",
+                encoding="utf-8",
+                newline="",
+            ) as objOutputFile:
+                objReader: csv.reader = csv.reader(objInputFile)
+                objWriter: csv.writer = csv.writer(objOutputFile, delimiter="\t")
+                objHeaderRow: List[str] | None = next(objReader, None)
+                if objHeaderRow is not None:
+                    objChunkRows: List[List[str]] = list(itertools.islice(objReader, iChunkRowCount))
+                    # データ行が無い場合は、ヘッダもそのまま出力する
+                    if len(objChunkRows) > 0 and len(objHeaderRow) >= 1:
+                        normalize_csv_header_row(objHeaderRow)
+                    objWriter.writerow(objHeaderRow)
+                    while len(objChunkRows) > 0:
+                        normalize_time_column_h_mm_to_h_mm_ss(objChunkRows, 5, 0)
+                        normalize_time_column_h_mm_to_h_mm_ss(objChunkRows, 10, 0)
+                        objWriter.writerows(objChunkRows)
+                        objChunkRows = list(itertools.islice(objReader, iChunkRowCount))
+            objLastDecodeError = None
+            break
+        except UnicodeDecodeError as objError:
+            objLastDecodeError = objError
+
+    if objLastDecodeError is not None:
+        if os.path.exists(pszOutputTsvPath):
+            os.remove(pszOutputTsvPath)
+        raise objLastDecodeError
+    return pszOutputTsvPath
 
 
-def convert_csv_to_tsv_file(pszInputCsvPath: str) -> str:
+def convert_csv_to_tsv_file(pszInputCsvPath: str, iChunkRowCount: int = 0) -> str:
     if not os.path.exists(pszInputCsvPath):
         raise FileNotFoundError(f"Input CSV not found: {pszInputCsvPath}")
 
     pszOutputTsvPath: str = build_output_file_full_path(pszInputCsvPath, ".tsv")
+    if iChunkRowCount > 0:
+        return convert_csv_to_tsv_file_streaming(pszInputCsvPath, pszOutputTsvPath, iChunkRowCount)
 
     objRows: List[List[str]] = []
     arrEncodings: List[str] = ["utf-8-sig", "cp932"]
@@ -99,34 +177,11 @@ def convert_csv_to_tsv_file(pszInputCsvPath: str) -> str:
     iTimeColumnIndexF: int = 5
     iTimeColumnIndexK: int = 10
 
-    for iRowIndex in range(1, len(objRows)):
-        objRow: List[str] = objRows[iRowIndex]
-        if iTimeColumnIndexF < len(objRow):
-            objRow[iTimeColumnIndexF] = normalize_time_h_mm_to_h_mm_ss(objRow[iTimeColumnIndexF])
-        if iTimeColumnIndexK < len(objRow):
-            objRow[iTimeColumnIndexK] = normalize_time_h_mm_to_h_mm_ss(objRow[iTimeColumnIndexK])
-        objRows[iRowIndex] = objRow
+    normalize_time_column_h_mm_to_h_mm_ss(objRows, iTimeColumnIndexF)
+    normalize_time_column_h_mm_to_h_mm_ss(objRows, iTimeColumnIndexK)
 
     if len(objRows) >= 1 and len(objRows[0]) >= 1:
-        pszHeaderFirstCell: str = objRows[0][0]
-        if pszHeaderFirstCell.startswith("\ufeff"):
-            pszHeaderFirstCell = pszHeaderFirstCell.lstrip("\ufeff")
-        if (
-            len(pszHeaderFirstCell) >= 2
-            and pszHeaderFirstCell.startswith('"')
-            and pszHeaderFirstCell.endswith('"')
-        ):
-            pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
-            pszHeaderFirstCell = pszHeaderFirstCell.replace('""', '"')
-        if (
-            len(pszHeaderFirstCell) >= 2
-            and pszHeaderFirstCell.startswith('"')
-            and pszHeaderFirstCell.endswith('"')
-        ):
-            pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
-        objRows[0][0] = pszHeaderFirstCell
-        if len(objRows[0]) >= 4 and objRows[0][3] == "所属グループ名":
-            objRows[0][3] = "所属カンパニー名"
+        normalize_csv_header_row(objRows[0])
 
     with open(pszOutputTsvPath, mode="w", encoding="utf-8", newline="") as objOutputFile:
         objWriter: csv.writer = csv.writer(objOutputFile, delimiter="\t")
@@ -498,21 +553,8 @@ def step0004_normalize_project_code(pszProjectCode: str) -> str:
 
 
 def step0004_normalize_project_name(pszProjectName: str) -> str:
-    pszNormalized: str = (pszProjectName or "").replace(" ", "_").replace("　", "_")
-    objMatchP: re.Match[str] | None = re.match(r"^(P\d{5})(.*)$", pszNormalized)
-    if objMatchP is not None:
-        pszCode: str = objMatchP.group(1)
-        pszRest: str = objMatchP.group(2)
-        if pszRest.startswith("【"):
-            pszNormalized = pszCode + "_" + pszRest
-    else:
-        objMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3})(.*)$", pszNormalized)
-        if objMatchOther is not None:
-            pszCodeOther: str = objMatchOther.group(1)
-            pszRestOther: str = objMatchOther.group(2)
-            if pszRestOther.startswith("【"):
-                pszNormalized = pszCodeOther + "_" + pszRestOther
-    return pszNormalized
+    # H列の同じプロジェクト名は何度も現れるため、共通モジュールの LRU メモ付きの関数で正規化する
+    return normalize_project_name_for_step0004(pszProjectName or "")
 
 
 def write_project_normalized_tsv(pszInputFileFullPath: str, pszOutputFileFullPath: str) -> None:
@@ -647,10 +689,7 @@ def build_step0010_company_manhour_output_path(
     )
 
 
-def read_org_table_company_mappings(pszOrgTableTsvPath: str) -> List[Tuple[str, str]]:
-    if not os.path.isfile(pszOrgTableTsvPath):
-        raise FileNotFoundError(f"Org table TSV not found: {pszOrgTableTsvPath}")
-
+def build_org_table_company_index(pszOrgTableTsvPath: str) -> Dict[str, Any]:
     objMappings: List[Tuple[str, str]] = []
     try:
         objOrgDataFrame: DataFrame = pd.read_csv(
@@ -680,7 +719,39 @@ def read_org_table_company_mappings(pszOrgTableTsvPath: str) -> List[Tuple[str,
         pszCompanyName: str = str(objRow[pszCompanyColumn] or "")
         objMappings.append((pszProjectCode, pszCompanyName))
 
-    return objMappings
+    # PJコード → (管轄PJ表での出現順, 計上カンパニー名)。同じPJコードは最初の行だけを残す
+    objPrefixIndex: Dict[str, Tuple[int, str]] = {}
+    for iOrder, (pszProjectCode, pszCompanyName) in enumerate(objMappings):
+        if pszProjectCode != "" and pszProjectCode not in objPrefixIndex:
+            objPrefixIndex[pszProjectCode] = (iOrder, pszCompanyName)
+
+    return {
+        "Mappings": objMappings,
+        "PrefixIndex": objPrefixIndex,
+        "MaxCodeLength": max((len(pszCode) for pszCode in objPrefixIndex), default=0),
+    }
+
+
+def load_org_table_company_index(pszOrgTableTsvPath: str) -> Dict[str, Any]:
+    if not os.path.isfile(pszOrgTableTsvPath):
+        raise FileNotFoundError(f"Org table TSV not found: {pszOrgTableTsvPath}")
+    return load_org_table_index(pszOrgTableTsvPath, "company_mappings", build_org_table_company_index)
+
+
+def read_org_table_company_mappings(pszOrgTableTsvPath: str) -> List[Tuple[str, str]]:
+    return list(load_org_table_company_index(pszOrgTableTsvPath)["Mappings"])
+
+
+def find_org_table_company_by_prefix(objOrgTableIndex: Dict[str, Any], pszProjectCode: str) -> str | None:
+    # 管轄PJ表を先頭から走査して、PJコードが前方一致した最初の行の計上カンパニー名を返すのと同じ結果を、
+    # 入力PJコードの接頭辞ごとの辞書引きで求める
+    objPrefixIndex: Dict[str, Tuple[int, str]] = objOrgTableIndex["PrefixIndex"]
+    objBestEntry: Tuple[int, str] | None = None
+    for iLength in range(1, min(len(pszProjectCode), objOrgTableIndex["MaxCodeLength"]) + 1):
+        objEntry: Tuple[int, str] | None = objPrefixIndex.get(pszProjectCode[:iLength])
+        if objEntry is not None and (objBestEntry is None or objEntry[0] < objBestEntry[0]):
+            objBestEntry = objEntry
+    return objBestEntry[1] if objBestEntry is not None else None
 
 
 def make_step0005_remove_ah_project_tsv(
@@ -885,9 +956,7 @@ def make_step0010_company_manhour_tsv(
         return
 
     try:
-        objMappings: List[Tuple[str, str]] = read_org_table_company_mappings(
-            pszOrgTableTsvPath
-        )
+        objOrgTableIndex: Dict[str, Any] = load_org_table_company_index(pszOrgTableTsvPath)
     except Exception as objException:
         write_error_tsv(
             pszOutputFileFullPath,
@@ -905,11 +974,7 @@ def make_step0010_company_manhour_tsv(
 
     for _, objRow in objDataFrameInput.iterrows():
         pszProjectCode: str = str(objRow[pszProjectColumn] or "")
-        pszNewCompany: str | None = None
-        for pszOrgProjectCode, pszOrgCompanyName in objMappings:
-            if pszOrgProjectCode != "" and pszProjectCode.startswith(pszOrgProjectCode):
-                pszNewCompany = pszOrgCompanyName
-                break
+        pszNewCompany: str | None = find_org_table_company_by_prefix(objOrgTableIndex, pszProjectCode)
         if pszNewCompany is None:
             objCompanyValues.append(str(objRow[pszCompanyColumn] or ""))
             objMissingMask.append(True)
@@ -1011,6 +1076,7 @@ def write_org_table_tsv_from_csv(objBaseDirectoryPath: Path) -> None:
 
 def process_single_input(
     pszInputManhourCsvPath: str,
+    iCsvChunkRowCount: int = 0,
 ) -> tuple[int, Path | None, int | None, int | None, str | None]:
     objInputPath: Path = Path(pszInputManhourCsvPath)
     objCandidatePaths: List[Path] = [objInputPath]
@@ -1042,7 +1108,7 @@ def process_single_input(
 
     objBaseDirectoryPath: Path = objInputPath.resolve().parent
 
-    pszStep1DefaultTsvPath: str = convert_csv_to_tsv_file(str(objInputPath))
+    pszStep1DefaultTsvPath: str = convert_csv_to_tsv_file(str(objInputPath), iCsvChunkRowCount)
     iFileYear, iFileMonth = get_target_year_month_from_filename(str(objInputPath))
     pszStep1TsvPath: str = str(
         objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月.tsv"
@@ -1073,13 +1139,20 @@ def main() -> int:
         nargs="+",
         help="Input Jobcan manhour CSV file paths",
     )
+    objParser.add_argument(
+        "--csv-chunk-rows",
+        dest="iCsvChunkRowCount",
+        type=int,
+        default=0,
+        help="Convert the input CSV to TSV in streaming mode, N rows per chunk (0: read the whole file)",
+    )
     objArgs: argparse.Namespace = objParser.parse_args()
 
     iExitCode: int = 0
     for pszInputManhourCsvPath in objArgs.pszInputManhourCsvPaths:
         try:
             iResult, objBaseDirectoryPath, iYear, iMonth, pszStep0004TsvPath = (
-                process_single_input(pszInputManhourCsvPath)
+                process_single_input(pszInputManhourCsvPath, objArgs.iCsvChunkRowCount)
             )
         except Exception as objException:
             print(
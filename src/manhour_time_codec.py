@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+manhour_time_codec.py
+
+役割:
+  工数の時間文字列 ("h:mm:ss" / "h:mm") と秒数(int) を相互に変換する共通コーデック。
+  pandas.Series / numpy 配列 / list を列単位でまとめて変換する関数を提供する。
+
+  各スクリプトに個別に存在していた 1 セルずつの変換関数と、
+  空文字・不正値・"h:mm" 形式の扱いを完全に一致させている。
+    ◇ 寛容モード (convert_time_texts_to_seconds)
+        空文字・不正値は 0 秒。"h:mm" は bAllowHourMinute=True のときだけ受け付ける。
+    ◇ 厳格モード (parse_manhour_texts_to_seconds_strict)
+        "h:mm:ss" (分・秒は 00-59) 以外は ValueError を送出する。
+
+  ベクトル化の方針:
+    ASCII 数字だけで構成された典型的な値は正規表現の一括抽出で変換し、
+    それ以外 (前後空白の入った部分・符号付き・全角数字など) は
+    従来の 1 セル変換関数へフォールバックして結果を完全に一致させる。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+
+# 高速経路で扱う "h:mm" / "h:mm:ss" の形式
+# (int64 の桁あふれを避けるため、各部の桁数に上限を設ける)
+pszTimeTextFastPattern: str = r"^([0-9]{1,12}):([0-9]{1,12})(?::([0-9]{1,12}))?$"
+# 厳格モードの高速経路 (分・秒は 00-59 の 2 桁)
+pszManhourTextStrictFastPattern: str = r"^([0-9]{1,12}):([0-5][0-9]):([0-5][0-9])$"
+# 厳格モードの 1 セル判定用 (従来の parse_manhour_to_seconds と同じ正規表現)
+objManhourTextStrictPattern: re.Pattern[str] = re.compile(r"^(\d+):([0-5]\d):([0-5]\d)$")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 入力 (Series / numpy 配列 / list など) を object 型の Series に揃える関数。
+# 呼び出し側のインデックスには依存しないよう、0 始まりの連番に振り直す。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_values_to_object_series(
+    objValues: Iterable[Any],
+) -> pd.Series:
+    if isinstance(objValues, pd.Series):
+        return pd.Series(objValues.to_numpy(dtype=object), dtype=object)
+    if isinstance(objValues, np.ndarray):
+        return pd.Series(objValues.astype(object).ravel(), dtype=object)
+    return pd.Series(list(objValues), dtype=object)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 時間文字列 1 件を秒数(int)に変換する関数 (寛容モード)。
+#   ・None / 空文字 / 不正な形式は 0 秒
+#   ・"h:mm:ss" は常に変換
+#   ・"h:mm" は bAllowHourMinute=True のときだけ変換 (False なら 0 秒)
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_text_to_seconds(
+    pszTimeText: Any,
+    bAllowHourMinute: bool = True,
+) -> int:
+    if pszTimeText is None:
+        return 0
+
+    pszWork: str = str(pszTimeText).strip()
+    if len(pszWork) == 0:
+        return 0
+
+    objParts: List[str] = pszWork.split(":")
+    try:
+        if len(objParts) == 3:
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60 + int(objParts[2])
+        if len(objParts) == 2 and bAllowHourMinute:
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60
+    except ValueError:
+        return 0
+    return 0
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 時間文字列の列をまとめて秒数(int64)の numpy 配列に変換する関数 (寛容モード)。
+# 値ごとの結果は convert_time_text_to_seconds と完全に一致する。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_texts_to_seconds(
+    objValues: Iterable[Any],
+    bAllowHourMinute: bool = True,
+) -> np.ndarray:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    arrSeconds: np.ndarray = np.zeros(len(objSeries), dtype=np.int64)
+    if len(objSeries) == 0:
+        return arrSeconds
+
+    # None は 0 秒、それ以外は str() → 前後空白除去の順で 1 セル変換と同じ文字列を作る
+    objSeriesNotNone: pd.Series = objSeries.map(lambda objValue: objValue is not None)
+    objSeriesText: pd.Series = objSeries.map(str).str.strip()
+    objParts: pd.DataFrame = objSeriesText.str.extract(pszTimeTextFastPattern)
+
+    objMaskFast: pd.Series = objParts[0].notna() & objSeriesNotNone
+    if not bAllowHourMinute:
+        objMaskFast &= objParts[2].notna()
+    if objMaskFast.any():
+        objFastParts: pd.DataFrame = objParts[objMaskFast].fillna("0").astype(np.int64)
+        arrSeconds[objMaskFast.to_numpy()] = (
+            objFastParts[0] * 3600 + objFastParts[1] * 60 + objFastParts[2]
+        ).to_numpy()
+
+    # 高速経路に乗らない値のうち、明らかに 0 秒となる空文字と None 以外は 1 セル変換へ
+    objMaskResidual: pd.Series = (~objMaskFast) & objSeriesNotNone & (objSeriesText != "")
+    for iIndex in np.flatnonzero(objMaskResidual.to_numpy()):
+        arrSeconds[iIndex] = convert_time_text_to_seconds(objSeries.iat[iIndex], bAllowHourMinute)
+    return arrSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列 1 件を秒数(int)に変換する関数 (厳格モード)。
+# "h:mm:ss" (分・秒は 00-59) 以外は ValueError を送出する。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_manhour_text_to_seconds_strict(
+    pszManhour: str,
+) -> int:
+    objMatch: re.Match[str] | None = objManhourTextStrictPattern.match(pszManhour)
+    if not objMatch:
+        raise ValueError(f"Invalid manhour format: {pszManhour}")
+    iHours: int = int(objMatch.group(1))
+    iMinutes: int = int(objMatch.group(2))
+    iSeconds: int = int(objMatch.group(3))
+    return iHours * 3600 + iMinutes * 60 + iSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列の列をまとめて秒数(int64)の numpy 配列に変換する関数 (厳格モード)。
+# 不正な値があれば、先頭から見て最初の不正値について
+# parse_manhour_text_to_seconds_strict と同じ ValueError を送出する。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_manhour_texts_to_seconds_strict(
+    objValues: Iterable[str],
+) -> np.ndarray:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    arrSeconds: np.ndarray = np.zeros(len(objSeries), dtype=np.int64)
+    if len(objSeries) == 0:
+        return arrSeconds
+
+    objParts: pd.DataFrame = objSeries.str.extract(pszManhourTextStrictFastPattern)
+    objMaskFast: pd.Series = objParts[0].notna()
+    if objMaskFast.any():
+        objFastParts: pd.DataFrame = objParts[objMaskFast].astype(np.int64)
+        arrSeconds[objMaskFast.to_numpy()] = (
+            objFastParts[0] * 3600 + objFastParts[1] * 60 + objFastParts[2]
+        ).to_numpy()
+
+    # 高速経路に乗らない値は先頭から順に 1 セル判定する (不正値はここで例外になる)
+    for iIndex in np.flatnonzero((~objMaskFast).to_numpy()):
+        arrSeconds[iIndex] = parse_manhour_text_to_seconds_strict(objSeries.iat[iIndex])
+    return arrSeconds
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列 1 件を "h:mm" → "h:mm:ss" に揃える関数。
+# 例: "7:30" -> "7:30:00"
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_text_h_mm_to_h_mm_ss(
+    pszTimeText: str,
+) -> str:
+    pszText: str = (pszTimeText or "").strip()
+    if pszText == "":
+        return ""
+    if pszText.count(":") == 1:
+        return pszText + ":00"
+    return pszText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 工数文字列の列をまとめて "h:mm" → "h:mm:ss" に揃える関数。
+# 値ごとの結果は normalize_time_text_h_mm_to_h_mm_ss と完全に一致する。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_texts_h_mm_to_h_mm_ss(
+    objValues: Iterable[str],
+) -> List[str]:
+    objSeries: pd.Series = convert_values_to_object_series(objValues)
+    if len(objSeries) == 0:
+        return []
+    # (pszTimeText or "") と同じく、偽と評価される値は空文字として扱う
+    objSeriesText: pd.Series = objSeries.map(lambda objValue: objValue or "").str.strip()
+    objMaskHourMinute: pd.Series = objSeriesText.str.count(":") == 1
+    objSeriesText[objMaskHourMinute] = objSeriesText[objMaskHourMinute] + ":00"
+    return objSeriesText.tolist()
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 行リスト (List[List[str]]) の指定列を、その場で "h:mm:ss" に揃える関数。
+# 列数が足りない行はそのまま残す。iStartRowIndex より前の行 (ヘッダ) は対象外。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_time_column_h_mm_to_h_mm_ss(
+    objRows: List[List[str]],
+    iColumnIndex: int,
+    iStartRowIndex: int = 1,
+) -> None:
+    objTargetRows: List[List[str]] = [
+        objRow for objRow in objRows[iStartRowIndex:] if iColumnIndex < len(objRow)
+    ]
+    objNormalizedTexts: List[str] = normalize_time_texts_h_mm_to_h_mm_ss(
+        [objRow[iColumnIndex] for objRow in objTargetRows],
+    )
+    for objRow, pszNormalizedText in zip(objTargetRows, objNormalizedTexts):
+        objRow[iColumnIndex] = pszNormalizedText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 秒数の列をまとめて "h:mm:ss" 文字列のリストに変換する関数。
+# 0 以下の秒数は pszZeroText (既定 "0:00:00") を出力する。
+#
+# ///////////////////////////////////////////////////////////////
+def format_seconds_to_time_texts(
+    objSeconds: Iterable[int],
+    pszZeroText: str = "0:00:00",
+) -> List[str]:
+    arrSeconds: np.ndarray = np.asarray(list(objSeconds), dtype=np.int64)
+    if arrSeconds.size == 0:
+        return []
+    arrHours: np.ndarray = arrSeconds // 3600
+    arrMinutes: np.ndarray = (arrSeconds % 3600) // 60
+    arrRemainSeconds: np.ndarray = arrSeconds % 60
+    objTexts: List[str] = [
+        f"{iHour}:{iMinute:02d}:{iSecond:02d}" if iTotal > 0 else pszZeroText
+        for iTotal, iHour, iMinute, iSecond in zip(
+            arrSeconds.tolist(),
+            arrHours.tolist(),
+            arrMinutes.tolist(),
+            arrRemainSeconds.tolist(),
+        )
+    ]
+    return objTexts
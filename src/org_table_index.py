@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+org_table_index.py
+
+役割:
+  管轄PJ表 (TSV) から作成した検索用インデックス
+  (PJコード接頭辞 → 計上カンパニー / 計上グループ、本部の行など) をキャッシュする共通モジュール。
+
+  インデックスの作り方は利用するスクリプトごとに異なるため、
+  作成関数 (pfnBuildIndex) は呼び出し側が渡す。本モジュールは
+    ◇ 同一プロセス内のメモ (2 回目以降は dict をそのまま返す)
+    ◇ temp/org_table_index_cache/ 以下のバイナリキャッシュ (marshal)
+  の 2 段でインデックスを再利用する。
+
+  キャッシュの有効性:
+    管轄PJ表の mtime・サイズ・SHA-256 と、作成関数を定義したスクリプトの SHA-256 を記録する。
+    mtime とサイズが記録と一致し、かつ mtime がキャッシュ作成時刻より十分古い場合は
+    ハッシュ計算を省略する。それ以外は SHA-256 を比較し、内容が同じなら再利用する
+    (同じ内容で上書きされただけの管轄PJ表.tsv では作り直さない)。
+    キャッシュの読み書きに失敗した場合は、通常どおりインデックスを作成する。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import time
+from typing import Any, Callable, Dict, Tuple
+
+
+# mtime だけでは更新を見分けられない可能性がある時間幅 (ナノ秒)。
+# キャッシュ作成時刻との差がこれより小さい mtime は、ハッシュで確認する。
+iOrgTableIndexRacyMarginNs: int = 2 * 1000 * 1000 * 1000
+
+# 同一プロセス内のメモ: (管轄PJ表のパス, インデックス種別) → キャッシュと同じ形式のレコード
+# (mtime, サイズ, SHA-256, 作成関数のスクリプトの SHA-256, 記録時刻, インデックス)
+objOrgTableIndexMemo: Dict[Tuple[str, str], Tuple[int, int, str, str, int, Dict[str, Any]]] = {}
+# 作成関数を定義したスクリプトの SHA-256 (スクリプトのパス → ハッシュ)
+objBuilderSourceHashCache: Dict[str, str] = {}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ファイル内容の SHA-256 を求める関数
+#
+# ///////////////////////////////////////////////////////////////
+def compute_file_sha256(
+    pszFilePath: str,
+) -> str:
+    objHash = hashlib.sha256()
+    with open(pszFilePath, mode="rb") as objFile:
+        while True:
+            objChunk: bytes = objFile.read(1024 * 1024)
+            if not objChunk:
+                break
+            objHash.update(objChunk)
+    return objHash.hexdigest()
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作成関数を定義したスクリプトの SHA-256 を返す関数。
+# スクリプトが変更された場合は、キャッシュを使わずに作り直す。
+#
+# ///////////////////////////////////////////////////////////////
+def get_builder_source_hash(
+    pfnBuildIndex: Callable[[str], Dict[str, Any]],
+) -> str:
+    pszBuilderSourcePath: str = os.path.abspath(pfnBuildIndex.__code__.co_filename)
+    if pszBuilderSourcePath not in objBuilderSourceHashCache:
+        pszHash: str = ""
+        if os.path.isfile(pszBuilderSourcePath):
+            pszHash = compute_file_sha256(pszBuilderSourcePath)
+        objBuilderSourceHashCache[pszBuilderSourcePath] = pszHash
+    return objBuilderSourceHashCache[pszBuilderSourcePath]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイナリキャッシュのパスを返す関数。
+# 管轄PJ表のフルパスとインデックス種別ごとに 1 ファイルとする。
+#
+# ///////////////////////////////////////////////////////////////
+def build_org_table_index_cache_path(
+    pszOrgTablePath: str,
+    pszIndexKind: str,
+) -> str:
+    pszPathHash: str = hashlib.sha256(pszOrgTablePath.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "temp",
+        "org_table_index_cache",
+        f"{pszIndexKind}_{pszPathHash}.bin",
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイナリキャッシュを読み込む関数。
+# 読み込めない・形式が異なる場合は None を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def read_org_table_index_cache(
+    pszCachePath: str,
+) -> Tuple[int, int, str, str, int, Dict[str, Any]] | None:
+    objMagicNumberBytes: bytes = importlib.util.MAGIC_NUMBER
+    try:
+        with open(pszCachePath, mode="rb") as objCacheFile:
+            objCacheBytes: bytes = objCacheFile.read()
+        if not objCacheBytes.startswith(objMagicNumberBytes):
+            return None
+        objRecord: Any = marshal.loads(objCacheBytes[len(objMagicNumberBytes) :])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(objRecord, tuple) or len(objRecord) != 6 or not isinstance(objRecord[5], dict):
+        return None
+    return objRecord
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイナリキャッシュを書き出す関数。
+# 並列実行時に書きかけのファイルを読まないよう、一時ファイル経由で置き換える。
+#
+# ///////////////////////////////////////////////////////////////
+def write_org_table_index_cache(
+    pszCachePath: str,
+    objRecord: Tuple[int, int, str, str, int, Dict[str, Any]],
+) -> None:
+    try:
+        os.makedirs(os.path.dirname(pszCachePath), exist_ok=True)
+        pszTemporaryPath: str = f"{pszCachePath}.{os.getpid()}.tmp"
+        with open(pszTemporaryPath, mode="wb") as objCacheFile:
+            objCacheFile.write(importlib.util.MAGIC_NUMBER + marshal.dumps(objRecord))
+        os.replace(pszTemporaryPath, pszCachePath)
+    except (OSError, ValueError):
+        pass
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 管轄PJ表のインデックスを返す関数。
+#   pszOrgTablePath : 管轄PJ表 (TSV) のパス (呼び出し側で存在を確認しておく)
+#   pszIndexKind    : インデックスの種別 (キャッシュファイル名に使う)
+#   pfnBuildIndex   : 管轄PJ表のパスからインデックスを作成する関数
+#                     (str / int / list / tuple / dict だけで構成された dict を返すこと)
+# 返却した dict はメモと共有しているため、呼び出し側で変更しないこと。
+#
+# ///////////////////////////////////////////////////////////////
+def load_org_table_index(
+    pszOrgTablePath: str,
+    pszIndexKind: str,
+    pfnBuildIndex: Callable[[str], Dict[str, Any]],
+) -> Dict[str, Any]:
+    pszOrgTablePath = os.path.abspath(pszOrgTablePath)
+    objStat: os.stat_result = os.stat(pszOrgTablePath)
+    iMtimeNs: int = objStat.st_mtime_ns
+    iSize: int = objStat.st_size
+    pszBuilderSourceHash: str = get_builder_source_hash(pfnBuildIndex)
+
+    objMemoKey: Tuple[str, str] = (pszOrgTablePath, pszIndexKind)
+    pszCachePath: str = build_org_table_index_cache_path(pszOrgTablePath, pszIndexKind)
+    objRecord = objOrgTableIndexMemo.get(objMemoKey)
+    if objRecord is None:
+        objRecord = read_org_table_index_cache(pszCachePath)
+    if objRecord is not None and objRecord[3] != pszBuilderSourceHash:
+        objRecord = None
+
+    # mtime・サイズが一致し、mtime が記録時刻より十分古ければハッシュ計算を省略する
+    if (
+        objRecord is not None
+        and objRecord[0] == iMtimeNs
+        and objRecord[1] == iSize
+        and iMtimeNs + iOrgTableIndexRacyMarginNs < objRecord[4]
+    ):
+        objOrgTableIndexMemo[objMemoKey] = objRecord
+        return objRecord[5]
+
+    # 内容が同じであれば、mtime だけを記録し直してインデックスを再利用する
+    pszSourceHash: str = compute_file_sha256(pszOrgTablePath)
+    objIndex: Dict[str, Any]
+    if objRecord is not None and objRecord[2] == pszSourceHash:
+        objIndex = objRecord[5]
+    else:
+        objIndex = pfnBuildIndex(pszOrgTablePath)
+    objRecord = (iMtimeNs, iSize, pszSourceHash, pszBuilderSourceHash, time.time_ns(), objIndex)
+    write_org_table_index_cache(pszCachePath, objRecord)
+    objOrgTableIndexMemo[objMemoKey] = objRecord
+    return objIndex
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+project_name_normalizer.py
+
+役割:
+  プロジェクト名 (例: "P12345 xxx" / "A001　xxx" / "【廃番】J001xxx") の正規化を行う共通モジュール。
+  損益計算書 (PL_CsvToTsv_Cmd.py)、Sheet10 (Sheet7ToSheet10_NormalizeProjectName_Cmd.py)、
+  step0004 (make_manhour_to_sheet8_01_0002.py) の各スクリプトに個別に存在していた正規化関数と、
+  結果を完全に一致させている。
+    ◇ normalize_project_name_for_pl       : 損益計算書のヘッダ行・科目名行のセル
+    ◇ normalize_project_name_for_sheet7   : Sheet7ToSheet10 (【...】 の後ろのコードは移さない)
+    ◇ normalize_project_name_for_step0004 : step0004 の H列 (空白を "_" にそろえる)
+
+  高速化の方針:
+    正規表現はモジュールの読み込み時に 1 回だけコンパイルする。
+    同じプロジェクト名は月・ファイルをまたいで何度も現れるため、
+    関数ごとに上限付きの LRU メモ (iProjectNameMemoSize 件) で結果を再利用する。
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+
+# LRU メモの上限 (関数ごと)
+iProjectNameMemoSize: int = 4096
+
+# 損益計算書のセルの前処理 (コードの直後に "_" を入れる・コード直後の空白を "_" にする)
+objPlCodeWithoutSeparatorPattern: re.Pattern[str] = re.compile(r"(P\d{5})(?![ _\t　【])")
+objPlOtherCodeWithoutSeparatorPattern: re.Pattern[str] = re.compile(r"([A-OQ-Z]\d{3})(?![ _\t　【])")
+objPlLeadingJCodeSpacePattern: re.Pattern[str] = re.compile(r"^(J\d{3}) +")
+objPlOtherCodeSpacePattern: re.Pattern[str] = re.compile(r"([A-OQ-Z]\d{3})[ 　]+")
+objPlCodeSpacePattern: re.Pattern[str] = re.compile(r"(P\d{5})[ 　]+")
+# 【...】 の後ろにあるコード
+objCodeAfterBracketPattern: re.Pattern[str] = re.compile(r"(P\d{5}|[A-OQ-Z]\d{3})")
+# step0004 の先頭のコード
+objStep0004CodePattern: re.Pattern[str] = re.compile(r"^(P\d{5})(.*)$")
+objStep0004OtherCodePattern: re.Pattern[str] = re.compile(r"^([A-OQ-Z]\d{3})(.*)$")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 【廃番】 で始まるプロジェクト名のコードを先頭に移す関数。
+# J / A / C / H / M / P の順に、コードの長さ (P は 6 文字、それ以外は 4 文字) が
+# 収まる最初の位置をコードとみなす。見つからない場合は None を返す。
+#
+# ///////////////////////////////////////////////////////////////
+def move_discontinued_project_code(
+    pszSource: str,
+) -> str | None:
+    for pszPrefix in ["J", "A", "C", "H", "M", "P"]:
+        iCodeLength: int = 6 if pszPrefix == "P" else 4
+        iFoundIndex: int = pszSource.find(pszPrefix)
+        while iFoundIndex != -1:
+            if iFoundIndex + iCodeLength <= len(pszSource):
+                pszCode: str = pszSource[iFoundIndex : iFoundIndex + iCodeLength]
+                return pszCode + "_" + pszSource[:iFoundIndex] + pszSource[iFoundIndex + iCodeLength :]
+            iFoundIndex = pszSource.find(pszPrefix, iFoundIndex + 1)
+    return None
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 正規化の共通部分:
+#   1) 【廃番】 で始まる場合は、コードを先頭に移す
+#   2) bMoveCodeAfterBracket=True で 【 で始まる場合は、】 の後ろのコードを先頭に移す
+#   3) コード (J/A/C/H/M は 4 文字、P は 6 文字) の直後の 【 の前に "_" を入れ、
+#      直後の空白 1 文字を "_" に置き換える
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_project_name_core(
+    pszSource: str,
+    bMoveCodeAfterBracket: bool,
+) -> str:
+    if pszSource.startswith("【廃番】"):
+        pszMoved: str | None = move_discontinued_project_code(pszSource)
+        return pszSource if pszMoved is None else pszMoved
+
+    if bMoveCodeAfterBracket and pszSource.startswith("【"):
+        iBracketEndIndex: int = pszSource.find("】")
+        if iBracketEndIndex != -1:
+            pszAfterBracket: str = pszSource[iBracketEndIndex + 1 :]
+            objMatch: re.Match[str] | None = objCodeAfterBracketPattern.search(pszAfterBracket)
+            if objMatch is not None:
+                pszAfterCode: str = pszAfterBracket[objMatch.end() :]
+                if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
+                    pszAfterCode = pszAfterCode[1:]
+                return (
+                    objMatch.group(1)
+                    + "_"
+                    + pszSource[: iBracketEndIndex + 1]
+                    + pszAfterBracket[: objMatch.start()]
+                    + pszAfterCode
+                )
+
+    if len(pszSource) >= 1 and pszSource[0] in "JACHM":
+        if len(pszSource) >= 5:
+            if pszSource[4] == "【":
+                return pszSource[:4] + "_" + pszSource[4:]
+            if pszSource[4] == " " or pszSource[4] == "　":
+                return pszSource[:4] + "_" + pszSource[5:]
+        return pszSource
+
+    if len(pszSource) >= 1 and pszSource[0] == "P":
+        if len(pszSource) >= 7:
+            if pszSource[6] == "【":
+                return pszSource[:6] + "_" + pszSource[6:]
+            if pszSource[6] == " " or pszSource[6] == "　":
+                return pszSource[:6] + "_" + pszSource[7:]
+        return pszSource
+
+    return pszSource
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 損益計算書のセルのプロジェクト名を正規化する関数。
+# タブを "_" に置き換え、コードの直後に "_" をそろえてから共通部分を適用する。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=iProjectNameMemoSize)
+def normalize_project_name_for_pl(
+    pszProjectName: str,
+) -> str:
+    if pszProjectName == "":
+        return pszProjectName
+    pszNormalized: str = pszProjectName.replace("\t", "_")
+    pszNormalized = objPlCodeWithoutSeparatorPattern.sub(r"\1_", pszNormalized)
+    pszNormalized = objPlOtherCodeWithoutSeparatorPattern.sub(r"\1_", pszNormalized)
+    pszNormalized = objPlLeadingJCodeSpacePattern.sub(r"\1_", pszNormalized)
+    pszNormalized = objPlOtherCodeSpacePattern.sub(r"\1_", pszNormalized)
+    pszNormalized = objPlCodeSpacePattern.sub(r"\1_", pszNormalized)
+    return normalize_project_name_core(pszNormalized, True)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# Sheet7ToSheet10 のプロジェクト名を正規化する関数。
+# make_manhour_to_sheet8_01_0001.py の Sheet10 と異なり、【...】 の後ろのコードは先頭に移さない。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=iProjectNameMemoSize)
+def normalize_project_name_for_sheet7(
+    pszSource: str,
+) -> str:
+    return normalize_project_name_core(pszSource, False)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# step0004 のプロジェクト名 (H列) を正規化する関数。
+# 空白 (半角・全角) を "_" にそろえ、先頭のコードの直後が 【 の場合は "_" を入れる。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=iProjectNameMemoSize)
+def normalize_project_name_for_step0004(
+    pszProjectName: str,
+) -> str:
+    pszNormalized: str = pszProjectName.replace(" ", "_").replace("　", "_")
+    objMatch: re.Match[str] | None = objStep0004CodePattern.match(pszNormalized)
+    if objMatch is None:
+        objMatch = objStep0004OtherCodePattern.match(pszNormalized)
+    if objMatch is not None and objMatch.group(2).startswith("【"):
+        return objMatch.group(1) + "_" + objMatch.group(2)
+    return pszNormalized
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+text_encoding_loader.py
+
+役割:
+  UTF-8(BOM あり/なし) または cp932 の CSV / TSV を、1 回の読み込みで判定・デコードする共通ローダー。
+
+  従来は utf-8-sig でファイル全体を読み、途中で UnicodeDecodeError になった場合は
+  最初から cp932 で読み直していた (cp932 の入力は毎回 2 回読み込まれていた)。
+  本モジュールはファイルのバイト列を 1 回だけ読み、
+    ◇ 先頭の BOM (EF BB BF) があれば utf-8-sig
+    ◇ なければ先頭の一定バイト数 (iEncodingSampleByteCount) を UTF-8 として試し、
+      デコードできれば utf-8-sig、できなければ cp932
+  と判定してから、バイト列全体をデコードする。
+
+  判定結果の互換性:
+    先頭のサンプルが UTF-8 として正しくても、それ以降に UTF-8 として不正なバイトがある場合は、
+    従来どおり cp932 でデコードし直す (ファイルは読み直さない)。
+    cp932 でもデコードできない場合は、従来と同じく cp932 の UnicodeDecodeError を送出する。
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+from typing import List, Tuple
+
+
+# UTF-8 かどうかを判定する先頭のバイト数
+iEncodingSampleByteCount: int = 64 * 1024
+# 判定の候補 (従来の読み込み順)
+pszEncodingUtf8Sig: str = "utf-8-sig"
+pszEncodingCp932: str = "cp932"
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイト列の先頭 (BOM または先頭 iSampleByteCount バイト) から文字コードを判定する関数。
+# 戻り値は "utf-8-sig" または "cp932"。
+# サンプルの末尾で途切れた UTF-8 の文字は、不正なバイトとはみなさない。
+#
+# ///////////////////////////////////////////////////////////////
+def detect_text_encoding(
+    objBytes: bytes,
+    iSampleByteCount: int = iEncodingSampleByteCount,
+) -> str:
+    if objBytes.startswith(codecs.BOM_UTF8):
+        return pszEncodingUtf8Sig
+    objSampleBytes: bytes = objBytes[:iSampleByteCount]
+    try:
+        codecs.getincrementaldecoder("utf-8")("strict").decode(
+            objSampleBytes,
+            final=len(objSampleBytes) == len(objBytes),
+        )
+    except UnicodeDecodeError:
+        return pszEncodingCp932
+    return pszEncodingUtf8Sig
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バイト列を判定した文字コードでデコードする関数。
+# 戻り値: (文字列, 使用した文字コード)
+# utf-8-sig と判定したバイト列が途中で UTF-8 として不正な場合は、cp932 でデコードし直す。
+#
+# ///////////////////////////////////////////////////////////////
+def decode_text_bytes(
+    objBytes: bytes,
+) -> Tuple[str, str]:
+    pszEncoding: str = detect_text_encoding(objBytes)
+    if pszEncoding == pszEncodingUtf8Sig:
+        try:
+            return objBytes.decode(pszEncodingUtf8Sig), pszEncodingUtf8Sig
+        except UnicodeDecodeError:
+            pass
+    return objBytes.decode(pszEncodingCp932), pszEncodingCp932
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ファイルを 1 回だけ読み込み、文字コードを判定してデコードする関数。
+# 戻り値: (文字列, 使用した文字コード)
+#
+# ///////////////////////////////////////////////////////////////
+def read_text_file_with_encoding_detection(
+    pszInputFilePath: str,
+) -> Tuple[str, str]:
+    with open(pszInputFilePath, mode="rb") as objFile:
+        objBytes: bytes = objFile.read()
+    return decode_text_bytes(objBytes)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# CSV / TSV ファイルを 1 回だけ読み込み、文字コードを判定して行リストに変換する関数。
+# open(..., newline="") で読み込んだ場合と同じく、改行は csv.reader に任せる。
+# 戻り値: (行リスト, 使用した文字コード)
+#
+# ///////////////////////////////////////////////////////////////
+def read_csv_rows_with_encoding_detection(
+    pszInputFilePath: str,
+    pszDelimiter: str = ",",
+) -> Tuple[List[List[str]], str]:
+    pszText, pszEncoding = read_text_file_with_encoding_detection(pszInputFilePath)
+    objRows: List[List[str]] = list(
+        csv.reader(io.StringIO(pszText, newline=""), delimiter=pszDelimiter),
+    )
+    return objRows, pszEncoding
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+test_formula_workbook.py
+
+役割:
+  make_manhour_to_sheet8_01_0001.py の数式エンジン (Raw_Data.tsv と *_Formula.tsv から
+  Project_List.tsv / Staff_List.tsv / With_Salary.tsv を作成する処理) の回帰テスト。
+
+  永続キャッシュ (temp/) がリポジトリ内に作られないように、スクリプトは一時フォルダに
+  コピーしてから読み込む。
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import shutil
+import sys
+import types
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+
+objRepositoryPath: Path = Path(__file__).resolve().parents[1]
+objSourceScriptPath: Path = objRepositoryPath / "src" / "make_manhour_to_sheet8_01_0001.py"
+objInputDirectoryPath: Path = objRepositoryPath / "input"
+objExpectedDirectoryPath: Path = objRepositoryPath / "expected"
+
+# 1 回の評価で作成する数式シート (出力ファイル名に使う)
+objFormulaSheetNames: List[str] = ["Project_List", "Staff_List", "With_Salary"]
+
+# 数式シートごとの正解ファイル。
+# expected/answer_With_Salary.tsv は給与の集計表 (With_Salary_Formula.tsv とは別のレイアウト) のため、
+# With_Salary は数式シートの評価結果である expected/With_Salary.tsv と比較する。
+objExpectedTsvPaths: Dict[str, Path] = {
+    "Project_List": objExpectedDirectoryPath / "answer_Project_List.tsv",
+    "Staff_List": objExpectedDirectoryPath / "answer_Staff_List.tsv",
+    "With_Salary": objExpectedDirectoryPath / "With_Salary.tsv",
+}
+
+iLoadedScriptCount: int = 0
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 正解ファイルの内容を文字列にする関数。
+# 正解ファイルは UTF-8 (BOM 付きを含む) と cp932 が混在しているため、
+# UTF-8 で読めない場合は cp932 で読み直す。
+#
+# ///////////////////////////////////////////////////////////////
+def decode_text_with_fallback(
+    objBytes: bytes,
+) -> str:
+    try:
+        return objBytes.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return objBytes.decode("cp932")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダにコピーしたスクリプトをモジュールとして読み込む関数。
+# 読み込みごとに別のモジュール名にし、プロセス内のメモを持ち越さない。
+#
+# ///////////////////////////////////////////////////////////////
+def load_script_module(
+    objWorkDirectoryPath: Path,
+    objMonkeyPatch: pytest.MonkeyPatch,
+) -> types.ModuleType:
+    global iLoadedScriptCount
+    iLoadedScriptCount += 1
+    pszModuleName: str = f"make_manhour_to_sheet8_01_0001_formula_test{iLoadedScriptCount}"
+    objScriptPath: Path = objWorkDirectoryPath / objSourceScriptPath.name
+    if not objScriptPath.exists():
+        shutil.copyfile(objSourceScriptPath, objScriptPath)
+    objSpec = importlib.util.spec_from_file_location(pszModuleName, objScriptPath)
+    objModule = importlib.util.module_from_spec(objSpec)
+    # iJobs > 1 のワーカープロセスが関数をモジュール名で参照できるように登録する
+    objMonkeyPatch.setitem(sys.modules, pszModuleName, objModule)
+    objSpec.loader.exec_module(objModule)
+    return objModule
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 3 つの数式シートを 1 回の評価で作成し、(シート名 → 出力 TSV の内容) の dict を返す関数。
+# 出力は pszOutputPrefix + "_" + シート名 + ".tsv" に書き出す。
+# bWriteStatistics=True の場合は、シートごとの計測結果 (*_statistics.tsv) も出力する。
+#
+# ///////////////////////////////////////////////////////////////
+def make_formula_outputs(
+    objWorkDirectoryPath: Path,
+    objMonkeyPatch: pytest.MonkeyPatch,
+    pszOutputPrefix: str,
+    bUsePersistentCache: bool = False,
+    iJobs: int = 1,
+    bWriteStatistics: bool = False,
+) -> Dict[str, bytes]:
+    objModule = load_script_module(objWorkDirectoryPath, objMonkeyPatch)
+    objOutputPaths: Dict[str, Path] = {
+        pszSheetName: objWorkDirectoryPath / f"{pszOutputPrefix}_{pszSheetName}.tsv"
+        for pszSheetName in objFormulaSheetNames
+    }
+    objModule.make_project_staff_salary_list_tsvs_from_raw_data(
+        str(objWorkDirectoryPath / "Raw_Data.tsv"),
+        str(objInputDirectoryPath / "Project_List_Formula.tsv"),
+        str(objInputDirectoryPath / "Staff_List_Formula.tsv"),
+        str(objInputDirectoryPath / "With_Salary_Formula.tsv"),
+        str(objOutputPaths["Project_List"]),
+        str(objOutputPaths["Staff_List"]),
+        str(objOutputPaths["With_Salary"]),
+        bWriteStatistics,
+        bUsePersistentCache,
+        iJobs,
+    )
+    return {pszSheetName: objPath.read_bytes() for pszSheetName, objPath in objOutputPaths.items()}
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 永続キャッシュを使う場合も、キャッシュ作成時・キャッシュ利用時・Raw_Data.tsv の一部を
+# 変更した後 (変更に関係する SUMIFS のグループだけを評価し直す) のいずれでも、
+# キャッシュを使わない評価と同じ出力になること
+#
+# ///////////////////////////////////////////////////////////////
+def test_persistent_cache_matches_uncached_evaluation(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    objRawDataTsvPath: Path = tmp_path / "Raw_Data.tsv"
+    shutil.copyfile(objInputDirectoryPath / "Raw_Data.tsv", objRawDataTsvPath)
+    objUncachedOutputs: Dict[str, bytes] = make_formula_outputs(tmp_path, monkeypatch, "uncached")
+
+    # 1 回目: キャッシュを作成する
+    assert make_formula_outputs(tmp_path, monkeypatch, "cache_created", True) == objUncachedOutputs
+    assert list(tmp_path.glob("temp/formula_workbook_cache/*")) != []
+    # 2 回目: 作成したキャッシュを利用する
+    assert make_formula_outputs(tmp_path, monkeypatch, "cache_reused", True) == objUncachedOutputs
+
+    # Raw_Data.tsv の 1 行の時間を変更し、キャッシュから一部だけを評価し直す
+    objRawDataLines: List[str] = objRawDataTsvPath.read_text(encoding="utf-8").split("\n")
+    assert "\tタスク1\t19:45\t" in objRawDataLines[4]
+    objRawDataLines[4] = objRawDataLines[4].replace("\tタスク1\t19:45\t", "\tタスク1\t21:45\t")
+    objRawDataTsvPath.write_text("\n".join(objRawDataLines), encoding="utf-8")
+    objChangedUncachedOutputs: Dict[str, bytes] = make_formula_outputs(tmp_path, monkeypatch, "changed_uncached")
+    assert objChangedUncachedOutputs != objUncachedOutputs
+    assert make_formula_outputs(tmp_path, monkeypatch, "changed_cached", True) == objChangedUncachedOutputs
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 3 つの数式シートを 1 回の評価で作成した結果が、それぞれの正解と一致すること
+#
+# ///////////////////////////////////////////////////////////////
+def test_formula_outputs_match_answers(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shutil.copyfile(objInputDirectoryPath / "Raw_Data.tsv", tmp_path / "Raw_Data.tsv")
+    objOutputs: Dict[str, bytes] = make_formula_outputs(tmp_path, monkeypatch, "serial")
+    for pszSheetName in objFormulaSheetNames:
+        assert decode_text_with_fallback(objOutputs[pszSheetName]) == decode_text_with_fallback(
+            objExpectedTsvPaths[pszSheetName].read_bytes()
+        ), pszSheetName
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 3 行目以降を行の範囲に分けてプロセスプールで評価しても、1 プロセスで評価した場合と
+# バイト単位で同じ出力になること
+#
+# ///////////////////////////////////////////////////////////////
+@pytest.mark.parametrize("iJobs", [2, 3])
+def test_parallel_formula_outputs_match_serial(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    iJobs: int,
+) -> None:
+    shutil.copyfile(objInputDirectoryPath / "Raw_Data.tsv", tmp_path / "Raw_Data.tsv")
+    objSerialOutputs: Dict[str, bytes] = make_formula_outputs(tmp_path, monkeypatch, "serial")
+    assert make_formula_outputs(tmp_path, monkeypatch, "parallel", iJobs=iJobs) == objSerialOutputs
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# bWriteStatistics=True の場合は、出力 TSV と同じフォルダにシートごとの *_statistics.tsv が
+# 作成され、関数ごとの呼び出し回数・キャッシュのヒット/ミス・依存の最大深さが記録されること。
+# 計測を有効にしても、出力 TSV は計測しない場合と同じであること。
+#
+# ///////////////////////////////////////////////////////////////
+def test_formula_statistics_tsv_is_written_next_to_output(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shutil.copyfile(objInputDirectoryPath / "Raw_Data.tsv", tmp_path / "Raw_Data.tsv")
+    objOutputs: Dict[str, bytes] = make_formula_outputs(tmp_path, monkeypatch, "plain")
+    assert make_formula_outputs(tmp_path, monkeypatch, "stats", bWriteStatistics=True) == objOutputs
+
+    for pszSheetName in objFormulaSheetNames:
+        objStatisticsTsvPath: Path = tmp_path / f"stats_{pszSheetName}_statistics.tsv"
+        objRows: List[List[str]] = [
+            pszLine.split("\t")
+            for pszLine in objStatisticsTsvPath.read_text(encoding="utf-8").splitlines()
+        ]
+        assert objRows[0] == ["区分", "名前", "値", "累積時間(秒)"]
+        objFunctionNames: List[str] = [objRow[1] for objRow in objRows if objRow[0] == "Function"]
+        assert any(pszFunctionName.startswith("SUMIFS") for pszFunctionName in objFunctionNames)
+        assert "INDEX" in objFunctionNames
+        assert "MATCH" in objFunctionNames
+        assert any(objRow[0] == "CacheHit" for objRow in objRows)
+        assert any(objRow[0] == "CacheMiss" for objRow in objRows)
+        objMaxDepthRows: List[List[str]] = [
+            objRow for objRow in objRows if objRow[0] == "Dependency" and objRow[1] == "MaxDepth"
+        ]
+        assert len(objMaxDepthRows) == 1
+        assert int(objMaxDepthRows[0][2]) > 0
+    assert list(tmp_path.glob("plain_*_statistics.tsv")) == []
@@ -0,0 +1,670 @@
+# -*- coding: utf-8 -*-
+"""
+test_make_manhour_to_sheet8_01_0001.py
+
+役割:
+  make_manhour_to_sheet8_01_0001.py の実行モードごとの出力を比較する回帰テスト。
+  input/ のジョブカン工数 CSV から複数月分の入力を作り、一時フォルダで main() を実行する。
+
+  警告ダイアログ (tkinter) は画面のない環境では表示できないため、
+  tk / messagebox だけを何もしない実装に置き換えて実行する。
+"""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import os
+import re
+import shutil
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+
+objRepositoryPath: Path = Path(__file__).resolve().parents[1]
+objSourceScriptPath: Path = objRepositoryPath / "src" / "make_manhour_to_sheet8_01_0001.py"
+objInputManhourCsvPath: Path = objRepositoryPath / "input" / "manhour_202511181454691c0a3179197.csv"
+
+# 比較対象から除くファイル・フォルダ (実行環境ごとのキャッシュ・スクリプト本体)
+objIgnoredRelativePaths: List[str] = [
+    "make_manhour_to_sheet8_01_0001.py",
+    "__pycache__",
+    "temp/embedded_module_cache",
+    "temp/org_table_index_cache",
+]
+# 管轄PJ表.csv の計上カンパニー (プロジェクトの出現順に割り当てる)
+objOrgTableCompanyNames: List[str] = ["第一インキュ", "第二インキュ", "事業開発", "本部"]
+
+iLoadedScriptCount: int = 0
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 入力 CSV の行 (ヘッダを除く) を読み込む関数
+#
+# ///////////////////////////////////////////////////////////////
+def read_manhour_csv_rows() -> List[List[str]]:
+    with open(objInputManhourCsvPath, "r", encoding="utf-8-sig", newline="") as objFile:
+        return list(csv.reader(objFile))
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダにスクリプト・管轄PJ表.csv・月ごとの入力 CSV を用意する関数。
+# objMonthRowRanges: 入力ファイル名 → 入力 CSV のデータ行の範囲 (開始, 終了)
+#
+# ///////////////////////////////////////////////////////////////
+def prepare_work_directory(
+    objWorkDirectoryPath: Path,
+    objMonthRowRanges: Dict[str, tuple[int, int]],
+) -> None:
+    objWorkDirectoryPath.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(objSourceScriptPath, objWorkDirectoryPath / objSourceScriptPath.name)
+
+    objRows: List[List[str]] = read_manhour_csv_rows()
+    objHeaderRow: List[str] = objRows[0]
+    objDataRows: List[List[str]] = objRows[1:]
+    for pszFileName, (iStartRowIndex, iEndRowIndex) in objMonthRowRanges.items():
+        with open(objWorkDirectoryPath / pszFileName, "w", encoding="utf-8-sig", newline="") as objFile:
+            objWriter = csv.writer(objFile, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+            objWriter.writerow(objHeaderRow)
+            objWriter.writerows(objDataRows[iStartRowIndex:iEndRowIndex])
+
+    # 管轄PJ表.csv: 入力に現れるプロジェクトを出現順に並べ、計上カンパニーを順に割り当てる
+    iProjectNameColumnIndex: int = objHeaderRow.index("プロジェクト名")
+    objProjectNames: List[str] = list(
+        dict.fromkeys(
+            objRow[iProjectNameColumnIndex].strip()
+            for objRow in objDataRows
+            if len(objRow) > iProjectNameColumnIndex and objRow[iProjectNameColumnIndex].strip() != ""
+        )
+    )
+    with open(objWorkDirectoryPath / "管轄PJ表.csv", "w", encoding="utf-8", newline="") as objFile:
+        objWriter = csv.writer(objFile, lineterminator="\n")
+        objWriter.writerow(["No", "PJ名称", "PJコード", "計上カンパニー", "計上グループ"])
+        for iIndex, pszProjectName in enumerate(objProjectNames):
+            objWriter.writerow(
+                [
+                    str(iIndex + 1),
+                    pszProjectName,
+                    pszProjectName.replace("　", "_").replace(" ", "_", 1),
+                    objOrgTableCompanyNames[iIndex % len(objOrgTableCompanyNames)],
+                    f"G{iIndex % 3}",
+                ]
+            )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダのスクリプトをモジュールとして読み込む関数。
+# 読み込みごとに別のモジュールとし、プロセス内のメモを持ち越さない。
+#
+# ///////////////////////////////////////////////////////////////
+def load_script_module(
+    objWorkDirectoryPath: Path,
+    objMonkeyPatch: pytest.MonkeyPatch,
+) -> types.ModuleType:
+    global iLoadedScriptCount
+    iLoadedScriptCount += 1
+    pszModuleName: str = f"make_manhour_to_sheet8_01_0001_test{iLoadedScriptCount}"
+    objSpec = importlib.util.spec_from_file_location(
+        pszModuleName,
+        objWorkDirectoryPath / objSourceScriptPath.name,
+    )
+    objModule = importlib.util.module_from_spec(objSpec)
+    # --jobs のワーカープロセスが関数をモジュール名で参照できるように登録する
+    objMonkeyPatch.setitem(sys.modules, pszModuleName, objModule)
+    objSpec.loader.exec_module(objModule)
+
+    class FakeTk:
+        def withdraw(self) -> None:
+            pass
+
+        def destroy(self) -> None:
+            pass
+
+    objModule.tk = types.SimpleNamespace(Tk=FakeTk)
+    objModule.messagebox = types.SimpleNamespace(showwarning=lambda *objArgs, **objKwargs: None)
+    objMonkeyPatch.chdir(objWorkDirectoryPath)
+    return objModule
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダのスクリプトを読み込み、指定した引数で main() を実行する関数
+#
+# ///////////////////////////////////////////////////////////////
+def run_script_main(
+    objWorkDirectoryPath: Path,
+    objArguments: List[str],
+    objMonkeyPatch: pytest.MonkeyPatch,
+) -> int:
+    objModule = load_script_module(objWorkDirectoryPath, objMonkeyPatch)
+    objMonkeyPatch.setattr(sys, "argv", [str(objWorkDirectoryPath / objSourceScriptPath.name)] + objArguments)
+    return objModule.main()
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダの出力を (相対パス → 内容) の dict にする関数。
+# エラーテキストなどに含まれる作業フォルダのパスは "<work>" に置き換える。
+#
+# ///////////////////////////////////////////////////////////////
+def read_output_tree(
+    objWorkDirectoryPath: Path,
+) -> Dict[str, bytes]:
+    objOutputs: Dict[str, bytes] = {}
+    objWorkPathBytes: bytes = str(objWorkDirectoryPath).encode("utf-8")
+    for objPath in sorted(objWorkDirectoryPath.rglob("*")):
+        pszRelativePath: str = objPath.relative_to(objWorkDirectoryPath).as_posix()
+        if any(
+            pszRelativePath == pszIgnored or pszRelativePath.startswith(pszIgnored + "/")
+            for pszIgnored in objIgnoredRelativePaths
+        ):
+            continue
+        if objPath.is_file():
+            objOutputs[pszRelativePath] = objPath.read_bytes().replace(objWorkPathBytes, b"<work>")
+    return objOutputs
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 2 つの出力を比較し、異なるファイルの一覧をメッセージにして assert する関数
+#
+# ///////////////////////////////////////////////////////////////
+def assert_same_output_tree(
+    objExpectedOutputs: Dict[str, bytes],
+    objActualOutputs: Dict[str, bytes],
+) -> None:
+    objDifferentPaths: List[str] = [
+        pszRelativePath
+        for pszRelativePath in sorted(set(objExpectedOutputs) | set(objActualOutputs))
+        if objExpectedOutputs.get(pszRelativePath) != objActualOutputs.get(pszRelativePath)
+    ]
+    assert objDifferentPaths == []
+
+
+# 複数月の入力 (同じフォルダに置き、入力順に処理する)
+objMultiMonthRowRanges: Dict[str, tuple[int, int]] = {
+    "工数25.4.csv": (0, 2400),
+    "工数25.5.csv": (2400, 4800),
+    "工数25.6.csv": (4800, 7200),
+    "工数25.7.csv": (1200, 3600),
+}
+
+
+@pytest.fixture(scope="module")
+def objSerialMultiMonthOutputs(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, bytes]:
+    objWorkDirectoryPath: Path = tmp_path_factory.mktemp("serial")
+    prepare_work_directory(objWorkDirectoryPath, objMultiMonthRowRanges)
+    with pytest.MonkeyPatch.context() as objMonkeyPatch:
+        iExitCode: int = run_script_main(
+            objWorkDirectoryPath,
+            list(objMultiMonthRowRanges),
+            objMonkeyPatch,
+        )
+    assert iExitCode == 0
+    return read_output_tree(objWorkDirectoryPath)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --jobs で複数月の前半を同時に実行しても、逐次実行と同じ出力になること。
+# 正解スクリプトの Sheet6.tsv / Sheet7.tsv〜Sheet10.tsv は固定のファイル名に出力されるため、
+# os.replace を遅らせて各月のプロセスが重なりやすい状態で確認する。
+#
+# ///////////////////////////////////////////////////////////////
+def test_jobs_matches_serial_for_multiple_months(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    pfnReplace = os.replace
+
+    def replace_slowly(objSourcePath: str, objDestinationPath: str) -> None:
+        time.sleep(0.05)
+        pfnReplace(objSourcePath, objDestinationPath)
+
+    monkeypatch.setattr(os, "replace", replace_slowly)
+    prepare_work_directory(tmp_path, objMultiMonthRowRanges)
+    iExitCode: int = run_script_main(
+        tmp_path,
+        ["--jobs", "4"] + list(objMultiMonthRowRanges),
+        monkeypatch,
+    )
+    assert iExitCode == 0
+    assert_same_output_tree(objSerialMultiMonthOutputs, read_output_tree(tmp_path))
+    assert list(tmp_path.glob("temp/*_reference_work")) == []
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 作業フォルダで実行した正解スクリプト (7) が例外で終了しても、
+# 作業フォルダに残ったエラー TSV は入力フォルダに移動され、作業フォルダは削除されること
+#
+# ///////////////////////////////////////////////////////////////
+def test_isolated_reference_step_failure_moves_back_work_files(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    prepare_work_directory(tmp_path, {"工数25.4.csv": (0, 600)})
+    objModule = load_script_module(tmp_path, monkeypatch)
+    pfnCreateModuleFromSource = objModule.create_module_from_source
+
+    def make_sheet789_from_sheet4_failing(
+        pszSheet4TsvPath: str,
+        pszStaffCodeRangeTsvPath: str,
+        pszSheet6TsvPath: str,
+    ) -> None:
+        Path(pszSheet4TsvPath).with_name("Sheet7_error.tsv").write_text("Error: test\n", encoding="utf-8")
+        raise RuntimeError("make_sheet789_from_sheet4 failed")
+
+    def create_module_from_source_failing(pszModuleName: str, pszSourceCode: str) -> Dict[str, object]:
+        objGlobals = pfnCreateModuleFromSource(pszModuleName, pszSourceCode)
+        if pszModuleName != "make_sheet789_from_sheet4":
+            return objGlobals
+        return dict(objGlobals, make_sheet789_from_sheet4=make_sheet789_from_sheet4_failing)
+
+    monkeypatch.setattr(objModule, "create_module_from_source", create_module_from_source_failing)
+    with pytest.raises(RuntimeError):
+        objModule.process_single_input_first_half("工数25.4.csv", bIsolateReferenceSteps=True)
+    assert (tmp_path / "Sheet7_error.tsv").read_text(encoding="utf-8") == "Error: test\n"
+    assert list(tmp_path.glob("temp/*_reference_work")) == []
+
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 指定した実行モードの引数を付けて複数月の入力を処理し、
+# 既定モード (逐次実行) の出力と比較する関数
+#
+# ///////////////////////////////////////////////////////////////
+def assert_mode_matches_default(
+    objWorkDirectoryPath: Path,
+    objMonkeyPatch: pytest.MonkeyPatch,
+    objSerialOutputs: Dict[str, bytes],
+    objModeArguments: List[str],
+) -> None:
+    prepare_work_directory(objWorkDirectoryPath, objMultiMonthRowRanges)
+    iExitCode: int = run_script_main(
+        objWorkDirectoryPath,
+        objModeArguments + list(objMultiMonthRowRanges),
+        objMonkeyPatch,
+    )
+    assert iExitCode == 0
+    assert_same_output_tree(objSerialOutputs, read_output_tree(objWorkDirectoryPath))
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --in-memory でも、--keep-intermediates で中間 TSV を書き出せば既定モードと同じ出力になること
+#
+# ///////////////////////////////////////////////////////////////
+def test_in_memory_with_intermediates_matches_default(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    assert_mode_matches_default(
+        tmp_path,
+        monkeypatch,
+        objSerialMultiMonthOutputs,
+        ["--in-memory", "--keep-intermediates"],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --in-memory で中間 TSV を書き出さない場合も、書き出したファイルは既定モードと同じ内容であり、
+# 各月の step10 / step11 の出力はすべて作成されること
+#
+# ///////////////////////////////////////////////////////////////
+def test_in_memory_without_intermediates_writes_same_final_outputs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    prepare_work_directory(tmp_path, objMultiMonthRowRanges)
+    iExitCode: int = run_script_main(
+        tmp_path,
+        ["--in-memory"] + list(objMultiMonthRowRanges),
+        monkeypatch,
+    )
+    assert iExitCode == 0
+    objInMemoryOutputs: Dict[str, bytes] = read_output_tree(tmp_path)
+    objFinalOutputPaths: List[str] = [
+        pszRelativePath
+        for pszRelativePath in objSerialMultiMonthOutputs
+        if "_step10_" in pszRelativePath or "_step11_" in pszRelativePath
+    ]
+    assert objFinalOutputPaths != []
+    assert set(objFinalOutputPaths) <= set(objInMemoryOutputs)
+    assert_same_output_tree(
+        {pszRelativePath: objSerialMultiMonthOutputs.get(pszRelativePath) for pszRelativePath in objInMemoryOutputs},
+        objInMemoryOutputs,
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --sheet789-engine groupby でも、正解スクリプト (7) と同じ出力になること
+#
+# ///////////////////////////////////////////////////////////////
+def test_groupby_sheet789_engine_matches_default(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    assert_mode_matches_default(
+        tmp_path,
+        monkeypatch,
+        objSerialMultiMonthOutputs,
+        ["--sheet789-engine", "groupby"],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --csv-chunk-rows で入力 CSV を分割して変換しても、既定モードと同じ出力になること。
+# 各月の入力 (2400 行) が複数のチャンクにまたがり、端数のチャンクも残る行数で確認する。
+#
+# ///////////////////////////////////////////////////////////////
+def test_csv_chunk_rows_matches_default(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    assert_mode_matches_default(
+        tmp_path,
+        monkeypatch,
+        objSerialMultiMonthOutputs,
+        ["--csv-chunk-rows", "700"],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --fused-steps で (2)〜(4) を 1 回の処理にまとめても、3 つの中間 TSV を含めて
+# 既定モードと同じ出力になること
+#
+# ///////////////////////////////////////////////////////////////
+def test_fused_steps_matches_default(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+) -> None:
+    assert_mode_matches_default(
+        tmp_path,
+        monkeypatch,
+        objSerialMultiMonthOutputs,
+        ["--fused-steps"],
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --incremental の検証用: 出力から temp/ のマニフェストを除く関数
+#
+# ///////////////////////////////////////////////////////////////
+def remove_step_manifests(
+    objOutputs: Dict[str, bytes],
+) -> Dict[str, bytes]:
+    return {
+        pszRelativePath: objBytes
+        for pszRelativePath, objBytes in objOutputs.items()
+        if not pszRelativePath.endswith("_step_manifest.tsv")
+    }
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --incremental の検証用: (1)〜(7) の出力ファイルの更新時刻を (ファイル名 → 更新時刻) で返す関数
+#
+# ///////////////////////////////////////////////////////////////
+def read_step_output_mtimes(
+    objWorkDirectoryPath: Path,
+) -> Dict[str, int]:
+    objStepOutputPattern: re.Pattern[str] = re.compile(
+        r"^工数_\d{4}年\d{2}月(\.tsv|_removed_uninput.*\.tsv|_step0[4-6]_.*\.tsv)$"
+    )
+    return {
+        objPath.name: objPath.stat().st_mtime_ns
+        for objPath in objWorkDirectoryPath.iterdir()
+        if objStepOutputPattern.match(objPath.name)
+    }
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --incremental の検証用: (1)〜(7) を再利用した入力ファイル名の一覧を標準出力から取り出す関数
+#
+# ///////////////////////////////////////////////////////////////
+def read_reused_input_file_names(
+    pszStdout: str,
+) -> List[str]:
+    return [
+        Path(pszLine.split("Input = ", 1)[1]).name
+        for pszLine in pszStdout.splitlines()
+        if pszLine.startswith("Info: inputs are unchanged.")
+    ]
+
+
+# 同じフォルダで既定モードを 2 回実行した後の出力。
+# step07 以降は前回の実行で残った管轄PJ表の状態を読むため、2 回目の実行では 1 回目と
+# 一部の月の step08〜step11 が変わる (正解スクリプトと同じ動作。3 回目以降は 2 回目と同じ)。
+@pytest.fixture(scope="module")
+def objSerialMultiMonthRerunOutputs(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, bytes]:
+    objWorkDirectoryPath: Path = tmp_path_factory.mktemp("serial_rerun")
+    prepare_work_directory(objWorkDirectoryPath, objMultiMonthRowRanges)
+    for _ in range(2):
+        with pytest.MonkeyPatch.context() as objMonkeyPatch:
+            iExitCode: int = run_script_main(
+                objWorkDirectoryPath,
+                list(objMultiMonthRowRanges),
+                objMonkeyPatch,
+            )
+        assert iExitCode == 0
+    return read_output_tree(objWorkDirectoryPath)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# --incremental:
+#   1) 同じ入力で再実行すると、全月の (1)〜(7) を再利用し、(1)〜(7) の出力はバイト単位で変わらず、
+#      出力全体は既定モードで再実行した場合と同じになること
+#   2) (1)〜(7) の出力を 1 つ書き換えると、その月だけ作り直して元の内容に戻ること
+#   3) 入力 CSV を変更すると、その月だけ作り直すこと
+#
+# ///////////////////////////////////////////////////////////////
+def test_incremental_reuses_and_rebuilds_step_outputs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    objSerialMultiMonthOutputs: Dict[str, bytes],
+    objSerialMultiMonthRerunOutputs: Dict[str, bytes],
+) -> None:
+    objArguments: List[str] = ["--incremental"] + list(objMultiMonthRowRanges)
+    prepare_work_directory(tmp_path, objMultiMonthRowRanges)
+    assert run_script_main(tmp_path, objArguments, monkeypatch) == 0
+    objFirstOutputs: Dict[str, bytes] = read_output_tree(tmp_path)
+    assert_same_output_tree(objSerialMultiMonthOutputs, remove_step_manifests(objFirstOutputs))
+    assert len(list(tmp_path.glob("temp/*_step_manifest.tsv"))) == len(objMultiMonthRowRanges)
+    assert read_reused_input_file_names(capsys.readouterr().out) == []
+
+    # 1) 再実行: すべての月で (1)〜(7) を再利用する
+    objFirstMtimes: Dict[str, int] = read_step_output_mtimes(tmp_path)
+    assert run_script_main(tmp_path, objArguments, monkeypatch) == 0
+    assert read_reused_input_file_names(capsys.readouterr().out) == list(objMultiMonthRowRanges)
+    assert read_step_output_mtimes(tmp_path) == objFirstMtimes
+    objRerunOutputs: Dict[str, bytes] = read_output_tree(tmp_path)
+    for pszFileName in objFirstMtimes:
+        assert objRerunOutputs[pszFileName] == objFirstOutputs[pszFileName]
+    assert_same_output_tree(objSerialMultiMonthRerunOutputs, remove_step_manifests(objRerunOutputs))
+
+    # 2) 2025年04月の Sheet6 を書き換える: その月だけ作り直す
+    objEditedStepOutputPath: Path = tmp_path / "工数_2025年04月_step05_スタッフ別担当プロジェクト.tsv"
+    objEditedStepOutputPath.write_bytes(objEditedStepOutputPath.read_bytes() + b"edited\n")
+    assert run_script_main(tmp_path, objArguments, monkeypatch) == 0
+    assert read_reused_input_file_names(capsys.readouterr().out) == list(objMultiMonthRowRanges)[1:]
+    assert_same_output_tree(objRerunOutputs, read_output_tree(tmp_path))
+
+    # 3) 2025年05月の入力 CSV を変更する: その月だけ作り直す
+    #    (スクリプトと管轄PJ表.csv は同じ内容で書き直されるため、ハッシュは変わらない)
+    pszStep1TsvRelativePath: str = "工数_2025年05月.tsv"
+    prepare_work_directory(tmp_path, {"工数25.5.csv": (2400, 4700)})
+    assert run_script_main(tmp_path, objArguments, monkeypatch) == 0
+    assert read_reused_input_file_names(capsys.readouterr().out) == [
+        pszFileName for pszFileName in objMultiMonthRowRanges if pszFileName != "工数25.5.csv"
+    ]
+    objChangedOutputs: Dict[str, bytes] = read_output_tree(tmp_path)
+    assert objChangedOutputs[pszStep1TsvRelativePath] != objFirstOutputs[pszStep1TsvRelativePath]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# step10 のみの入力 (工数_yyyy年mm月_step10_各プロジェクトの工数.tsv) を作成する関数。
+# 管轄PJ表.csv のプロジェクトを月ごとにずらして並べ、工数の列だけの行・計上カンパニー名の列が
+# 空の行と入力済みの行・空行・列の足りない行・管轄PJ表に無いプロジェクトを含める。
+# 戻り値: 作成したファイル名の一覧 (月順)
+#
+# ///////////////////////////////////////////////////////////////
+def write_step10_only_files(
+    objWorkDirectoryPath: Path,
+    objMonths: List[int],
+    iRowCount: int = 40,
+) -> List[str]:
+    with open(objWorkDirectoryPath / "管轄PJ表.csv", "r", encoding="utf-8", newline="") as objFile:
+        objProjectCodes: List[str] = [objRow[2] for objRow in list(csv.reader(objFile))[1:]]
+    objFileNames: List[str] = []
+    for iMonthIndex, iMonth in enumerate(objMonths):
+        objLines: List[str] = []
+        for iRowIndex in range(iRowCount):
+            pszProjectCode: str = objProjectCodes[(iMonthIndex * 7 + iRowIndex) % len(objProjectCodes)]
+            pszManhour: str = f"{iRowIndex % 9 + 1}:{(iMonthIndex * 15) % 60:02d}:00"
+            if iRowIndex % 3 == 0:
+                objLines.append(f"{pszProjectCode}\t{pszManhour}")
+            elif iRowIndex % 3 == 1:
+                objLines.append(f"{pszProjectCode}\t\t{pszManhour}")
+            else:
+                objLines.append(f"{pszProjectCode}\t{objOrgTableCompanyNames[iRowIndex % 4]}\t{pszManhour}")
+        objLines += ["", "列の足りない行", f"Z999_管轄PJ表に無いプロジェクト\t{iMonth}:00:00"]
+        pszFileName: str = f"工数_2025年{iMonth:02d}月_step10_各プロジェクトの工数.tsv"
+        (objWorkDirectoryPath / pszFileName).write_text("\n".join(objLines) + "\n", encoding="utf-8")
+        objFileNames.append(pszFileName)
+    return objFileNames
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# main() に渡した step10 のみの入力をまとめて変換しても (--jobs による並列変換を含む)、
+# 1 ファイルずつ write_step11_from_step10_only で変換した場合と同じ step11 になること。
+# 管轄PJ表の一時ファイルを作るため、先頭に CSV の入力を 1 か月分置く。
+#
+# ///////////////////////////////////////////////////////////////
+@pytest.mark.parametrize("objJobsArguments", [[], ["--jobs", "3"]], ids=["serial", "jobs"])
+def test_step10_only_batch_matches_per_file_conversion(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    objJobsArguments: List[str],
+) -> None:
+    prepare_work_directory(tmp_path, {"工数25.4.csv": (0, 600)})
+    objStep10FileNames: List[str] = write_step10_only_files(tmp_path, [5, 6, 7])
+    objStep11Paths: List[Path] = [
+        tmp_path
+        / pszFileName.replace(
+            "_step10_各プロジェクトの工数.tsv",
+            "_step11_各プロジェクトの計上カンパニー名_工数_カンパニーの工数.tsv",
+        )
+        for pszFileName in objStep10FileNames
+    ]
+    capsys.readouterr()
+    assert run_script_main(tmp_path, objJobsArguments + ["工数25.4.csv"] + objStep10FileNames, monkeypatch) == 0
+    pszStdout: str = capsys.readouterr().out
+    objBatchOutputs: List[bytes] = [objPath.read_bytes() for objPath in objStep11Paths]
+    if objJobsArguments == []:
+        # 逐次実行では、入力順に 1 ファイルずつ変換結果を出力する
+        objCreatedLines: List[str] = [
+            pszLine for pszLine in pszStdout.splitlines() if pszLine.startswith("OK: created file ")
+        ]
+        assert [Path(pszLine.split("OK: created file ", 1)[1]).name for pszLine in objCreatedLines] == [
+            objPath.name for objPath in objStep11Paths
+        ]
+
+    # 同じ 管轄PJ表 の状態で、1 ファイルずつ変換し直す
+    objModule = load_script_module(tmp_path, monkeypatch)
+    for pszFileName, objStep11Path in zip(objStep10FileNames, objStep11Paths):
+        objStep11Path.unlink()
+        assert objModule.write_step11_from_step10_only(str(tmp_path / pszFileName)) == 0
+    assert [objPath.read_bytes() for objPath in objStep11Paths] == objBatchOutputs
+    # 計上カンパニー名が空の行 (管轄PJ表にあるプロジェクト) は、管轄PJ表から補われていること
+    objStep10Lines: List[str] = (tmp_path / objStep10FileNames[0]).read_text(encoding="utf-8").splitlines()
+    objBlankCompanyProjects: List[str] = [
+        pszLine.split("\t")[0] for pszLine in objStep10Lines if "\t\t" in pszLine
+    ]
+    assert objBlankCompanyProjects != []
+    objStep11Companies: Dict[str, str] = {
+        pszLine.split("\t")[0]: pszLine.split("\t")[1]
+        for pszLine in objBatchOutputs[0].decode("utf-8").splitlines()
+        if pszLine != ""
+    }
+    assert all(objStep11Companies[pszProjectName] != "" for pszProjectName in objBlankCompanyProjects)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# write_step11_from_step10_batch は、プロセスプールで変換する場合も入力順に結果を返すこと。
+# 先頭のファイルを大きくして後のファイルより遅く終わるようにし、
+# 途中に存在しないファイル (例外) とファイル名の形式が不正なファイル (終了コード 1) を置く。
+#
+# ///////////////////////////////////////////////////////////////
+def test_step10_only_batch_yields_results_in_input_order(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    prepare_work_directory(tmp_path, {})
+    objStep10FileNames: List[str] = write_step10_only_files(tmp_path, [4], 20000) + write_step10_only_files(
+        tmp_path,
+        [5, 6],
+    )
+    (tmp_path / "step10_形式が不正なファイル名.tsv").write_text("", encoding="utf-8")
+    objStep10Paths: List[str] = [
+        str(tmp_path / objStep10FileNames[0]),
+        str(tmp_path / "工数_2025年08月_step10_各プロジェクトの工数.tsv"),
+        str(tmp_path / objStep10FileNames[1]),
+        str(tmp_path / "step10_形式が不正なファイル名.tsv"),
+        str(tmp_path / objStep10FileNames[2]),
+    ]
+    objModule = load_script_module(tmp_path, monkeypatch)
+    objExpectedResults: List[tuple[int, type | None]] = [
+        (0, None),
+        (1, FileNotFoundError),
+        (0, None),
+        (1, None),
+        (0, None),
+    ]
+
+    objSerialResults = list(objModule.write_step11_from_step10_batch(objStep10Paths))
+    assert [
+        (iResult, None if objException is None else type(objException))
+        for iResult, objException in objSerialResults
+    ] == objExpectedResults
+    objSerialOutputs: List[bytes] = [
+        objPath.read_bytes() for objPath in sorted(tmp_path.glob("*_step11_*.tsv"))
+    ]
+    for objPath in tmp_path.glob("*_step11_*.tsv"):
+        objPath.unlink()
+
+    with ProcessPoolExecutor(max_workers=3) as objExecutor:
+        objParallelResults = list(objModule.write_step11_from_step10_batch(objStep10Paths, objExecutor))
+    assert [
+        (iResult, None if objException is None else type(objException))
+        for iResult, objException in objParallelResults
+    ] == objExpectedResults
+    assert [objPath.read_bytes() for objPath in sorted(tmp_path.glob("*_step11_*.tsv"))] == objSerialOutputs